@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.routes import health, webhook
+from app.api.routes import admin, health, metrics, webhook
 
 api_router = APIRouter()
+api_router.include_router(admin.router)
 api_router.include_router(health.router)
+api_router.include_router(metrics.router)
 api_router.include_router(webhook.router)
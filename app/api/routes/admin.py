@@ -0,0 +1,27 @@
+"""Rotas administrativas (protegidas por ADMIN_TOKEN)."""
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.core.config import get_settings
+from app.domain.catalog_service import publish_catalog_update
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _require_admin(token: str) -> None:
+    settings = get_settings()
+    if not settings.admin_token:
+        raise HTTPException(status_code=503, detail="ADMIN_TOKEN não configurado")
+    if not hmac.compare_digest(token.encode("utf-8"), settings.admin_token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Token admin inválido")
+
+
+@router.post("/catalog/publish")
+def publish_catalog(x_admin_token: str = Header(default="")):
+    """Avisa todas as instâncias que o catálogo mudou no Supabase (preço, sinônimo)."""
+    _require_admin(x_admin_token)
+    stamp = publish_catalog_update("admin")
+    return {"published": stamp is not None, "stamp": stamp}
@@ -24,21 +24,32 @@ def health():
     settings = get_settings()
     store = get_state_store(settings)
     catalog_size = 0
+    catalog_info = {}
     try:
-        from app.domain.catalog_service import get_catalog_bundle
+        from app.domain.catalog_service import get_catalog_snapshot, get_catalog_stats
 
-        catalog, _, _ = get_catalog_bundle()
-        catalog_size = len(catalog)
+        catalog_size = len(get_catalog_snapshot().catalog)
+        catalog_info = get_catalog_stats()
     except Exception:
         catalog_size = 0
 
+    gemini_models = {}
+    try:
+        from app.services.gemini_router import get_model_stats
+
+        gemini_models = get_model_stats()
+    except Exception:
+        gemini_models = {}
+
     redis_info = _redis_ping(settings)
     return {
         "status": "ok",
         "store": store.__class__.__name__,
         "catalog_size": catalog_size,
+        "catalog": catalog_info,
         "transcription_service": settings.transcription_service_normalized,
         "message_service": settings.message_service_normalized,
         "use_redis": settings.use_redis,
         "redis": redis_info,
+        "gemini_models": gemini_models,
     }
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.infrastructure.metrics import snapshot
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def metrics():
+    return snapshot()
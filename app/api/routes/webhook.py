@@ -55,6 +55,8 @@ async def handle_webhook(request: Request):
             return Response(status_code=200)
 
         message_data = value["messages"][0]
+        # Número da loja que recebeu a mensagem (escolhe o catálogo no modo multi-loja)
+        phone_number_id = (value.get("metadata") or {}).get("phone_number_id")
         msg_id = message_data.get("id", "?")
         logger.info(
             "Webhook mensagem %s type=%s — processando em background",
@@ -63,7 +65,7 @@ async def handle_webhook(request: Request):
         )
 
         task = asyncio.create_task(
-            asyncio.to_thread(process_incoming_message, message_data, settings)
+            asyncio.to_thread(process_incoming_message, message_data, settings, phone_number_id)
         )
         _pending_tasks.add(task)
 
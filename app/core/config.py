@@ -29,6 +29,53 @@ class Settings(BaseSettings):
     message_service: str = Field(default="whatsapp", alias="MESSAGE_SERVICE")
     gemini_model: str = Field(default="gemini-3.5-flash", alias="GEMINI_MODEL")
 
+    # Roteamento leve/completo por complexidade (GEMINI_LIGHT_MODEL vazio = desligado)
+    gemini_light_model: str = Field(default="", alias="GEMINI_LIGHT_MODEL")
+    gemini_router_max_chars: int = Field(default=280, alias="GEMINI_ROUTER_MAX_CHARS")
+    gemini_router_max_materials: int = Field(default=4, alias="GEMINI_ROUTER_MAX_MATERIALS")
+    gemini_router_min_confidence: float = Field(default=0.75, alias="GEMINI_ROUTER_MIN_CONFIDENCE")
+
+    # Custo por modelo (USD por 1M tokens): "modelo=entrada/saida,modelo2=entrada/saida"
+    gemini_prices_per_mtok: str = Field(default="", alias="GEMINI_PRICES_PER_MTOK")
+
+    # Micro-batching da extração Gemini (pico de áudios)
+    gemini_batch_enabled: bool = Field(default=False, alias="GEMINI_BATCH_ENABLED")
+    gemini_batch_window_ms: int = Field(default=200, alias="GEMINI_BATCH_WINDOW_MS")
+    gemini_batch_max_items: int = Field(default=8, alias="GEMINI_BATCH_MAX_ITEMS")
+    gemini_batch_max_concurrency: int = Field(default=4, alias="GEMINI_BATCH_MAX_CONCURRENCY")
+
+    # Cache do catálogo (stale-while-revalidate: vencido o TTL, recarrega em background).
+    # Com Redis, o TTL só confere o carimbo de versão; a recarga completa fica para a
+    # invalidação (pub/sub) ou para CATALOG_MAX_AGE_SECONDS.
+    catalog_ttl_seconds: float = Field(default=300, alias="CATALOG_TTL_SECONDS")
+    catalog_max_age_seconds: float = Field(default=21600, alias="CATALOG_MAX_AGE_SECONDS")
+    # Entre cargas completas, o refresh busca só linhas com `updated_at` novo (0 = sempre completa)
+    catalog_full_sync_seconds: float = Field(default=3600, alias="CATALOG_FULL_SYNC_SECONDS")
+    # Carga paginada (o PostgREST limita ~1000 linhas por resposta); páginas em paralelo
+    catalog_page_size: int = Field(default=1000, alias="CATALOG_PAGE_SIZE")
+    catalog_load_concurrency: int = Field(default=4, alias="CATALOG_LOAD_CONCURRENCY")
+    # Último catálogo bom em disco para o startup não depender do Supabase (vazio = desligado)
+    catalog_snapshot_path: str = Field(
+        default=".cache/catalog_snapshot.pickle",
+        alias="CATALOG_SNAPSHOT_PATH",
+    )
+    # Multi-loja: catálogo por phone_number_id do webhook (materials.tenant_id, migração 005)
+    catalog_tenants_enabled: bool = Field(default=False, alias="CATALOG_TENANTS_ENABLED")
+    catalog_tenant_cache_size: int = Field(default=32, alias="CATALOG_TENANT_CACHE_SIZE")
+    catalog_tenant_cache_mb: float = Field(default=256, alias="CATALOG_TENANT_CACHE_MB")
+    catalog_refresh_backoff_seconds: float = Field(default=5, alias="CATALOG_REFRESH_BACKOFF_SECONDS")
+    catalog_refresh_max_backoff_seconds: float = Field(
+        default=300,
+        alias="CATALOG_REFRESH_MAX_BACKOFF_SECONDS",
+    )
+
+    # Índice vetorial do catálogo (NumPy): fallback local antes do LLM
+    vector_index_enabled: bool = Field(default=True, alias="VECTOR_INDEX_ENABLED")
+    vector_index_dir: str = Field(default=".cache/vector_index", alias="VECTOR_INDEX_DIR")
+    vector_index_dim: int = Field(default=4096, alias="VECTOR_INDEX_DIM")
+    vector_match_min_score: float = Field(default=0.35, alias="VECTOR_MATCH_MIN_SCORE")
+    vector_match_margin: float = Field(default=0.1, alias="VECTOR_MATCH_MARGIN")
+
     # Redis / estado
     redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
     use_redis: bool = Field(default=True, alias="USE_REDIS")
@@ -40,8 +87,13 @@ class Settings(BaseSettings):
     http_max_retries: int = Field(default=3, alias="HTTP_MAX_RETRIES")
     http_retry_backoff_seconds: float = Field(default=1.5, alias="HTTP_RETRY_BACKOFF_SECONDS")
 
+    # Rotas administrativas (vazio = desligadas)
+    admin_token: str = Field(default="", alias="ADMIN_TOKEN")
+
     # Rate limit simples (Sprint 1 base)
     max_audio_per_hour: int = Field(default=20, alias="MAX_AUDIO_PER_HOUR")
+    # Áudios do mesmo chat com intervalo até N s viram um pedido só (0 = desligado; opt-in)
+    audio_debounce_seconds: float = Field(default=0, alias="AUDIO_DEBOUNCE_SECONDS")
 
     # Branding do PDF (futuro: por cliente no banco)
     pdf_company_name: str = Field(default="Sua Empresa de Materiais", alias="PDF_COMPANY_NAME")
@@ -55,6 +107,9 @@ class Settings(BaseSettings):
     pdf_primary_color: str = Field(default="27,54,93", alias="PDF_PRIMARY_COLOR")
     pdf_accent_color: str = Field(default="242,141,62", alias="PDF_ACCENT_COLOR")
     pdf_validade_dias: int = Field(default=7, alias="PDF_VALIDADE_DIAS")
+    # Renderiza o PDF em background enquanto o usuário revisa a lista (e opcionalmente sobe para a Meta)
+    pdf_prerender_enabled: bool = Field(default=True, alias="PDF_PRERENDER_ENABLED")
+    pdf_prerender_upload: bool = Field(default=False, alias="PDF_PRERENDER_UPLOAD")
 
     @property
     def message_service_normalized(self) -> str:
@@ -116,6 +116,42 @@ DEFAULT_UNITS: Dict[str, str] = {
     "tubo": "metro",
 }
 
+# Descrições livres (como o cliente fala do material) para o índice vetorial
+DEFAULT_DESCRIPTIONS: Dict[str, str] = {
+    "arame": "ferro fino de amarrar ferragem, arame de amarração",
+    "vergalhão": "barra de ferro para coluna, viga e laje, ferragem da estrutura",
+    "tela": "malha de ferro para laje e piso, tela de galinheiro",
+    "cimento": "pó cinza para concreto e massa, saco de 50 kg",
+    "argamassa": "massa pronta para assentar piso e azulejo, cola de piso",
+    "cal": "pó branco para massa de reboco e pintura de caiação",
+    "areia": "areia de rio para massa e concreto",
+    "brita": "pedra britada para concreto, pedrisco",
+    "tijolo": "tijolo baiano de oito furos para levantar parede",
+    "bloco": "bloco de cimento para alvenaria estrutural",
+    "caibro": "madeira do telhado que apoia as ripas",
+    "ripa": "madeira fina do telhado onde apoia a telha",
+    "pontalete": "escora de madeira para laje",
+    "compensado": "chapa de madeira colada para forma de concreto",
+    "prego": "prego de aço para madeira e forma",
+    "parafuso": "parafuso com bucha para fixar na parede",
+    "cano": "cano de pvc para água e esgoto, tubulação",
+    "conexão": "joelho, luva, tê e curva de pvc",
+    "registro": "registro de gaveta ou de pressão para fechar a água",
+    "sifão": "peça sanfonada embaixo da pia",
+    "fio": "fio elétrico de cobre para instalação",
+    "conduíte": "mangueira corrugada para passar fio na parede",
+    "disjuntor": "chave do quadro de luz",
+    "rejunte": "massa para fechar junta de piso e azulejo",
+    "impermeabilizante": "produto para vedar laje e evitar infiltração",
+    "manta": "manta asfáltica para impermeabilizar laje",
+    "selador": "fundo preparador de parede antes da tinta",
+    "massa corrida": "massa para alisar parede antes de pintar",
+    "espuma": "espuma expansiva de poliuretano para fixar porta",
+    "colher de pedreiro": "ferramenta para assentar tijolo e massa",
+    "trena": "fita métrica para medir",
+    "nível": "ferramenta de bolha para nivelar",
+}
+
 
 def build_seed_rows(catalog: Dict[str, List[str]]) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
@@ -127,6 +163,7 @@ def build_seed_rows(catalog: Dict[str, List[str]]) -> List[Dict[str, Any]]:
                 "default_unit": DEFAULT_UNITS.get(name, "unidade"),
                 "unit_price": float(DEFAULT_PRICES.get(name, 0.0)),
                 "category": None,
+                "description": DEFAULT_DESCRIPTIONS.get(name),
                 "active": True,
             }
         )
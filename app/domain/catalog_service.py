@@ -1,143 +1,1178 @@
 """Serviço de catálogo com cache e fallback para seed em código."""
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import json
 import logging
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-from app.domain.catalog_seed import build_seed_rows
-from app.services.nlp_obras import CATALOGO_MATERIAIS, set_runtime_catalog
+from app.domain.catalog_seed import DEFAULT_DESCRIPTIONS, build_seed_rows
+from app.domain.material_line import MaterialLike, MaterialLine, as_material_lines, lines_total
+from app.infrastructure import metrics
+from app.infrastructure.catalog_bus import (
+    get_catalog_stamp,
+    publish_catalog_change,
+    start_catalog_listener,
+)
+from app.infrastructure.snapshot_file import read_snapshot_file, write_snapshot_file
+from app.services.nlp_obras import (
+    CATALOGO_MATERIAIS,
+    CatalogMatchers,
+    build_catalog_matchers,
+    normalize_text,
+    pin_catalog_matchers,
+    publish_catalog_matchers,
+    published_matchers,
+    set_runtime_catalog,
+    update_catalog_matchers,
+)
+from app.services.vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
-_CACHE: Dict[str, Any] = {
-    "loaded_at": 0.0,
-    "catalog": None,  # name -> synonyms
-    "prices": None,  # name -> unit_price
-    "units": None,  # name -> default_unit
-}
-_CACHE_TTL_SECONDS = 300
 
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Uma versão completa do catálogo (sinônimos, preços, unidades e índices
+    compilados). Imutável e trocada por referência: leitura sem lock, e um
+    reload nunca mistura catálogo novo com preço antigo.
+    """
 
-def _seed_catalog_maps() -> Tuple[Dict[str, List[str]], Dict[str, float], Dict[str, str]]:
+    catalog: Mapping[str, Tuple[str, ...]]
+    prices: Mapping[str, float]
+    units: Mapping[str, str]
+    descriptions: Mapping[str, str]
+    matchers: CatalogMatchers
+    version: str
+    loaded_at: float
+    source: str
+    stamp: Optional[str] = None  # carimbo do Redis visto na carga (invalidação entre instâncias)
+    fetched_at: float = 0.0  # última leitura real da fonte (loaded_at também renova por carimbo)
+    full_loaded_at: float = 0.0  # última carga completa (o delta vale até CATALOG_FULL_SYNC_SECONDS)
+    synced_at: Optional[str] = None  # maior `updated_at` já aplicado (relógio do banco)
+    tenant_id: Optional[str] = None  # loja (phone_number_id); None = catálogo padrão
+    # Nome/sinônimo normalizado (sem acento) -> nome canônico; montado junto com a versão
+    price_keys: Optional[Mapping[str, str]] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.price_keys is None:
+            object.__setattr__(self, "price_keys", build_price_keys(self.catalog))
+
+    def canonical_for(self, material_name: str) -> Optional[str]:
+        """Nome canônico pelo próprio nome ou qualquer sinônimo (sem acento, plural simples)."""
+        key = normalize_text(material_name)
+        canonical = self.price_keys.get(key)
+        if canonical is None and key.endswith("s"):
+            canonical = self.price_keys.get(key[:-1])
+        return canonical
+
+    def price_for(self, material_name: str) -> Optional[float]:
+        """Preço pelo nome canônico ou qualquer sinônimo (None se não está no catálogo)."""
+        canonical = self.canonical_for(material_name)
+        return None if canonical is None else self.prices.get(canonical)
+
+
+def build_price_keys(catalog: Mapping[str, Sequence[str]]) -> Mapping[str, str]:
+    keys: Dict[str, str] = {}
+    for name, synonyms in catalog.items():
+        for synonym in synonyms:
+            keys.setdefault(normalize_text(synonym), name)
+    # Nome canônico ganha de sinônimo igual de outro material
+    for name in catalog:
+        keys[normalize_text(name)] = name
+    return MappingProxyType(keys)
+
+
+_SNAPSHOT: Optional[CatalogSnapshot] = None
+_PINNED: contextvars.ContextVar[Optional[CatalogSnapshot]] = contextvars.ContextVar(
+    "catalog_snapshot",
+    default=None,
+)
+_PUBLISH_LOCK = threading.Lock()
+
+
+CatalogMaps = Tuple[Dict[str, List[str]], Dict[str, float], Dict[str, str], Dict[str, str]]
+
+
+def _seed_catalog_maps() -> CatalogMaps:
     catalog = {k: list(v) for k, v in CATALOGO_MATERIAIS.items()}
     rows = build_seed_rows(catalog)
     prices = {r["name"]: float(r["unit_price"]) for r in rows}
     units = {r["name"]: r["default_unit"] for r in rows}
-    return catalog, prices, units
+    descriptions = {name: text for name, text in DEFAULT_DESCRIPTIONS.items() if name in catalog}
+    return catalog, prices, units, descriptions
+
+
+class _MaterialRowStream:
+    """
+    Linhas de `materials` página a página, via `range` (o PostgREST corta a
+    resposta em ~1000 linhas). A primeira página traz o total (`count=exact`);
+    as demais saem em paralelo e cada página é consumida e descartada, sem
+    montar a lista inteira. Com o total conhecido, página cortada pelo
+    servidor (max-rows menor que `page_size`) é completada; faltando linhas
+    no fim, a carga falha em vez de publicar o catálogo pela metade. Ao fim,
+    `rows`/`pages` ficam com o que foi lido; quem consome decide onde
+    registrar (`_record_rows_read`).
+    """
+
+    def __init__(
+        self,
+        client,
+        since: Optional[str],
+        page_size: int,
+        concurrency: int,
+        tenant_id: Optional[str] = None,
+        scoped: bool = False,
+    ):
+        self.client = client
+        self.since = since
+        self.tenant_id = tenant_id
+        self.scoped = scoped  # multi-loja: sem tenant_id, só as linhas do catálogo padrão (NULL)
+        self.page_size = max(1, page_size)
+        self.concurrency = max(1, concurrency)
+        self.rows = 0
+        self.pages = 0
+        self.total: Optional[int] = None
+
+    def _page(self, start: int, count: Optional[str] = None, size: Optional[int] = None):
+        # Sem `since`, só ativas (carga completa); com `since`, alteradas desde então, inclusive desativadas
+        query = self.client.table("materials").select("*", count=count)
+        if self.since is None:
+            query = query.eq("active", True)
+        else:
+            query = query.gte("updated_at", self.since)
+        if self.tenant_id is not None:
+            query = query.eq("tenant_id", self.tenant_id)
+        elif self.scoped:
+            query = query.is_("tenant_id", "null")
+        # Ordem estável para os ranges não pularem nem repetirem linhas
+        return query.order("id").range(start, start + (size or self.page_size) - 1).execute()
+
+    def _fill(self, start: int, end: int, step: int) -> Iterator[List[Dict[str, Any]]]:
+        """Pede [start, end) em sequência; página cortada pelo servidor continua de onde parou."""
+        while start < end:
+            page = self._page(start, size=min(step, end - start)).data or []
+            if not page:
+                return
+            yield page
+            start += len(page)
+
+    def _pages(self) -> Iterator[List[Dict[str, Any]]]:
+        first = self._page(0, count="exact")
+        self.total = first.count
+        rows = first.data or []
+        yield rows
+        if self.total is None:
+            # Sem total: sequencial até uma página curta
+            offset, last = len(rows), len(rows)
+            while last == self.page_size:
+                page = self._page(offset).data or []
+                yield page
+                offset, last = offset + len(page), len(page)
+            return
+
+        received = len(rows)
+        # Página menor que o pedido com linhas faltando: o max-rows do PostgREST é o passo real
+        step = self.page_size if received >= min(self.page_size, self.total) else received
+        last_full = received == step
+        if step and self.total > received:
+            starts = list(range(received, self.total, step))
+            gaps: List[Tuple[int, int]] = []
+            workers = min(self.concurrency, len(starts))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="catalog-page") as pool:
+                futures = {pool.submit(self._page, start, None, step): start for start in starts}
+                for future in as_completed(futures):
+                    start = futures[future]
+                    page = future.result().data or []
+                    received += len(page)
+                    expected = min(step, self.total - start)
+                    if len(page) < expected:
+                        gaps.append((start + len(page), start + expected))
+                    if start == starts[-1]:
+                        last_full = len(page) == step
+                    yield page
+            for gap_start, gap_end in sorted(gaps):
+                for page in self._fill(gap_start, gap_end, step):
+                    received += len(page)
+                    yield page
+        if received < self.total:
+            # Melhor falhar (mantém o snapshot atual) que publicar catálogo pela metade
+            raise RuntimeError(f"Carga de materials incompleta: {received} de {self.total} linhas")
+
+        # Total desatualizado (linhas inseridas durante a carga): segue sequencial até página curta
+        offset = max(self.total, received)
+        while last_full and step:
+            page = self._page(offset, size=step).data or []
+            yield page
+            last_full = len(page) == step
+            offset += len(page)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for page in self._pages():
+            self.pages += 1
+            self.rows += len(page)
+            yield from page
+        metrics.observe("catalog_rows_loaded", self.rows, delta=self.since is not None)
+
+
+def _fetch_material_rows(
+    since: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+) -> Optional[Iterable[Dict[str, Any]]]:
+    """Linhas de `materials` no Supabase (paginadas); None se não configurado. Erros de rede sobem."""
+    from app.core.config import get_settings
+    from app.services.supabase_client import get_supabase_client
+
+    client = get_supabase_client()
+    if not client:
+        return None
+    settings = get_settings()
+    return _MaterialRowStream(
+        client,
+        since,
+        settings.catalog_page_size,
+        settings.catalog_load_concurrency,
+        tenant_id=tenant_id,
+        scoped=settings.catalog_tenants_enabled,
+    )
+
 
+def _record_rows_read(rows: Iterable[Dict[str, Any]]) -> None:
+    """Linhas/páginas lidas na última busca do catálogo padrão (`/health`); lojas não entram."""
+    if isinstance(rows, _MaterialRowStream):
+        with _REFRESH_LOCK:
+            _REFRESH.last_rows = rows.rows
+            _REFRESH.last_pages = rows.pages
 
-def _load_from_supabase() -> Optional[Tuple[Dict[str, List[str]], Dict[str, float], Dict[str, str]]]:
+
+def _parse_row(row: Dict[str, Any]) -> Tuple[str, List[str], float, str, str]:
+    name = str(row["name"]).strip().lower()
+    synonyms = row.get("synonyms") or []
+    if not isinstance(synonyms, list):
+        synonyms = []
+    return (
+        name,
+        [str(s) for s in synonyms] or [name],
+        float(row.get("unit_price") or 0),
+        str(row.get("default_unit") or "unidade"),
+        str(row.get("description") or ""),
+    )
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
     try:
-        from app.services.supabase_client import get_supabase_client
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
 
-        client = get_supabase_client()
-        if not client:
-            return None
 
-        result = (
-            client.table("materials")
-            .select("name,synonyms,default_unit,unit_price,active")
-            .eq("active", True)
-            .execute()
-        )
-        rows = result.data or []
-        if not rows:
-            return None
+def _later_timestamp(current: Optional[str], candidate: Any) -> Optional[str]:
+    """O mais recente entre a marca d'água e o `updated_at` da linha (ISO, como veio do banco)."""
+    candidate_at = _parse_timestamp(candidate)
+    if candidate_at is None:
+        return current
+    current_at = _parse_timestamp(current)
+    return str(candidate) if current_at is None or candidate_at > current_at else current
 
-        catalog: Dict[str, List[str]] = {}
-        prices: Dict[str, float] = {}
-        units: Dict[str, str] = {}
-        for row in rows:
-            name = str(row["name"]).strip().lower()
-            synonyms = row.get("synonyms") or []
-            if not isinstance(synonyms, list):
-                synonyms = []
-            catalog[name] = [str(s) for s in synonyms] or [name]
-            prices[name] = float(row.get("unit_price") or 0)
-            units[name] = str(row.get("default_unit") or "unidade")
-        return catalog, prices, units
-    except Exception as exc:
-        logger.warning("Falha ao carregar catálogo do Supabase: %s", exc)
+
+def _load_from_supabase(tenant_id: Optional[str] = None) -> Optional[Tuple[CatalogMaps, Optional[str]]]:
+    """Catálogo ativo completo + marca d'água do delta; None se não configurado/vazio."""
+    rows = _fetch_material_rows(tenant_id=tenant_id) if tenant_id else _fetch_material_rows()
+    if rows is None:
         return None
 
+    synced_at: Optional[str] = None
+    catalog: Dict[str, List[str]] = {}
+    prices: Dict[str, float] = {}
+    units: Dict[str, str] = {}
+    descriptions: Dict[str, str] = {}
+    for row in rows:
+        name, synonyms, price, unit, description = _parse_row(row)
+        catalog[name] = synonyms
+        prices[name] = price
+        units[name] = unit
+        if description:
+            descriptions[name] = description
+        synced_at = _later_timestamp(synced_at, row.get("updated_at"))
+    if tenant_id is None:
+        _record_rows_read(rows)
+    if not catalog:
+        return None
+    return (catalog, prices, units, descriptions), synced_at
 
-def get_catalog_bundle(force_refresh: bool = False) -> Tuple[Dict[str, List[str]], Dict[str, float], Dict[str, str]]:
-    now = time.time()
-    if (
-        not force_refresh
-        and _CACHE["catalog"] is not None
-        and now - float(_CACHE["loaded_at"]) < _CACHE_TTL_SECONDS
-    ):
-        return _CACHE["catalog"], _CACHE["prices"], _CACHE["units"]
 
+def _reload_snapshot() -> CatalogSnapshot:
+    """Carrega Supabase (ou seed) e publica; versão igual à atual só renova o `loaded_at`."""
+    global _SNAPSHOT
+    # Lido antes da carga: uma publicação durante a carga força outra recarga depois
+    stamp = get_catalog_stamp()
+    started = time.monotonic()
     loaded = _load_from_supabase()
+    load_ms = (time.monotonic() - started) * 1000
+    synced_at: Optional[str] = None
     if loaded:
-        catalog, prices, units = loaded
+        (catalog, prices, units, descriptions), synced_at = loaded
         source = "supabase"
     else:
-        catalog, prices, units = _seed_catalog_maps()
+        catalog, prices, units, descriptions = _seed_catalog_maps()
         source = "seed"
 
-    _CACHE["catalog"] = catalog
-    _CACHE["prices"] = prices
-    _CACHE["units"] = units
-    _CACHE["loaded_at"] = now
-    set_runtime_catalog(catalog)
-    logger.info("Catálogo carregado (%s): %s itens", source, len(catalog))
-    return catalog, prices, units
+    current = _SNAPSHOT
+    version = catalog_version(catalog, prices, units, descriptions)
+    if current is not None and current.version == version:
+        with _PUBLISH_LOCK:
+            if _SNAPSHOT is current:
+                now = time.time()
+                _SNAPSHOT = replace(
+                    current,
+                    loaded_at=now,
+                    fetched_at=now,
+                    full_loaded_at=now,
+                    source=source,
+                    stamp=stamp,
+                    synced_at=synced_at,
+                )
+                return _SNAPSHOT
 
+    snapshot = _publish_snapshot(
+        catalog, prices, units, descriptions, source, stamp, synced_at=synced_at
+    )
+    logger.info(
+        "Catálogo carregado (%s): %s itens em %.0f ms, versão %s",
+        source,
+        len(catalog),
+        load_ms,
+        snapshot.version,
+    )
+    return snapshot
 
-def get_canonical_names() -> List[str]:
-    catalog, _, _ = get_catalog_bundle()
-    return sorted(catalog.keys(), key=len, reverse=True)
-
-
-def get_unit_price(material_name: str) -> float:
-    _, prices, _ = get_catalog_bundle()
-    key = material_name.strip().lower()
-    if key in prices:
-        return float(prices[key])
-    # tenta sem acento simples
-    for name, price in prices.items():
-        if name == key:
-            return float(price)
-    return 0.0
-
-
-def enrich_materials_with_prices(materials: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    enriched: List[Dict[str, Any]] = []
-    for item in materials:
-        qty_raw = str(item.get("quantidade", "1")).replace(",", ".")
-        try:
-            qty = float(qty_raw)
-        except ValueError:
-            qty = 1.0
-        unit_price = get_unit_price(str(item.get("material", "")))
-        total = round(qty * unit_price, 2)
-        enriched.append(
-            {
-                **item,
-                "quantidade": str(item.get("quantidade", "1")),
-                "preco_unitario": f"{unit_price:.2f}",
-                "preco_total": f"{total:.2f}",
-            }
+
+# Folga na marca d'água: linha gravada numa transação longa pode ter `updated_at`
+# anterior ao último já visto. Reaplicar uma linha é idempotente.
+_DELTA_OVERLAP = timedelta(seconds=60)
+
+
+def _delta_due(snapshot: Optional[CatalogSnapshot]) -> bool:
+    """Dá para sincronizar só o delta (senão, carga completa de conferência)."""
+    from app.core.config import get_settings
+
+    full_sync = get_settings().catalog_full_sync_seconds
+    return (
+        snapshot is not None
+        and snapshot.source == "supabase"
+        and snapshot.synced_at is not None
+        and full_sync > 0
+        and time.time() - snapshot.full_loaded_at < full_sync
+    )
+
+
+def _sync_delta() -> CatalogSnapshot:
+    """Aplica ao snapshot atual só as linhas alteradas desde a última sincronização."""
+    global _SNAPSHOT
+    stamp = get_catalog_stamp()
+    current = _SNAPSHOT
+    since_at = _parse_timestamp(current.synced_at)
+    since = (since_at - _DELTA_OVERLAP).isoformat() if since_at else current.synced_at
+    rows = _fetch_material_rows(since)
+    if rows is None:
+        return _reload_snapshot()
+
+    catalog = {name: list(synonyms) for name, synonyms in current.catalog.items()}
+    prices = dict(current.prices)
+    units = dict(current.units)
+    descriptions = dict(current.descriptions)
+    synced_at = current.synced_at
+    changed = 0
+    for row in rows:
+        changed += 1
+        synced_at = _later_timestamp(synced_at, row.get("updated_at"))
+        name, synonyms, price, unit, description = _parse_row(row)
+        if not row.get("active", True):
+            for mapping in (catalog, prices, units, descriptions):
+                mapping.pop(name, None)
+            continue
+        catalog[name] = synonyms
+        prices[name] = price
+        units[name] = unit
+        if description:
+            descriptions[name] = description
+        else:
+            descriptions.pop(name, None)
+    if not catalog:
+        return _reload_snapshot()  # tudo desativado: a carga completa decide (seed)
+
+    _record_rows_read(rows)
+    with _REFRESH_LOCK:
+        _REFRESH.delta_syncs += 1
+        _REFRESH.last_delta_rows = changed
+    metrics.increment("catalog_delta_rows_total", changed)
+
+    version = catalog_version(catalog, prices, units, descriptions)
+    if version == current.version:
+        with _PUBLISH_LOCK:
+            if _SNAPSHOT is current:
+                now = time.time()
+                _SNAPSHOT = replace(current, loaded_at=now, fetched_at=now, stamp=stamp, synced_at=synced_at)
+                return _SNAPSHOT
+
+    snapshot = _publish_snapshot(
+        catalog,
+        prices,
+        units,
+        descriptions,
+        current.source,
+        stamp,
+        synced_at=synced_at,
+        full_loaded_at=current.full_loaded_at,
+    )
+    logger.info("Catálogo sincronizado (delta): %s linhas, versão %s", changed, snapshot.version)
+    return snapshot
+
+
+@dataclass
+class _RefreshState:
+    in_flight: bool = False
+    consecutive_failures: int = 0
+    total_refreshes: int = 0
+    total_failures: int = 0
+    next_attempt_at: float = 0.0  # monotonic
+    last_error: str = ""
+    last_load_ms: Optional[float] = None
+    pending: bool = False  # invalidação chegou com refresh em andamento
+    forced: bool = False
+    invalidations: int = 0
+    stamp_hits: int = 0  # checagens em que o carimbo não mudou (sem ida ao Supabase)
+    delta_syncs: int = 0
+    last_delta_rows: Optional[int] = None
+    last_rows: Optional[int] = None  # linhas/páginas lidas do Supabase na última busca
+    last_pages: Optional[int] = None
+
+
+_REFRESH = _RefreshState()
+_REFRESH_LOCK = threading.Lock()
+
+
+def _refresh_settings() -> Tuple[float, float, float, float]:
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    return (
+        settings.catalog_ttl_seconds,
+        settings.catalog_refresh_backoff_seconds,
+        settings.catalog_refresh_max_backoff_seconds,
+        settings.catalog_max_age_seconds,
+    )
+
+
+def _trigger_refresh(force: bool = False) -> bool:
+    """
+    Dispara no máximo um refresh em background por processo (respeitando o
+    backoff). `force` (invalidação) ignora o carimbo e o backoff; se já houver
+    refresh rodando, agenda mais um para depois dele.
+    """
+    with _REFRESH_LOCK:
+        if _REFRESH.in_flight:
+            _REFRESH.pending = _REFRESH.pending or force
+            return False
+        if not force and time.monotonic() < _REFRESH.next_attempt_at:
+            return False
+        _REFRESH.in_flight = True
+        _REFRESH.forced = force
+    threading.Thread(target=_refresh_worker, name="catalog-refresh", daemon=True).start()
+    return True
+
+
+def _stamp_unchanged(snapshot: Optional[CatalogSnapshot]) -> bool:
+    """TTL venceu mas o carimbo no Redis é o mesmo da carga: só renova o `loaded_at`."""
+    global _SNAPSHOT
+    _, _, _, max_age = _refresh_settings()
+    if snapshot is None or snapshot.stamp is None or time.time() - snapshot.fetched_at >= max_age:
+        return False
+    if get_catalog_stamp() != snapshot.stamp:
+        return False
+    with _PUBLISH_LOCK:
+        if _SNAPSHOT is snapshot:
+            _SNAPSHOT = replace(snapshot, loaded_at=time.time())
+    return True
+
+
+def _refresh_worker() -> None:
+    while True:
+        _refresh_once()
+        with _REFRESH_LOCK:
+            if not _REFRESH.pending:
+                _REFRESH.in_flight = False
+                return
+            _REFRESH.pending = False
+            _REFRESH.forced = True
+
+
+def _refresh_once() -> None:
+    started = time.monotonic()
+    error = ""
+    with _REFRESH_LOCK:
+        forced = _REFRESH.forced
+    try:
+        if not forced and _stamp_unchanged(_SNAPSHOT):
+            with _REFRESH_LOCK:
+                _REFRESH.stamp_hits += 1
+            metrics.increment("catalog_refresh_total", ok=True, reload=False)
+            return
+        if _delta_due(_SNAPSHOT):
+            _sync_delta()
+        else:
+            _reload_snapshot()
+    except Exception as exc:
+        error = str(exc)[:200] or exc.__class__.__name__
+        logger.warning("Refresh do catálogo falhou; mantendo snapshot atual: %s", exc)
+    elapsed_ms = (time.monotonic() - started) * 1000
+    _, backoff, max_backoff, _ = _refresh_settings()
+
+    with _REFRESH_LOCK:
+        _REFRESH.total_refreshes += 1
+        _REFRESH.last_load_ms = round(elapsed_ms, 1)
+        if error:
+            _REFRESH.consecutive_failures += 1
+            _REFRESH.total_failures += 1
+            _REFRESH.last_error = error
+            delay = min(max_backoff, backoff * 2 ** (_REFRESH.consecutive_failures - 1))
+            _REFRESH.next_attempt_at = time.monotonic() + delay
+        else:
+            _REFRESH.consecutive_failures = 0
+            _REFRESH.next_attempt_at = 0.0
+    metrics.observe("catalog_load_ms", elapsed_ms)
+    metrics.increment("catalog_refresh_total", ok=not error, reload=True)
+
+
+def _on_catalog_invalidated(stamp: str) -> None:
+    current = _SNAPSHOT
+    if current is not None and stamp and current.stamp == stamp:
+        return  # já carregado com esse carimbo
+    with _REFRESH_LOCK:
+        _REFRESH.invalidations += 1
+    metrics.increment("catalog_invalidations_total")
+    logger.info("Invalidação do catálogo recebida (%s); recarregando em background", stamp)
+    _TENANTS.expire_all()
+    _trigger_refresh(force=True)
+
+
+_LISTENING = False
+
+
+def start_catalog_invalidation_listener() -> bool:
+    """Escuta o canal de invalidação do Redis (chamado no startup da API)."""
+    global _LISTENING
+    _LISTENING = start_catalog_listener(_on_catalog_invalidated)
+    return _LISTENING
+
+
+def publish_catalog_update(reason: str = "") -> Optional[str]:
+    """Avisa todas as instâncias que o catálogo mudou (seed, preço editado no banco)."""
+    stamp = publish_catalog_change(reason)
+    if stamp is None or not _LISTENING:
+        # Sem Redis (ou sem ouvinte neste processo) recarrega só aqui
+        _trigger_refresh(force=True)
+    return stamp
+
+
+def _ensure_snapshot() -> CatalogSnapshot:
+    """Primeiro acesso sem warmup: publica o seed (local) já e busca o Supabase em background."""
+    snapshot = _SNAPSHOT
+    if snapshot is not None:
+        return snapshot
+    with _REFRESH_LOCK:
+        published = _SNAPSHOT is None
+        if published:
+            catalog, prices, units, descriptions = _seed_catalog_maps()
+            _publish_snapshot(catalog, prices, units, descriptions, "seed")
+    if published:
+        _trigger_refresh()
+    return _SNAPSHOT
+
+
+def get_catalog_stats() -> Dict[str, Any]:
+    """Versão, idade e saúde do refresh do catálogo (exposto em /health)."""
+    snapshot = _SNAPSHOT
+    with _REFRESH_LOCK:
+        state = replace(_REFRESH)
+    retry_in = max(0.0, state.next_attempt_at - time.monotonic())
+    return {
+        "version": snapshot.version if snapshot else None,
+        "source": snapshot.source if snapshot else None,
+        "items": len(snapshot.catalog) if snapshot else 0,
+        "age_seconds": round(time.time() - snapshot.loaded_at, 1) if snapshot else None,
+        "refresh_in_flight": state.in_flight,
+        "refreshes": state.total_refreshes,
+        "failures": state.total_failures,
+        "consecutive_failures": state.consecutive_failures,
+        "last_error": state.last_error or None,
+        "last_load_ms": state.last_load_ms,
+        "stamp": snapshot.stamp if snapshot else None,
+        "stamp_hits": state.stamp_hits,
+        "synced_at": snapshot.synced_at if snapshot else None,
+        "delta_syncs": state.delta_syncs,
+        "last_delta_rows": state.last_delta_rows,
+        "last_rows": state.last_rows,
+        "last_pages": state.last_pages,
+        "invalidations": state.invalidations,
+        "retry_in_seconds": round(retry_in, 1) if state.consecutive_failures else None,
+        "tenants": _TENANTS.stats(),
+        "top_unpriced": get_price_misses(),
+    }
+
+
+def catalog_version(*maps: Mapping[str, Any]) -> str:
+    payload = json.dumps([sorted(m.items()) for m in maps], ensure_ascii=False, default=list)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _publish_snapshot(
+    catalog: Dict[str, List[str]],
+    prices: Dict[str, float],
+    units: Dict[str, str],
+    descriptions: Dict[str, str],
+    source: str,
+    stamp: Optional[str] = None,
+    synced_at: Optional[str] = None,
+    full_loaded_at: Optional[float] = None,
+) -> CatalogSnapshot:
+    """Compila os índices da versão e troca o snapshot de uma vez."""
+    global _SNAPSHOT
+    now = time.time()
+    version = catalog_version(catalog, prices, units, descriptions)
+    previous = published_matchers()
+
+    def _on_ready(ready: CatalogMatchers) -> None:
+        _attach_matchers(ready.version)
+        _persist_snapshot(ready.version)
+
+    matchers = set_runtime_catalog(catalog, version, on_ready=_on_ready)
+    snapshot = CatalogSnapshot(
+        catalog=matchers.catalog,
+        prices=MappingProxyType(dict(prices)),
+        units=MappingProxyType(dict(units)),
+        descriptions=MappingProxyType(dict(descriptions)),
+        matchers=matchers,
+        version=version,
+        loaded_at=now,
+        source=source,
+        stamp=stamp,
+        fetched_at=now,
+        full_loaded_at=now if full_loaded_at is None else full_loaded_at,
+        synced_at=synced_at,
+    )
+    with _PUBLISH_LOCK:
+        _SNAPSHOT = snapshot
+    if matchers.matcher is previous.matcher:
+        _persist_snapshot(version)  # índices reaproveitados: não há rebuild para esperar
+    _refresh_vector_index(snapshot)
+    return snapshot
+
+
+_DISK_FORMAT = 1
+
+
+def _snapshot_path() -> Optional[Path]:
+    from app.core.config import get_settings
+
+    path = get_settings().catalog_snapshot_path
+    return Path(path) if path else None
+
+
+def _persist_snapshot(version: str) -> None:
+    """Grava em disco o snapshot publicado (só o que veio do Supabase, com o fuzzy já da versão)."""
+    snapshot = _SNAPSHOT
+    path = _snapshot_path()
+    if path is None or snapshot is None or snapshot.version != version or snapshot.source != "supabase":
+        return
+    matchers = snapshot.matchers
+    payload = {
+        "format": _DISK_FORMAT,
+        "version": snapshot.version,
+        "saved_at": time.time(),
+        "synced_at": snapshot.synced_at,
+        "catalog": {name: list(synonyms) for name, synonyms in snapshot.catalog.items()},
+        "prices": dict(snapshot.prices),
+        "units": dict(snapshot.units),
+        "descriptions": dict(snapshot.descriptions),
+        # Índice vetorial fica de fora: já tem seus .npy (mmap) no VECTOR_INDEX_DIR
+        "synonym_index": matchers.synonym_index,
+        "matcher": matchers.matcher,
+        "name_index": matchers.name_index,
+        "fuzzy": matchers.fuzzy,
+    }
+    if write_snapshot_file(path, payload):
+        logger.info("Snapshot do catálogo gravado em disco (versão %s)", version)
+
+
+def _restore_snapshot() -> Optional[CatalogSnapshot]:
+    """Publica o último snapshot bom gravado em disco (preços e índices compilados)."""
+    global _SNAPSHOT
+    path = _snapshot_path()
+    payload = read_snapshot_file(path, _DISK_FORMAT) if path else None
+    if payload is None:
+        return None
+    try:
+        catalog, prices, units, descriptions = (
+            payload["catalog"],
+            payload["prices"],
+            payload["units"],
+            payload["descriptions"],
+        )
+        version = payload["version"]
+        if catalog_version(catalog, prices, units, descriptions) != version:
+            logger.warning("Snapshot do catálogo em disco inconsistente; ignorando")
+            return None
+        matchers = CatalogMatchers(
+            catalog=MappingProxyType({name: tuple(synonyms) for name, synonyms in catalog.items()}),
+            synonym_index=payload["synonym_index"],
+            matcher=payload["matcher"],
+            name_index=payload["name_index"],
+            fuzzy=payload["fuzzy"],
+            version=version,
         )
-    return enriched
+    except (KeyError, TypeError, ValueError) as exc:
+        logger.warning("Snapshot do catálogo em disco incompleto: %s", exc)
+        return None
+
+    snapshot = CatalogSnapshot(
+        catalog=matchers.catalog,
+        prices=MappingProxyType(dict(prices)),
+        units=MappingProxyType(dict(units)),
+        descriptions=MappingProxyType(dict(descriptions)),
+        matchers=matchers,
+        version=version,
+        loaded_at=time.time(),
+        source="disk",
+        synced_at=payload.get("synced_at"),
+    )
+    with _PUBLISH_LOCK:
+        publish_catalog_matchers(matchers)
+        _SNAPSHOT = snapshot
+    _refresh_vector_index(snapshot)
+    age = time.time() - float(payload.get("saved_at") or 0)
+    logger.info("Catálogo restaurado do disco: %s itens, versão %s (%.0f s)", len(catalog), version, age)
+    return snapshot
+
+
+def warm_catalog() -> CatalogSnapshot:
+    """
+    Startup: com snapshot em disco, publica-o na hora e concilia com o
+    Supabase em background (carga completa); sem ele, carga síncrona.
+    """
+    snapshot = _restore_snapshot()
+    if snapshot is None:
+        return get_catalog_snapshot(force_refresh=True)
+    _trigger_refresh(force=True)
+    return snapshot
+
+
+def _attach_matchers(version: str) -> None:
+    """Índices derivados ficaram prontos: o snapshot da mesma versão passa a usá-los."""
+    global _SNAPSHOT
+    with _PUBLISH_LOCK:
+        matchers = published_matchers()
+        if _SNAPSHOT is not None and _SNAPSHOT.version == version == matchers.version:
+            _SNAPSHOT = replace(_SNAPSHOT, matchers=matchers)
+
+
+def _tenants_enabled() -> bool:
+    from app.core.config import get_settings
+
+    return get_settings().catalog_tenants_enabled
+
+
+def approx_snapshot_bytes(snapshot: CatalogSnapshot) -> int:
+    """Memória estimada do snapshot (índices compilados + mapas)."""
+    matchers = snapshot.matchers
+    total = matchers.matcher.approx_bytes() + matchers.name_index.approx_bytes()
+    total += matchers.fuzzy.approx_bytes()
+    if matchers.vector is not None:
+        total += matchers.vector.approx_bytes()
+    # catálogo, preços, unidades e descrições: ~200 B por material + texto
+    total += 200 * len(snapshot.catalog) + sum(len(text) for text in snapshot.descriptions.values())
+    return total
+
+
+def _load_tenant_snapshot(tenant_id: str) -> Optional[CatalogSnapshot]:
+    """Catálogo próprio da loja; None se ela não tem linhas (usa o catálogo padrão)."""
+    loaded = _load_from_supabase(tenant_id)
+    if not loaded:
+        return None
+    (catalog, prices, units, descriptions), synced_at = loaded
+    version = catalog_version(catalog, prices, units, descriptions)
+    # Não publica nos índices globais: só vale para jobs que fixarem este snapshot
+    matchers = build_catalog_matchers(catalog, version)
+    now = time.time()
+    snapshot = CatalogSnapshot(
+        catalog=matchers.catalog,
+        prices=MappingProxyType(dict(prices)),
+        units=MappingProxyType(dict(units)),
+        descriptions=MappingProxyType(dict(descriptions)),
+        matchers=matchers,
+        version=version,
+        loaded_at=now,
+        source="supabase",
+        fetched_at=now,
+        full_loaded_at=now,
+        synced_at=synced_at,
+        tenant_id=tenant_id,
+    )
+    logger.info("Catálogo da loja %s carregado: %s itens, versão %s", tenant_id, len(catalog), version)
+    return snapshot
+
+
+@dataclass
+class _TenantEntry:
+    snapshot: Optional[CatalogSnapshot]  # None = loja sem catálogo próprio (usa o padrão)
+    loaded_at: float
+    size: int
+
+
+class _TenantCatalogs:
+    """
+    Snapshots por loja (phone_number_id), carregados sob demanda e mantidos
+    num LRU limitado por quantidade e por memória estimada. Mesmo esquema do
+    catálogo padrão: vencido o TTL, serve o atual e recarrega em background.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, _TenantEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+        self._failures: Dict[str, Tuple[int, float]] = {}  # loja -> (falhas seguidas, retry em monotonic)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_failures = 0
+
+    def get(self, tenant_id: str) -> Optional[CatalogSnapshot]:
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry is not None:
+                self._entries.move_to_end(tenant_id)
+                self.hits += 1
+        if entry is None:
+            if self._backing_off(tenant_id):
+                return None  # carga da loja falhou há pouco: catálogo padrão até o próximo retry
+            entry = self._load_once(tenant_id)
+        else:
+            ttl, _, _, _ = _refresh_settings()
+            if time.time() - entry.loaded_at >= ttl:
+                self._refresh_in_background(tenant_id)
+        return entry.snapshot
+
+    def _load_once(self, tenant_id: str) -> _TenantEntry:
+        """Primeiro acesso da loja: um só carregamento mesmo com jobs simultâneos."""
+        with self._lock:
+            loading = self._loading.setdefault(tenant_id, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._entries.get(tenant_id)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+            try:
+                snapshot = _load_tenant_snapshot(tenant_id)
+            except Exception:
+                self._record_failure(tenant_id)
+                raise
+            finally:
+                with self._lock:
+                    self._loading.pop(tenant_id, None)
+            with self._lock:
+                self._failures.pop(tenant_id, None)
+            return self._store(tenant_id, snapshot)
+
+    def _backing_off(self, tenant_id: str) -> bool:
+        with self._lock:
+            failure = self._failures.get(tenant_id)
+        return failure is not None and time.monotonic() < failure[1]
+
+    def _record_failure(self, tenant_id: str) -> None:
+        """Backoff exponencial por loja, como o `_RefreshState` do catálogo padrão."""
+        _, backoff, max_backoff, _ = _refresh_settings()
+        with self._lock:
+            failures = self._failures.get(tenant_id, (0, 0.0))[0] + 1
+            delay = min(max_backoff, backoff * 2 ** (failures - 1))
+            self._failures[tenant_id] = (failures, time.monotonic() + delay)
+            self.load_failures += 1
+        metrics.increment("catalog_tenant_load_failures_total")
+
+    def _refresh_in_background(self, tenant_id: str) -> None:
+        with self._lock:
+            if tenant_id in self._refreshing:
+                return
+            self._refreshing.add(tenant_id)
+
+        def _run() -> None:
+            try:
+                self._store(tenant_id, _load_tenant_snapshot(tenant_id))
+            except Exception as exc:
+                logger.warning("Refresh do catálogo da loja %s falhou; mantendo o atual: %s", tenant_id, exc)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(tenant_id)
+
+        threading.Thread(target=_run, name=f"catalog-tenant-{tenant_id}", daemon=True).start()
+
+    def _store(self, tenant_id: str, snapshot: Optional[CatalogSnapshot]) -> _TenantEntry:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        entry = _TenantEntry(snapshot, time.time(), approx_snapshot_bytes(snapshot) if snapshot else 0)
+        with self._lock:
+            self._entries[tenant_id] = entry
+            self._entries.move_to_end(tenant_id)
+            self._evict(settings.catalog_tenant_cache_size, settings.catalog_tenant_cache_mb * 1024 * 1024)
+        if snapshot is not None and settings.vector_index_enabled:
+            threading.Thread(
+                target=self._attach_vector,
+                args=(tenant_id, snapshot),
+                name="vector-index-tenant",
+                daemon=True,
+            ).start()
+        return entry
+
+    def _evict(self, max_entries: int, max_bytes: float) -> None:
+        # A loja recém-usada (última) fica mesmo se sozinha passar do limite
+        while len(self._entries) > 1 and (
+            len(self._entries) > max_entries or self._total_bytes() > max_bytes
+        ):
+            evicted, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            metrics.increment("catalog_tenant_evictions_total")
+            logger.info("Catálogo da loja %s removido do cache (LRU)", evicted)
 
+    def _total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
 
-def calc_budget_total(materials: List[Dict[str, Any]]) -> float:
-    total = 0.0
-    for item in materials:
+    def _attach_vector(self, tenant_id: str, snapshot: CatalogSnapshot) -> None:
+        from app.core.config import get_settings
+
+        index = _vector_index_for(snapshot, subdir=f"tenant-{tenant_id}")
+        if index is None:
+            return
+        settings = get_settings()
+        matchers = replace(
+            snapshot.matchers,
+            vector=index,
+            vector_min_score=settings.vector_match_min_score,
+            vector_margin=settings.vector_match_margin,
+        )
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry is None or entry.snapshot is not snapshot:
+                return  # recarregado ou removido enquanto o índice era montado
+            updated = replace(snapshot, matchers=matchers)
+            self._entries[tenant_id] = replace(entry, snapshot=updated, size=approx_snapshot_bytes(updated))
+
+    def expire_all(self) -> None:
+        """Invalidação: todas as lojas recarregam no próximo acesso (servindo a atual enquanto isso)."""
+        with self._lock:
+            for tenant_id, entry in self._entries.items():
+                self._entries[tenant_id] = replace(entry, loaded_at=0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "own_catalogs": sum(1 for entry in self._entries.values() if entry.snapshot is not None),
+                "approx_mb": round(self._total_bytes() / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_failures": self.load_failures,
+                "backing_off": sum(1 for _, retry_at in self._failures.values() if time.monotonic() < retry_at),
+            }
+
+
+_TENANTS = _TenantCatalogs()
+
+
+def get_catalog_snapshot(force_refresh: bool = False, tenant_id: Optional[str] = None) -> CatalogSnapshot:
+    """
+    Snapshot fixado no job corrente ou o publicado. Vencido o TTL, devolve o
+    atual mesmo assim (stale-while-revalidate) e agenda um refresh em
+    background; só `force_refresh` (warmup, seed) carrega de forma síncrona.
+    Com `tenant_id` (multi-loja ligado), o catálogo daquela loja.
+    """
+    if force_refresh:
+        return _reload_snapshot()
+    pinned = _PINNED.get()
+    if pinned is not None:
+        return pinned
+    if tenant_id and _tenants_enabled():
         try:
-            total += float(str(item.get("preco_total", "0")).replace(",", "."))
-        except ValueError:
-            continue
-    return round(total, 2)
+            tenant_snapshot = _TENANTS.get(tenant_id)
+        except Exception as exc:
+            logger.warning("Catálogo da loja %s indisponível; usando o padrão: %s", tenant_id, exc)
+            tenant_snapshot = None
+        if tenant_snapshot is not None:
+            return tenant_snapshot
+    snapshot = _ensure_snapshot()
+    ttl, _, _, _ = _refresh_settings()
+    if time.time() - snapshot.loaded_at >= ttl:
+        _trigger_refresh()
+    return snapshot
+
+
+@contextmanager
+def pin_catalog_snapshot(snapshot: Optional[CatalogSnapshot] = None) -> Iterator[CatalogSnapshot]:
+    """Fixa um snapshot (preços e índices) para o job inteiro, mesmo com reload no meio."""
+    snapshot = snapshot or get_catalog_snapshot()
+    token = _PINNED.set(snapshot)
+    try:
+        with pin_catalog_matchers(snapshot.matchers):
+            yield snapshot
+    finally:
+        _PINNED.reset(token)
+
+
+def get_catalog_bundle(
+    force_refresh: bool = False,
+) -> Tuple[Mapping[str, Tuple[str, ...]], Mapping[str, float], Mapping[str, str]]:
+    snapshot = get_catalog_snapshot(force_refresh)
+    return snapshot.catalog, snapshot.prices, snapshot.units
+
+
+def _vector_index_for(snapshot: CatalogSnapshot, subdir: str = "") -> Optional[VectorIndex]:
+    """Índice vetorial da versão (reaproveitado, aberto do disco via mmap ou montado)."""
+    from app.core.config import get_settings
+    from app.services.vector_index import build_documents, catalog_version as documents_version, load_or_build
+
+    settings = get_settings()
+    documents = build_documents(snapshot.catalog, snapshot.descriptions, normalize_text)
+    current = snapshot.matchers.vector
+    if current is not None and current.version == documents_version(documents, settings.vector_index_dim):
+        return current  # delta só de preço/unidade: nomes e descrições iguais, mesmo índice
+    directory = Path(settings.vector_index_dir) if settings.vector_index_dir else None
+    if directory is not None and subdir:
+        directory = directory / subdir  # cada loja limpa só as próprias versões antigas
+    try:
+        index = load_or_build(documents, directory, settings.vector_index_dim)
+    except Exception as exc:
+        logger.warning("Falha ao montar índice vetorial do catálogo: %s", exc)
+        return None
+    if index is None:
+        logger.info("NumPy indisponível; índice vetorial do catálogo desligado")
+    return index
+
+
+def build_vector_index(snapshot: CatalogSnapshot) -> None:
+    """Monta (ou abre do disco via mmap) o índice vetorial da versão e anexa ao snapshot."""
+    from app.core.config import get_settings
+
+    index = _vector_index_for(snapshot)
+    if index is None or index is snapshot.matchers.vector:
+        return
+    settings = get_settings()
+    updated = update_catalog_matchers(
+        snapshot.version,
+        vector=index,
+        vector_min_score=settings.vector_match_min_score,
+        vector_margin=settings.vector_match_margin,
+    )
+    if updated is None:
+        return  # catálogo mudou enquanto o índice era montado
+    _attach_matchers(snapshot.version)
+    logger.info("Índice vetorial do catálogo pronto (%s itens, versão %s)", len(index), index.version)
+
+
+def _refresh_vector_index(snapshot: CatalogSnapshot) -> None:
+    from app.core.config import get_settings
+
+    if not get_settings().vector_index_enabled:
+        if snapshot.matchers.vector is not None:
+            update_catalog_matchers(snapshot.version, vector=None)
+            _attach_matchers(snapshot.version)
+        return
+    threading.Thread(
+        target=build_vector_index,
+        args=(snapshot,),
+        name="vector-index-build",
+        daemon=True,
+    ).start()
+
+
+def get_canonical_names() -> List[str]:
+    return sorted(get_catalog_snapshot().catalog.keys(), key=len, reverse=True)
+
+
+_PRICE_MISSES: Counter = Counter()
+_PRICE_MISSES_MAX_NAMES = 500  # nomes distintos guardados (o total segue contando)
+_PRICE_MISSES_LOCK = threading.Lock()
+
+
+def _record_price_miss(material_name: str, reason: str) -> None:
+    key = normalize_text(material_name)
+    metrics.increment("catalog_price_miss_total", reason=reason)
+    with _PRICE_MISSES_LOCK:
+        if key in _PRICE_MISSES or len(_PRICE_MISSES) < _PRICE_MISSES_MAX_NAMES:
+            _PRICE_MISSES[key] += 1
+
+
+def get_price_misses(limit: int = 10) -> List[Tuple[str, int]]:
+    """Materiais pedidos que saíram sem preço (fora do catálogo ou preço zero), mais frequentes primeiro."""
+    with _PRICE_MISSES_LOCK:
+        return _PRICE_MISSES.most_common(limit)
+
+
+def get_unit_prices(names: Sequence[str], snapshot: Optional[CatalogSnapshot] = None) -> List[float]:
+    """Preços de uma lista inteira numa versão só do catálogo (0.0 e miss contado se não houver)."""
+    snapshot = snapshot or get_catalog_snapshot()
+    prices: List[float] = []
+    for name in names:
+        price = snapshot.price_for(name)
+        if not price:
+            _record_price_miss(name, "unknown" if price is None else "zero")
+        prices.append(float(price or 0.0))
+    return prices
+
+
+def get_unit_price(material_name: str, snapshot: Optional[CatalogSnapshot] = None) -> float:
+    return get_unit_prices([material_name], snapshot)[0]
+
+
+def enrich_materials_with_prices(
+    materials: Iterable[MaterialLike],
+    snapshot: Optional[CatalogSnapshot] = None,
+) -> List[MaterialLine]:
+    """Precifica a lista inteira numa versão só do catálogo (linhas tipadas, preço em Decimal)."""
+    snapshot = snapshot or get_catalog_snapshot()
+    lines = as_material_lines(materials)
+    prices = get_unit_prices([line.material for line in lines], snapshot)
+    return [
+        replace(
+            line,
+            unit_price=Decimal(f"{price:.2f}"),
+            canonical=snapshot.canonical_for(line.material) or line.canonical,
+        )
+        for line, price in zip(lines, prices)
+    ]
+
+
+def calc_budget_total(materials: Iterable[MaterialLike]) -> float:
+    return float(lines_total(materials))
 
 
 def seed_catalog_to_supabase(overwrite_prices: bool = False) -> int:
-    """Insere seed no Supabase (upsert por name). Retorna quantidade processada."""
+    """Insere seed no Supabase (upsert por tenant_id+name). Retorna quantidade processada."""
     from app.services.supabase_client import get_supabase_client
 
     client = get_supabase_client()
@@ -149,9 +1184,11 @@ def seed_catalog_to_supabase(overwrite_prices: bool = False) -> int:
     payload = []
     for row in rows:
         item = {
+            "tenant_id": None,  # catálogo padrão
             "name": row["name"],
             "synonyms": row["synonyms"],
             "default_unit": row["default_unit"],
+            "description": row["description"],
             "active": True,
         }
         if overwrite_prices:
@@ -159,6 +1196,9 @@ def seed_catalog_to_supabase(overwrite_prices: bool = False) -> int:
         payload.append(item)
 
     # supabase-py upsert
-    result = client.table("materials").upsert(payload, on_conflict="name").execute()
+    # A migração 005 troca a unicidade de name por (tenant_id, name) "nulls not distinct",
+    # com a flag de multi-loja ligada ou não
+    result = client.table("materials").upsert(payload, on_conflict="tenant_id,name").execute()
+    publish_catalog_update("seed")
     get_catalog_bundle(force_refresh=True)
     return len(result.data or payload)
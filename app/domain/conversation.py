@@ -2,10 +2,20 @@
 from __future__ import annotations
 
 import re
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, replace
+from decimal import Decimal
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.domain.material_line import (
+    MaterialLike,
+    MaterialLine,
+    as_material_lines,
+    format_brl,
+    lines_total,
+    parse_decimal,
+)
+
 
 class ConversationState(str, Enum):
     AWAITING_AUDIO = "awaiting_audio"
@@ -17,15 +27,53 @@ class ConversationState(str, Enum):
 @dataclass
 class ConversationSession:
     state: ConversationState = ConversationState.AWAITING_AUDIO
-    materials: List[Dict[str, str]] = field(default_factory=list)
+    materials: List[MaterialLine] = field(default_factory=list)
     obra_type: str = "obra"
     texto: str = ""
+    llm_usage: Dict[str, Any] = field(default_factory=dict)
+    # Soma das linhas, mantida a cada edição (sem reprecificar a lista toda)
+    subtotal: Optional[Decimal] = None
+    # Versão do catálogo que precificou as linhas; mudou, reprecifica tudo
+    catalog_version: str = ""
+
+    def __post_init__(self):
+        self.materials = as_material_lines(self.materials)
+        if self.subtotal is None:
+            self.subtotal = lines_total(self.materials)
 
     def to_dict(self) -> Dict[str, Any]:
-        data = asdict(self)
+        # Borda do Redis: linhas tipadas voltam ao JSON de textos
+        data = asdict(replace(self, materials=[]))
         data["state"] = self.state.value
+        data["materials"] = [line.to_dict() for line in self.materials]
+        data["subtotal"] = f"{self.subtotal:.2f}"
         return data
 
+    def remove_material(self, target: Tuple[str, Any]) -> Optional[str]:
+        updated, removed, note = remove_material_line(self.materials, target)
+        if removed is not None:
+            self.materials = updated
+            self.subtotal -= removed.total
+        return note
+
+    def change_quantity(self, index_1based: int, quantity: str) -> Optional[str]:
+        updated, note = apply_quantity_change(self.materials, index_1based, quantity)
+        idx = index_1based - 1
+        if 0 <= idx < len(self.materials):
+            self.subtotal += updated[idx].total - self.materials[idx].total
+            self.materials = updated
+        return note
+
+    def add_materials(self, lines: List[MaterialLine]) -> None:
+        self.materials = self.materials + lines
+        self.subtotal += lines_total(lines)
+
+    def reprice(self, lines: List[MaterialLine], catalog_version: str) -> None:
+        """Troca a lista inteira por uma reprecificada (catálogo mudou desde a última edição)."""
+        self.materials = lines
+        self.subtotal = lines_total(lines)
+        self.catalog_version = catalog_version
+
     @classmethod
     def from_dict(cls, data: Optional[Dict[str, Any]]) -> "ConversationSession":
         if not data:
@@ -40,6 +88,9 @@ class ConversationSession:
             materials=list(data.get("materials") or []),
             obra_type=str(data.get("obra_type") or "obra"),
             texto=str(data.get("texto") or ""),
+            llm_usage=dict(data.get("llm_usage") or {}),
+            subtotal=parse_decimal(data.get("subtotal")),
+            catalog_version=str(data.get("catalog_version") or ""),
         )
 
 
@@ -54,119 +105,159 @@ def format_destination_number(from_number: str, message_service: str) -> str:
     return f"whatsapp:+{digits}"
 
 
+_ACCENTS = str.maketrans("áãâéêíóôõúç", "aaaeeiooouc")
+_PUNCTUATION_RE = re.compile(r"[!?.]")
+
+
 def _normalize_text(text: str) -> str:
-    normalized = re.sub(r"\s+", " ", text.strip().lower())
-    normalized = re.sub(r"[!?.]", "", normalized)
+    normalized = _PUNCTUATION_RE.sub("", " ".join(text.lower().split()))
+    return normalized.translate(_ACCENTS)
+
+
+_CONFIRM_WORDS = frozenset({
+    "sim",
+    "s",
+    "ok",
+    "okay",
+    "confirmo",
+    "confirma",
+    "confirmar",
+    "pode",
+    "pode gerar",
+    "gerar",
+    "gerar pdf",
+    "isso",
+    "correto",
+    "certo",
+    "yes",
+    "y",
+})
+_CANCEL_WORDS = frozenset({
+    "nao",
+    "não",
+    "n",
+    "cancelar",
+    "cancela",
+    "corrigir",
+    "errado",
+    "refazer",
+})
+_LAST_BUDGET_WORDS = frozenset({
+    "ultimo orcamento",
+    "manda de novo",
+    "reenviar orcamento",
+    "ultimo pdf",
+    "me manda o ultimo",
+    "enviar ultimo orcamento",
+})
+_PRIVACY_WORDS = frozenset({
+    "privacidade",
+    "politica de privacidade",
+    "lgpd",
+    "meus dados",
+    "dados pessoais",
+})
+_DELETE_DATA_WORDS = frozenset({
+    "apagar meus dados",
+    "excluir meus dados",
+    "deletar meus dados",
+    "apagar dados",
+    "excluir dados",
+    "remover meus dados",
+    "quero apagar meus dados",
+})
+_SHOW_LIST_WORDS = frozenset({
+    "lista",
+    "mostrar",
+    "mostrar lista",
+    "ver lista",
+    "lista atual",
+    "materiais",
+})
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+_REMOVE_VERB = r"(?:remover?|tira[r]?|excluir|apaga[r]?)"
+_REMOVE_RE = re.compile(rf"^{_REMOVE_VERB}\s+(?:(?:item\s+)?(?P<index>\d+)|(?P<name>.+))$")
+_QUANTITY_RE = re.compile(
+    rf"^(?:(?:qtd|quantidade)\s+(?P<a>\d+)\s*(?:=|para|:)\s*(?P<qa>{_NUMBER})"
+    rf"|muda[r]?\s+(?P<b>\d+)\s+para\s+(?P<qb>{_NUMBER})"
+    rf"|item\s+(?P<c>\d+)\s+(?:qtd|quantidade)\s+(?P<qc>{_NUMBER}))$"
+)
+# Trecho do "adiciona" sai do texto original (acentos e pontuação do material)
+_ADD_RE = re.compile(r"^(?:adiciona[r]?|add|inclui[r]?)\s+(.+)$", re.IGNORECASE)
+_NOT_A_MATERIAL = frozenset({"item", "dado", "dados", "meus dados"})
+
+
+def _wants_last_budget(normalized: str) -> bool:
+    return normalized in _LAST_BUDGET_WORDS or (
+        "ultimo orcamento" in normalized
+        or "reenviar orcamento" in normalized
+        or "manda de novo o orcamento" in normalized
+    )
+
+
+def _wants_privacy_policy(normalized: str) -> bool:
+    return normalized in _PRIVACY_WORDS or "politica de privacidade" in normalized
+
+
+def _wants_data_deletion(normalized: str) -> bool:
+    if normalized in _DELETE_DATA_WORDS:
+        return True
     return (
-        normalized.replace("á", "a")
-        .replace("ã", "a")
-        .replace("â", "a")
-        .replace("é", "e")
-        .replace("ê", "e")
-        .replace("í", "i")
-        .replace("ó", "o")
-        .replace("ô", "o")
-        .replace("õ", "o")
-        .replace("ú", "u")
-        .replace("ç", "c")
+        ("apagar" in normalized or "excluir" in normalized or "deletar" in normalized)
+        and "dado" in normalized
     )
 
 
+def _match_remove(normalized: str) -> Optional[Tuple[str, Any]]:
+    m = _REMOVE_RE.match(normalized)
+    if m is None:
+        return None
+    if m.group("index") is not None:
+        return ("index", int(m.group("index")))
+    name = m.group("name").strip()
+    if name and name not in _NOT_A_MATERIAL:
+        return ("name", name)
+    return None
+
+
+def _match_quantity(normalized: str) -> Optional[Tuple[int, str]]:
+    m = _QUANTITY_RE.match(normalized)
+    if m is None:
+        return None
+    for index_group, qty_group in (("a", "qa"), ("b", "qb"), ("c", "qc")):
+        if m.group(index_group) is not None:
+            return int(m.group(index_group)), m.group(qty_group).replace(",", ".")
+    return None
+
+
+def _match_add(text: str) -> Optional[str]:
+    m = _ADD_RE.match(text.strip())
+    return m.group(1).strip() if m else None
+
+
 def is_confirmation_message(text: str) -> bool:
-    normalized = _normalize_text(text)
-    return normalized in {
-        "sim",
-        "s",
-        "ok",
-        "okay",
-        "confirmo",
-        "confirma",
-        "confirmar",
-        "pode",
-        "pode gerar",
-        "gerar",
-        "gerar pdf",
-        "isso",
-        "correto",
-        "certo",
-        "yes",
-        "y",
-    }
+    return _normalize_text(text) in _CONFIRM_WORDS
 
 
 def is_cancel_message(text: str) -> bool:
-    normalized = _normalize_text(text)
-    return normalized in {
-        "nao",
-        "não",
-        "n",
-        "cancelar",
-        "cancela",
-        "corrigir",
-        "errado",
-        "refazer",
-    }
+    return _normalize_text(text) in _CANCEL_WORDS
 
 
 def is_last_budget_request(text: str) -> bool:
-    normalized = _normalize_text(text)
-    triggers = {
-        "ultimo orcamento",
-        "manda de novo",
-        "reenviar orcamento",
-        "ultimo pdf",
-        "me manda o ultimo",
-        "enviar ultimo orcamento",
-    }
-    if normalized in triggers:
-        return True
-    return (
-        "ultimo orcamento" in normalized
-        or "reenviar orcamento" in normalized
-        or "manda de novo o orcamento" in normalized
-    )
+    return _wants_last_budget(_normalize_text(text))
 
 
 def is_privacy_policy_request(text: str) -> bool:
-    normalized = _normalize_text(text)
-    return normalized in {
-        "privacidade",
-        "politica de privacidade",
-        "lgpd",
-        "meus dados",
-        "dados pessoais",
-    } or "politica de privacidade" in normalized
+    return _wants_privacy_policy(_normalize_text(text))
 
 
 def is_delete_data_request(text: str) -> bool:
-    normalized = _normalize_text(text)
-    triggers = {
-        "apagar meus dados",
-        "excluir meus dados",
-        "deletar meus dados",
-        "apagar dados",
-        "excluir dados",
-        "remover meus dados",
-        "quero apagar meus dados",
-    }
-    if normalized in triggers:
-        return True
-    return (
-        ("apagar" in normalized or "excluir" in normalized or "deletar" in normalized)
-        and "dado" in normalized
-    )
+    return _wants_data_deletion(_normalize_text(text))
 
 
 def is_show_list_request(text: str) -> bool:
-    normalized = _normalize_text(text)
-    return normalized in {
-        "lista",
-        "mostrar",
-        "mostrar lista",
-        "ver lista",
-        "lista atual",
-        "materiais",
-    }
+    return _normalize_text(text) in _SHOW_LIST_WORDS
 
 
 def parse_remove_item(text: str) -> Optional[Tuple[str, Any]]:
@@ -174,18 +265,7 @@ def parse_remove_item(text: str) -> Optional[Tuple[str, Any]]:
     Retorna ('index', int 1-based) ou ('name', str) ou None.
     Ex.: 'remove 2', 'remover item 3', 'tira cimento'
     """
-    normalized = _normalize_text(text)
-
-    m = re.match(r"^(?:remover?|tira[r]?|excluir|apaga[r]?)\s+(?:item\s+)?(\d+)$", normalized)
-    if m:
-        return ("index", int(m.group(1)))
-
-    m = re.match(r"^(?:remover?|tira[r]?|excluir|apaga[r]?)\s+(.+)$", normalized)
-    if m:
-        name = m.group(1).strip()
-        if name and name not in {"item", "dado", "dados", "meus dados"}:
-            return ("name", name)
-    return None
+    return _match_remove(_normalize_text(text))
 
 
 def parse_quantity_change(text: str) -> Optional[Tuple[int, str]]:
@@ -193,72 +273,181 @@ def parse_quantity_change(text: str) -> Optional[Tuple[int, str]]:
     Retorna (index 1-based, nova_quantidade_str) ou None.
     Ex.: 'qtd 2=10', 'quantidade 1 para 5', 'muda 3 para 2,5'
     """
-    normalized = _normalize_text(text)
-    patterns = [
-        r"^(?:qtd|quantidade)\s+(\d+)\s*(?:=|para|:)\s*(\d+(?:[.,]\d+)?)$",
-        r"^(?:muda[r]?)\s+(\d+)\s+para\s+(\d+(?:[.,]\d+)?)$",
-        r"^item\s+(\d+)\s+(?:qtd|quantidade)\s+(\d+(?:[.,]\d+)?)$",
-    ]
-    for pat in patterns:
-        m = re.match(pat, normalized)
-        if m:
-            qty = m.group(2).replace(",", ".")
-            return int(m.group(1)), qty
-    return None
+    return _match_quantity(_normalize_text(text))
 
 
 def parse_add_material(text: str) -> Optional[str]:
     """Retorna o trecho a extrair após 'adiciona ...' ou None."""
-    m = re.match(
-        r"^(?:adiciona[r]?|add|inclui[r]?)\s+(.+)$",
-        text.strip(),
-        flags=re.IGNORECASE,
-    )
-    if m:
-        return m.group(1).strip()
-    return None
+    return _match_add(text)
 
 
-def apply_remove_material(
-    materials: List[Dict[str, Any]],
+class IntentKind(str, Enum):
+    PRIVACY_POLICY = "privacy_policy"
+    DELETE_DATA = "delete_data"
+    LAST_BUDGET = "last_budget"
+    CONFIRM = "confirm"
+    CANCEL = "cancel"
+    SHOW_LIST = "show_list"
+    REMOVE = "remove"
+    QUANTITY = "quantity"
+    ADD = "add"
+    UNKNOWN = "unknown"
+
+
+@dataclass(frozen=True)
+class Intent:
+    """
+    Comando de texto já classificado. `remove_target` em REMOVE,
+    `quantity_change` em QUANTITY, `add_text` em ADD.
+    """
+
+    kind: IntentKind
+    remove_target: Optional[Tuple[str, Any]] = None
+    quantity_change: Optional[Tuple[int, str]] = None
+    add_text: Optional[str] = None
+
+
+# Frase exata -> intenção; na colisão vale a primeira tabela (mesma ordem do roteador)
+_EXACT_INTENTS: Dict[str, IntentKind] = {}
+for _kind, _words in (
+    (IntentKind.PRIVACY_POLICY, _PRIVACY_WORDS),
+    (IntentKind.DELETE_DATA, _DELETE_DATA_WORDS),
+    (IntentKind.LAST_BUDGET, _LAST_BUDGET_WORDS),
+    (IntentKind.CONFIRM, _CONFIRM_WORDS),
+    (IntentKind.CANCEL, _CANCEL_WORDS),
+    (IntentKind.SHOW_LIST, _SHOW_LIST_WORDS),
+):
+    for _word in _words:
+        _EXACT_INTENTS.setdefault(_word, _kind)
+del _kind, _words, _word
+
+_UNKNOWN = Intent(IntentKind.UNKNOWN)
+
+
+def route_text(text: str) -> Intent:
+    """
+    Classifica um comando de texto normalizando uma vez só.
+
+    Mesma precedência da cadeia de predicados: privacidade, apagar dados,
+    último orçamento, sim/não, lista, remove, qtd, adiciona. Frases exatas saem
+    de uma tabela; as regras por trecho só rodam para intenções que vêm antes
+    da encontrada na tabela.
+    """
+    normalized = _normalize_text(text)
+    exact = _EXACT_INTENTS.get(normalized)
+    if exact is IntentKind.PRIVACY_POLICY or "politica de privacidade" in normalized:
+        return Intent(IntentKind.PRIVACY_POLICY)
+    if exact is IntentKind.DELETE_DATA or _wants_data_deletion(normalized):
+        return Intent(IntentKind.DELETE_DATA)
+    if exact is IntentKind.LAST_BUDGET or _wants_last_budget(normalized):
+        return Intent(IntentKind.LAST_BUDGET)
+    if exact is not None:
+        return Intent(exact)
+
+    remove_target = _match_remove(normalized)
+    if remove_target:
+        return Intent(IntentKind.REMOVE, remove_target=remove_target)
+    quantity_change = _match_quantity(normalized)
+    if quantity_change:
+        return Intent(IntentKind.QUANTITY, quantity_change=quantity_change)
+    add_text = _match_add(text)
+    if add_text:
+        return Intent(IntentKind.ADD, add_text=add_text)
+    return _UNKNOWN
+
+
+# Separadores de comandos numa mensagem; vírgula entre dígitos é decimal ("qtd 1=2,5")
+_COMMAND_SPLIT_RE = re.compile(r"[\n;]|,(?!\d)|(?<!\d),")
+# Em "remove" não existe decimal: "remove 2,5" são os itens 2 e 5
+_REMOVE_LIST_RE = re.compile(rf"^{_REMOVE_VERB}\s+(?:item\s+)?\d+(?:\s*,\s*\d+)+$", re.IGNORECASE)
+_EDIT_KINDS = frozenset({IntentKind.REMOVE, IntentKind.QUANTITY, IntentKind.ADD})
+
+
+def _split_commands(text: str) -> List[str]:
+    parts: List[str] = []
+    for part in _COMMAND_SPLIT_RE.split(text):
+        part = part.strip()
+        if _REMOVE_LIST_RE.match(part):
+            parts.extend(item.strip() for item in part.split(","))
+        elif part:
+            parts.append(part)
+    return parts
+
+
+def route_edit_commands(text: str) -> Optional[List[Intent]]:
+    """
+    Vários comandos de edição numa mensagem ("remove 2, 5; qtd 3=10; adiciona 4 saco de cal").
+
+    Trecho solto continua o comando anterior: depois de `remove` vira outro
+    item a remover ("remove 2, 5"), depois de `adiciona` volta a fazer parte
+    do texto a extrair ("adiciona cimento, areia"). None se não houver pelo
+    menos dois comandos ou se algum trecho não for edição.
+    """
+    parts = _split_commands(text)
+    if len(parts) < 2:
+        return None
+
+    intents: List[Intent] = []
+    for part in parts:
+        intent = route_text(part)
+        previous = intents[-1] if intents else None
+        if intent.kind is IntentKind.UNKNOWN and previous is not None:
+            if previous.kind is IntentKind.REMOVE:
+                intent = route_text(f"remove {part}")
+            elif previous.kind is IntentKind.ADD:
+                intents[-1] = replace(previous, add_text=f"{previous.add_text}, {part}")
+                continue
+        if intent.kind not in _EDIT_KINDS:
+            return None
+        intents.append(intent)
+    return intents if len(intents) > 1 else None
+
+
+def remove_material_line(
+    materials: List[MaterialLike],
     target: Tuple[str, Any],
-) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+) -> Tuple[List[MaterialLine], Optional[MaterialLine], Optional[str]]:
+    """Como `apply_remove_material`, devolvendo também a linha removida (None se nenhuma)."""
     kind, value = target
+    materials = as_material_lines(materials)
     if not materials:
-        return materials, "A lista já está vazia."
+        return materials, None, "A lista já está vazia."
 
     if kind == "index":
         idx = int(value) - 1
         if idx < 0 or idx >= len(materials):
-            return materials, f"Não encontrei o item {value}. Use um número da lista."
+            return materials, None, f"Não encontrei o item {value}. Use um número da lista."
         removed = materials[idx]
-        updated = [m for i, m in enumerate(materials) if i != idx]
-        return updated, f"Removi: {removed.get('material', 'item')}."
+        updated = materials[:idx] + materials[idx + 1:]
+        return updated, removed, f"Removi: {removed.material or 'item'}."
 
     name = str(value).lower()
-    updated = []
-    removed_name = None
-    for item in materials:
-        mat = str(item.get("material", "")).lower()
-        if removed_name is None and (name in mat or mat in name):
-            removed_name = item.get("material")
-            continue
-        updated.append(item)
-    if removed_name is None:
-        return materials, f"Não encontrei material parecido com '{value}'."
-    return updated, f"Removi: {removed_name}."
+    for idx, item in enumerate(materials):
+        mat = item.material.lower()
+        if name in mat or mat in name:
+            return materials[:idx] + materials[idx + 1:], item, f"Removi: {item.material}."
+    return materials, None, f"Não encontrei material parecido com '{value}'."
+
+
+def apply_remove_material(
+    materials: List[MaterialLike],
+    target: Tuple[str, Any],
+) -> Tuple[List[MaterialLine], Optional[str]]:
+    updated, _, note = remove_material_line(materials, target)
+    return updated, note
 
 
 def apply_quantity_change(
-    materials: List[Dict[str, Any]],
+    materials: List[MaterialLike],
     index_1based: int,
     quantity: str,
-) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+) -> Tuple[List[MaterialLine], Optional[str]]:
+    materials = as_material_lines(materials)
     idx = index_1based - 1
     if idx < 0 or idx >= len(materials):
         return materials, f"Não encontrei o item {index_1based}."
-    updated = [dict(m) for m in materials]
-    updated[idx]["quantidade"] = quantity
+    updated = list(materials)
+    updated[idx] = replace(updated[idx], quantity=parse_decimal(quantity, updated[idx].quantity))
     return updated, f"Atualizei a quantidade do item {index_1based}."
 
 
@@ -284,17 +473,16 @@ def build_privacy_policy_message() -> str:
     )
 
 
-def build_confirmation_message(materials: List[Dict[str, str]], obra_type: str) -> str:
+def build_confirmation_message(
+    materials: List[MaterialLike],
+    obra_type: str,
+    total: Optional[Decimal] = None,
+) -> str:
     from app.services.nlp_obras import format_materials_for_message
 
+    materials = as_material_lines(materials)
     lista = format_materials_for_message(materials)
-    total = 0.0
-    for item in materials:
-        try:
-            total += float(str(item.get("preco_total", "0")).replace(",", "."))
-        except ValueError:
-            pass
-    total_txt = f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    total_txt = format_brl(lines_total(materials) if total is None else total)
     return (
         f"Identifiquei estes materiais para *{obra_type}*:\n\n"
         f"{lista}\n\n"
@@ -304,6 +492,7 @@ def build_confirmation_message(materials: List[Dict[str, str]], obra_type: str)
         "• `remove 2` — remove o item 2\n"
         "• `qtd 2=10` — muda a quantidade do item 2\n"
         "• `adiciona 5 saco cimento` — inclui material\n"
-        "• `lista` — mostra a lista atual\n\n"
+        "• `lista` — mostra a lista atual\n"
+        "• vários de uma vez: `remove 2, 5; qtd 3=10`\n\n"
         "Também pode pedir: *último orçamento* ou *privacidade*."
     )
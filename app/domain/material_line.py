@@ -0,0 +1,141 @@
+"""
+Linha de material tipada (quantidade e preço numéricos).
+
+Substitui o `Dict[str, str]` que circulava pelo pipeline com quantidade e
+preço como texto formatado (e era re-parseado em cada etapa). Dentro do
+processo, quantidade e preço são `Decimal`; nas bordas (sessão no Redis,
+orçamento no Supabase, JSON do Gemini) `to_dict`/`from_dict` convertem para o
+formato antigo. Leitura por chave (`line["quantidade"]`, `line.get(...)`)
+continua funcionando para quem ainda trata a linha como dict.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+CENT = Decimal("0.01")
+_ONE = Decimal(1)
+_MISSING = object()
+# Chaves derivadas/tipadas: não vão para `extra`
+_KNOWN_KEYS = {"material", "quantidade", "qtd", "unidade", "preco_unitario", "preco_total", "canonical"}
+
+
+def parse_decimal(value: Any, default: Optional[Decimal] = None) -> Optional[Decimal]:
+    """'2,5', 3, 1.5, Decimal -> Decimal (default se vazio/inválido)."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, Decimal):
+        number = value
+    elif isinstance(value, int):
+        number = Decimal(value)
+    else:
+        try:
+            number = Decimal(str(value).strip().replace(",", "."))
+        except InvalidOperation:
+            return default
+    return number if number.is_finite() else default
+
+
+def format_decimal(value: Decimal) -> str:
+    """Quantidade como o usuário escreveria: '10', '2.5' (sem expoente nem zeros à direita)."""
+    if value == value.to_integral_value():
+        return str(int(value))
+    return format(value.normalize(), "f")
+
+
+def format_brl(value: Union[Decimal, float]) -> str:
+    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+@dataclass(slots=True)
+class MaterialLine:
+    material: str
+    quantity: Decimal = _ONE
+    unit: str = "unidade"
+    unit_price: Optional[Decimal] = None  # None = ainda não precificada
+    canonical: Optional[str] = None  # nome canônico no catálogo (id do material)
+    extra: Optional[Dict[str, Any]] = None  # chaves desconhecidas, preservadas nas bordas
+
+    @property
+    def total(self) -> Decimal:
+        return ((self.unit_price or 0) * self.quantity).quantize(CENT)
+
+    @property
+    def priced(self) -> bool:
+        return self.unit_price is not None
+
+    # Compatibilidade com o dict antigo (somente leitura)
+    def _legacy(self, key: str) -> Any:
+        if key == "material":
+            return self.material
+        if key == "quantidade":
+            return format_decimal(self.quantity)
+        if key == "unidade":
+            return self.unit
+        if key == "preco_unitario" and self.unit_price is not None:
+            return f"{self.unit_price:.2f}"
+        if key == "preco_total" and self.unit_price is not None:
+            return f"{self.total:.2f}"
+        if key == "canonical" and self.canonical:
+            return self.canonical
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._legacy(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._legacy(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._legacy(key) is not _MISSING
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato de borda (Redis, Supabase, PDF antigo): tudo como texto."""
+        data: Dict[str, Any] = dict(self.extra or {})
+        data["material"] = self.material
+        data["quantidade"] = format_decimal(self.quantity)
+        data["unidade"] = self.unit
+        if self.unit_price is not None:
+            data["preco_unitario"] = f"{self.unit_price:.2f}"
+            data["preco_total"] = f"{self.total:.2f}"
+        if self.canonical:
+            data["canonical"] = self.canonical
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "MaterialLine":
+        extra = {k: v for k, v in data.items() if k not in _KNOWN_KEYS}
+        return cls(
+            material=str(data.get("material") or ""),
+            quantity=parse_decimal(data.get("quantidade", data.get("qtd")), _ONE),
+            unit=str(data.get("unidade") or "unidade"),
+            unit_price=parse_decimal(data.get("preco_unitario")),
+            canonical=data.get("canonical") or None,
+            extra=extra or None,
+        )
+
+
+MaterialLike = Union[MaterialLine, Mapping[str, Any]]
+
+
+def as_material_line(item: MaterialLike) -> MaterialLine:
+    return item if isinstance(item, MaterialLine) else MaterialLine.from_dict(item)
+
+
+def as_material_lines(items: Iterable[MaterialLike]) -> List[MaterialLine]:
+    return [as_material_line(item) for item in items]
+
+
+def material_lines_to_dicts(items: Iterable[MaterialLike]) -> List[Dict[str, Any]]:
+    return [as_material_line(item).to_dict() for item in items]
+
+
+def lines_total(items: Iterable[MaterialLike]) -> Decimal:
+    return sum((as_material_line(item).total for item in items), Decimal(0))
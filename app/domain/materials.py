@@ -2,37 +2,74 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, List, Tuple
+import re
+from typing import Dict, List, Optional, Tuple
 
 from app.core.config import Settings
+from app.domain.material_line import MaterialLine
 from app.domain.catalog_service import (
     calc_budget_total,
     enrich_materials_with_prices,
-    get_catalog_bundle,
+    get_catalog_snapshot,
 )
 from app.services.gemini_correction import (
     correct_transcription_with_gemini,
     extract_materials_json_with_gemini,
 )
-from app.services.nlp_obras import extract_construction_context
+from app.services.gemini_router import choose_gemini_model
+from app.services.nlp_obras import TokenKind, extract_construction_context, normalize_text, tokenize_quantities
 
 logger = logging.getLogger(__name__)
 
+# Lista digitada quase sempre traz quantidade ("10 sacos cimento, 3 m areia")
+_QUANTITY_HINT_RE = re.compile(r"\d")
+_MATERIAL_HINT_KINDS = frozenset({TokenKind.UNIT, TokenKind.MATERIAL})
+
+
+def _looks_like_material_list(text: str) -> bool:
+    """Número e pelo menos uma unidade/material do catálogo ("10 sacos de ..."); "tenho 2 filhos" não."""
+    if not _QUANTITY_HINT_RE.search(text):
+        return False
+    return any(token.kind in _MATERIAL_HINT_KINDS for token in tokenize_quantities(normalize_text(text)))
+
+
+def _extract_with_gemini(transcribed_text: str, settings: Settings) -> Optional[Dict]:
+    decision = choose_gemini_model(transcribed_text, settings)
+    logger.info(
+        "Modelo Gemini: %s (%s) — %s",
+        decision.model,
+        decision.tier,
+        "; ".join(decision.reasons),
+    )
+    result = _call_gemini_extraction(transcribed_text, decision.model, settings)
+    if decision.tier == "light" and not (result and result.get("materiais")):
+        logger.info("Modelo leve sem materiais válidos; escalando para %s", settings.gemini_model)
+        result = _call_gemini_extraction(transcribed_text, settings.gemini_model, settings)
+    return result
+
+
+def _call_gemini_extraction(transcribed_text: str, model_name: str, settings: Settings) -> Optional[Dict]:
+    if settings.gemini_batch_enabled:
+        from app.services.gemini_batching import get_extraction_batcher
+
+        return get_extraction_batcher(settings).submit(transcribed_text, model_name)
+    return extract_materials_json_with_gemini(transcribed_text, model_name)
+
 
 def resolve_materials_from_text(
     transcribed_text: str,
     settings: Settings,
-) -> Tuple[str, List[Dict[str, str]], str, float]:
-    # Garante catálogo atualizado (Supabase ou seed) antes da extração
-    get_catalog_bundle()
+) -> Tuple[str, List[MaterialLine], str, float]:
+    # Garante catálogo atualizado (Supabase ou seed) antes da extração; dentro de job, o fixado
+    get_catalog_snapshot()
 
     final_text = transcribed_text
-    materials: List[Dict[str, str]] = []
+    materials: List[MaterialLine] = []
     obra_type = "obra"
 
     if settings.enable_gemini_correction:
         logger.info("Extraindo materiais com Gemini JSON...")
-        gemini_result = extract_materials_json_with_gemini(transcribed_text)
+        gemini_result = _extract_with_gemini(transcribed_text, settings)
         if gemini_result and gemini_result.get("materiais"):
             materials = gemini_result["materiais"]
             obra_type = gemini_result.get("tipo_obra") or "obra"
@@ -54,3 +91,32 @@ def resolve_materials_from_text(
     total = calc_budget_total(materials)
     logger.info("Materiais via NLP: %s | total=%.2f", materials, total)
     return final_text, materials, obra_type, total
+
+
+def resolve_materials_from_typed_text(
+    text: str,
+    settings: Settings,
+) -> Optional[Tuple[str, List[MaterialLine], str, float]]:
+    """
+    Lista de materiais digitada: NLP local primeiro (sem transcrição nem LLM).
+    Se o NLP não achar nada e o texto tiver cara de lista (quantidade e alguma
+    unidade ou material conhecido), segue o caminho completo de
+    `resolve_materials_from_text`. None se não for pedido de materiais ("bom
+    dia", dúvidas, conversa com números): nada disso chega ao LLM.
+    """
+    if "?" in text and not _QUANTITY_HINT_RE.search(text):
+        return None  # pergunta ("tem cimento?"), não pedido
+    get_catalog_snapshot()
+    construction_context = extract_construction_context(text)
+    if construction_context["materiais"]:
+        materials = enrich_materials_with_prices(construction_context["materiais"])
+        total = calc_budget_total(materials)
+        logger.info("Materiais via NLP (texto digitado): %s | total=%.2f", materials, total)
+        return text, materials, construction_context["tipo_obra"], total
+
+    if not _looks_like_material_list(text):
+        return None
+    final_text, materials, obra_type, total = resolve_materials_from_text(text, settings)
+    if not materials:
+        return None
+    return final_text, materials, obra_type, total
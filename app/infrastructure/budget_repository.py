@@ -4,6 +4,8 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, List, Optional
 
+from app.domain.material_line import MaterialLike, material_lines_to_dicts
+
 logger = logging.getLogger(__name__)
 
 
@@ -11,9 +13,10 @@ def save_budget(
     *,
     wa_id: str,
     obra_type: str,
-    materials: List[Dict[str, Any]],
+    materials: List[MaterialLike],
     total_amount: float,
     status: str = "sent",
+    llm_usage: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     try:
         from app.services.supabase_client import get_supabase_client
@@ -26,10 +29,12 @@ def save_budget(
         payload = {
             "wa_id": wa_id,
             "obra_type": obra_type,
-            "materials": materials,
+            "materials": material_lines_to_dicts(materials),
             "total_amount": total_amount,
             "status": status,
         }
+        if llm_usage:
+            payload["llm_usage"] = llm_usage
         result = client.table("budgets").insert(payload).execute()
         rows = result.data or []
         return rows[0] if rows else payload
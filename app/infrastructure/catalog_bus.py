@@ -0,0 +1,120 @@
+"""
+Invalidação do catálogo entre workers/instâncias via Redis.
+
+Quem altera o catálogo (seed, chamada admin) grava um carimbo novo em
+`bot:catalog:version` e publica o mesmo carimbo no canal
+`bot:catalog:invalidate`. Cada processo escuta o canal e, no refresh
+periódico, só recarrega do Supabase quando o carimbo mudou.
+Sem Redis, tudo vira no-op e vale só o TTL.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "bot:catalog:version"
+CHANNEL = "bot:catalog:invalidate"
+
+_client = None
+_client_lock = threading.Lock()
+_retry_at = 0.0  # após falha de conexão, não tenta de novo a cada leitura
+_RETRY_SECONDS = 30.0
+_listener: Optional[threading.Thread] = None
+
+
+def _redis_client(settings: Optional[Settings] = None):
+    """Cliente Redis compartilhado (None se desligado/indisponível)."""
+    global _client, _retry_at
+    if _client is not None:
+        return _client
+    settings = settings or get_settings()
+    if not settings.use_redis or time.monotonic() < _retry_at:
+        return None
+    with _client_lock:
+        if _client is None and time.monotonic() >= _retry_at:
+            try:
+                import redis
+
+                client = redis.Redis.from_url(
+                    settings.redis_url,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                )
+                client.ping()
+                _client = client
+            except Exception as exc:
+                logger.warning("Redis indisponível para invalidação do catálogo: %s", exc)
+                _retry_at = time.monotonic() + _RETRY_SECONDS
+                return None
+    return _client
+
+
+def get_catalog_stamp() -> Optional[str]:
+    """Carimbo de versão atual do catálogo no Redis (None sem Redis ou nunca publicado)."""
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        return client.get(VERSION_KEY)
+    except Exception as exc:
+        logger.warning("Falha ao ler versão do catálogo no Redis: %s", exc)
+        return None
+
+
+def publish_catalog_change(reason: str = "") -> Optional[str]:
+    """Grava um carimbo novo e avisa os outros processos. Retorna o carimbo (None sem Redis)."""
+    client = _redis_client()
+    if client is None:
+        return None
+    stamp = f"{int(time.time())}-{uuid.uuid4().hex[:12]}"
+    try:
+        client.set(VERSION_KEY, stamp)
+        receivers = client.publish(CHANNEL, stamp)
+    except Exception as exc:
+        logger.warning("Falha ao publicar invalidação do catálogo: %s", exc)
+        return None
+    logger.info("Catálogo invalidado (%s): carimbo %s, %s ouvintes", reason or "manual", stamp, receivers)
+    return stamp
+
+
+def start_catalog_listener(on_change: Callable[[str], None]) -> bool:
+    """Thread que escuta o canal e chama `on_change(carimbo)`; reconecta com backoff."""
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return True
+    if _redis_client() is None:
+        return False
+
+    def _run() -> None:
+        delay = 1.0
+        while True:
+            client = _redis_client()
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                delay = 1.0
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        on_change(str(message.get("data") or ""))
+            except Exception as exc:
+                logger.warning("Ouvinte de invalidação do catálogo caiu (%s); reconectando", exc)
+                time.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
+    _listener = threading.Thread(target=_run, name="catalog-invalidation", daemon=True)
+    _listener.start()
+    return True
+
+
+def reset_catalog_bus() -> None:
+    global _client, _listener, _retry_at
+    _client = None
+    _listener = None
+    _retry_at = 0.0
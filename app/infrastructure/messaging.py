@@ -1,9 +1,13 @@
 """Envio de mensagens (Twilio / WhatsApp)."""
 from __future__ import annotations
 
+import os
+from typing import Optional
+
 from app.core.config import Settings
 from app.services.twilio_client import send_pdf_message, send_text_message
 from app.services.whatsapp_api_client import (
+    send_whatsapp_document_by_media_id,
     send_whatsapp_pdf_message,
     send_whatsapp_text_message,
 )
@@ -15,7 +19,16 @@ def send_text(to_number: str, message: str, settings: Settings) -> bool:
     return send_text_message(to_number, message)
 
 
-def send_pdf(to_number: str, pdf_path: str, caption: str, settings: Settings) -> bool:
+def send_pdf(
+    to_number: str,
+    pdf_path: str,
+    caption: str,
+    settings: Settings,
+    media_id: Optional[str] = None,
+) -> bool:
+    """`media_id` de um upload já feito (PDF pré-renderizado) pula o upload na Meta."""
     if settings.message_service_normalized == "whatsapp":
+        if media_id:
+            return send_whatsapp_document_by_media_id(to_number, media_id, os.path.basename(pdf_path), caption)
         return send_whatsapp_pdf_message(to_number, pdf_path, caption)
     return send_pdf_message(to_number, pdf_path, caption)
@@ -0,0 +1,77 @@
+"""Métricas em memória do processo (contadores e observações), expostas em `GET /metrics`."""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class _Observation:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+_COUNTERS: Dict[str, Dict[LabelKey, float]] = {}
+_OBSERVATIONS: Dict[str, Dict[LabelKey, _Observation]] = {}
+_LOCK = threading.Lock()
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key) or "_"
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    key = _label_key(labels)
+    with _LOCK:
+        series = _COUNTERS.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    key = _label_key(labels)
+    with _LOCK:
+        series = _OBSERVATIONS.setdefault(name, {})
+        obs = series.setdefault(key, _Observation())
+        obs.count += 1
+        obs.total += value
+        obs.max = max(obs.max, value)
+
+
+def get_counter(name: str, **labels: Any) -> float:
+    with _LOCK:
+        return _COUNTERS.get(name, {}).get(_label_key(labels), 0)
+
+
+def snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        counters = {
+            name: {_format_labels(k): round(v, 6) for k, v in series.items()}
+            for name, series in _COUNTERS.items()
+        }
+        observations = {
+            name: {
+                _format_labels(k): {
+                    "count": o.count,
+                    "avg": round(o.total / o.count, 3) if o.count else None,
+                    "max": round(o.max, 3),
+                    "sum": round(o.total, 3),
+                }
+                for k, o in series.items()
+            }
+            for name, series in _OBSERVATIONS.items()
+        }
+    return {"counters": counters, "observations": observations}
+
+
+def reset_metrics() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _OBSERVATIONS.clear()
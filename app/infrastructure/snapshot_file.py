@@ -0,0 +1,50 @@
+"""
+Snapshot do catálogo em disco (pickle com escrita atômica).
+
+Serve para um worker novo subir com o último catálogo bom (preços e índices
+compilados) em milissegundos, sem esperar o Supabase. O arquivo é escrito só
+pelo próprio serviço, num diretório local (`.cache/`).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def write_snapshot_file(path: Path, payload: Dict[str, Any]) -> bool:
+    """Grava em arquivo temporário e troca com `os.replace` (leitor nunca vê arquivo pela metade)."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return True
+    except (OSError, pickle.PicklingError, TypeError) as exc:
+        logger.warning("Não foi possível gravar snapshot do catálogo em %s: %s", path, exc)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def read_snapshot_file(path: Path, format_version: int) -> Optional[Dict[str, Any]]:
+    """Conteúdo gravado (None se não existe, ilegível ou de outro formato)."""
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as fh:
+            payload = pickle.load(fh)
+    except Exception as exc:  # arquivo truncado ou de versão antiga do código
+        logger.warning("Snapshot do catálogo em disco ilegível (%s): %s", path, exc)
+        return None
+    if not isinstance(payload, dict) or payload.get("format") != format_version:
+        logger.info("Snapshot do catálogo em disco com formato antigo; ignorando")
+        return None
+    return payload
@@ -6,7 +6,7 @@ import logging
 import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, Iterable, NamedTuple, Optional
 
 from app.core.config import Settings
 from app.domain.conversation import ConversationSession
@@ -14,6 +14,14 @@ from app.domain.conversation import ConversationSession
 logger = logging.getLogger(__name__)
 
 
+class AudioJob(NamedTuple):
+    generation: int  # ordem de chegada dos áudios do chat
+    burst_start: int  # geração do primeiro áudio do lote (debounce)
+
+
+_NO_AUDIO_JOB = AudioJob(0, 0)
+
+
 class StateStore(ABC):
     @abstractmethod
     def claim_message(self, message_id: str, from_number: str) -> bool:
@@ -35,6 +43,38 @@ class StateStore(ABC):
     def check_audio_rate_limit(self, wa_id: str, max_per_hour: int) -> bool:
         """True se ainda pode enviar áudio."""
 
+    @abstractmethod
+    def start_audio_job(self, wa_id: str, debounce_seconds: float = 0) -> AudioJob:
+        """
+        Nova geração de job de áudio do chat. Chegando até `debounce_seconds`
+        depois do áudio anterior, entra no mesmo lote; senão abre um lote novo
+        e os jobs de lotes anteriores ficam obsoletos.
+        """
+
+    @abstractmethod
+    def current_audio_job(self, wa_id: str) -> AudioJob:
+        """Job de áudio mais recente do chat (geração 0 se nenhum)."""
+
+    @abstractmethod
+    def save_audio_transcript(self, wa_id: str, generation: int, text: str) -> None:
+        """Transcrição de um áudio do lote ("" se falhou), para o último job do lote juntar."""
+
+    @abstractmethod
+    def get_audio_transcripts(self, wa_id: str, generations: Iterable[int]) -> Dict[int, str]:
+        """Transcrições já gravadas entre `generations` (faltando = ainda transcrevendo)."""
+
+    @abstractmethod
+    def mark_audio_burst_ready(self, wa_id: str, generation: int) -> None:
+        """O último áudio do lote (`generation`) já esperou a janela de debounce."""
+
+    @abstractmethod
+    def audio_burst_ready(self, wa_id: str) -> int:
+        """Geração marcada como pronta por `mark_audio_burst_ready` (0 se nenhuma)."""
+
+    @abstractmethod
+    def claim_audio_burst(self, wa_id: str, generation: int) -> bool:
+        """True só para o primeiro job que fecha o lote terminado em `generation`."""
+
 
 class InMemoryStateStore(StateStore):
     """Fallback local. Não use em produção multi-instância."""
@@ -45,6 +85,10 @@ class InMemoryStateStore(StateStore):
         self._dedupe: Dict[str, float] = {}
         self._sessions: Dict[str, tuple[float, dict]] = {}
         self._audio_hits: Dict[str, list[float]] = {}
+        self._audio_jobs: Dict[str, tuple[AudioJob, float]] = {}
+        self._transcripts: Dict[str, Dict[int, str]] = {}
+        self._bursts_ready: Dict[str, int] = {}
+        self._bursts_claimed: Dict[str, int] = {}
         self._lock = threading.Lock()
 
     def claim_message(self, message_id: str, from_number: str) -> bool:
@@ -89,6 +133,47 @@ class InMemoryStateStore(StateStore):
             self._audio_hits[wa_id] = hits
             return True
 
+    def start_audio_job(self, wa_id: str, debounce_seconds: float = 0) -> AudioJob:
+        now = time.time()
+        with self._lock:
+            previous, last_at = self._audio_jobs.get(wa_id, (_NO_AUDIO_JOB, 0.0))
+            generation = previous.generation + 1
+            if previous.generation and now - last_at <= debounce_seconds:
+                job = AudioJob(generation, previous.burst_start)
+            else:
+                job = AudioJob(generation, generation)
+                self._transcripts.pop(wa_id, None)
+            self._audio_jobs[wa_id] = (job, now)
+            return job
+
+    def current_audio_job(self, wa_id: str) -> AudioJob:
+        with self._lock:
+            return self._audio_jobs.get(wa_id, (_NO_AUDIO_JOB, 0.0))[0]
+
+    def save_audio_transcript(self, wa_id: str, generation: int, text: str) -> None:
+        with self._lock:
+            self._transcripts.setdefault(wa_id, {})[generation] = text
+
+    def get_audio_transcripts(self, wa_id: str, generations: Iterable[int]) -> Dict[int, str]:
+        with self._lock:
+            texts = self._transcripts.get(wa_id, {})
+            return {g: texts[g] for g in generations if g in texts}
+
+    def mark_audio_burst_ready(self, wa_id: str, generation: int) -> None:
+        with self._lock:
+            self._bursts_ready[wa_id] = generation
+
+    def audio_burst_ready(self, wa_id: str) -> int:
+        with self._lock:
+            return self._bursts_ready.get(wa_id, 0)
+
+    def claim_audio_burst(self, wa_id: str, generation: int) -> bool:
+        with self._lock:
+            if self._bursts_claimed.get(wa_id) == generation:
+                return False
+            self._bursts_claimed[wa_id] = generation
+            return True
+
     def _purge_dedupe(self, now: float) -> None:
         expired = [k for k, ts in self._dedupe.items() if now - ts >= self.dedupe_ttl]
         for k in expired:
@@ -110,6 +195,12 @@ class RedisStateStore(StateStore):
     def _rate_key(self, wa_id: str) -> str:
         return f"bot:rate:audio:{wa_id}"
 
+    def _audio_job_key(self, wa_id: str) -> str:
+        return f"bot:job:audio:{wa_id}"
+
+    def _transcripts_key(self, wa_id: str) -> str:
+        return f"bot:job:audio:{wa_id}:texts"
+
     def claim_message(self, message_id: str, from_number: str) -> bool:
         key = self._dedupe_key(message_id, from_number)
         # SET NX EX — atômico
@@ -142,6 +233,61 @@ class RedisStateStore(StateStore):
             self.redis.expire(key, 3600)
         return count <= max_per_hour
 
+    def start_audio_job(self, wa_id: str, debounce_seconds: float = 0) -> AudioJob:
+        # Atômico entre workers: geração, início do lote e horário do último áudio num hash
+        generation, burst_start = self.redis.eval(
+            _START_AUDIO_JOB_LUA,
+            2,
+            self._audio_job_key(wa_id),
+            self._transcripts_key(wa_id),
+            repr(time.time()),
+            repr(float(debounce_seconds)),
+            self.session_ttl,
+        )
+        return AudioJob(int(generation), int(burst_start))
+
+    def current_audio_job(self, wa_id: str) -> AudioJob:
+        generation, burst_start = self.redis.hmget(self._audio_job_key(wa_id), "generation", "burst_start")
+        return AudioJob(int(generation or 0), int(burst_start or 0))
+
+    def save_audio_transcript(self, wa_id: str, generation: int, text: str) -> None:
+        key = self._transcripts_key(wa_id)
+        self.redis.hset(key, str(generation), text)
+        self.redis.expire(key, self.session_ttl)
+
+    def get_audio_transcripts(self, wa_id: str, generations: Iterable[int]) -> Dict[int, str]:
+        generations = list(generations)
+        if not generations:
+            return {}
+        values = self.redis.hmget(self._transcripts_key(wa_id), [str(g) for g in generations])
+        return {g: text for g, text in zip(generations, values) if text is not None}
+
+    def mark_audio_burst_ready(self, wa_id: str, generation: int) -> None:
+        self.redis.hset(self._audio_job_key(wa_id), "ready", generation)
+
+    def audio_burst_ready(self, wa_id: str) -> int:
+        return int(self.redis.hget(self._audio_job_key(wa_id), "ready") or 0)
+
+    def claim_audio_burst(self, wa_id: str, generation: int) -> bool:
+        key = f"{self._audio_job_key(wa_id)}:closed:{generation}"
+        return bool(self.redis.set(key, "1", nx=True, ex=self.session_ttl))
+
+
+_START_AUDIO_JOB_LUA = """
+local generation = redis.call('HINCRBY', KEYS[1], 'generation', 1)
+local last_at = tonumber(redis.call('HGET', KEYS[1], 'last_at') or '0')
+local burst_start = tonumber(redis.call('HGET', KEYS[1], 'burst_start') or '0')
+local now = tonumber(ARGV[1])
+if generation == 1 or burst_start == 0 or now - last_at > tonumber(ARGV[2]) then
+    burst_start = generation
+    redis.call('HSET', KEYS[1], 'burst_start', burst_start)
+    redis.call('DEL', KEYS[2])
+end
+redis.call('HSET', KEYS[1], 'last_at', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {generation, burst_start}
+"""
+
 
 _store: Optional[StateStore] = None
 
@@ -3,43 +3,58 @@ from __future__ import annotations
 
 import logging
 import os
+import time
 import uuid
-from typing import Any, Dict, List
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.core.config import Settings, get_settings
-from app.domain.catalog_service import calc_budget_total, enrich_materials_with_prices
+from app.domain.catalog_service import (
+    calc_budget_total,
+    enrich_materials_with_prices,
+    get_catalog_snapshot,
+    pin_catalog_snapshot,
+)
 from app.domain.conversation import (
     ConversationSession,
     ConversationState,
-    apply_quantity_change,
-    apply_remove_material,
     build_confirmation_message,
     build_privacy_policy_message,
     build_processing_started_message,
+    Intent,
+    IntentKind,
     digits_only,
     format_destination_number,
-    is_cancel_message,
-    is_confirmation_message,
-    is_delete_data_request,
-    is_last_budget_request,
-    is_privacy_policy_request,
-    is_show_list_request,
-    parse_add_material,
-    parse_quantity_change,
-    parse_remove_item,
+    route_edit_commands,
+    route_text,
 )
-from app.domain.materials import resolve_materials_from_text
+from app.domain.material_line import MaterialLike, MaterialLine, as_material_lines
+from app.domain.materials import resolve_materials_from_text, resolve_materials_from_typed_text
 from app.infrastructure.budget_repository import (
     delete_budgets_for_wa,
     get_last_budget,
     save_budget,
 )
+from app.infrastructure import metrics
 from app.infrastructure.messaging import send_pdf, send_text
 from app.infrastructure.retry import with_retries
-from app.infrastructure.store import StateStore, get_state_store
+from app.infrastructure.store import AudioJob, StateStore, get_state_store
 from app.services.gladia_transcription import transcribe_audio_gladia
+from app.services.llm_telemetry import (
+    collect_llm_calls,
+    current_collector,
+    merge_llm_usage,
+    summarize_llm_calls,
+)
 from app.services.nlp_obras import extract_construction_context
 from app.services.pdf_obras_generator import create_construction_budget_pdf
+from app.services.pdf_speculation import (
+    PrerenderedPdf,
+    budget_pdf_key,
+    discard_speculation,
+    speculate_budget_pdf,
+    take_prerendered_pdf,
+)
 from app.services.transcription import transcribe_audio
 from app.services.whatsapp_cliente import download_media
 
@@ -54,28 +69,44 @@ def _generate_and_send_pdf(
     *,
     formatted_number: str,
     wa_id: str,
-    materials: List[Dict[str, Any]],
+    materials: List[MaterialLike],
     obra_type: str,
     settings: Settings,
     persist: bool = True,
+    llm_usage: Dict[str, Any] | None = None,
+    catalog_version: str = "",
 ) -> None:
     _ensure_temp_dir()
-    materials = enrich_materials_with_prices(materials)
-    total_amount = calc_budget_total(materials)
-    pdf_path = f"app/temp/orcamento_obra_{uuid.uuid4()}.pdf"
+    prerendered: PrerenderedPdf | None = None
+    if catalog_version and catalog_version == get_catalog_snapshot().version:
+        # Sessão já precificada nesta versão do catálogo; o PDF pode já estar pronto
+        materials = as_material_lines(materials)
+        prerendered = take_prerendered_pdf(wa_id, budget_pdf_key(materials, obra_type, catalog_version))
+    else:
+        if catalog_version:
+            discard_speculation(wa_id, "stale")
+        materials = enrich_materials_with_prices(materials)
+    if prerendered is not None:
+        total_amount = prerendered.total_amount
+        pdf_path = prerendered.pdf_path
+    else:
+        total_amount = calc_budget_total(materials)
+        pdf_path = f"app/temp/orcamento_obra_{uuid.uuid4()}.pdf"
     try:
-        create_construction_budget_pdf(
-            materials,
-            obra_type,
-            pdf_path,
-            total_amount=total_amount,
-        )
-        logger.info("PDF gerado: %s | total=%.2f", pdf_path, total_amount)
+        if prerendered is None:
+            create_construction_budget_pdf(
+                materials,
+                obra_type,
+                pdf_path,
+                total_amount=total_amount,
+            )
+            logger.info("PDF gerado: %s | total=%.2f", pdf_path, total_amount)
         ok = send_pdf(
             formatted_number,
             pdf_path,
             f"Orçamento de Materiais - {obra_type.title()} ({len(materials)} itens) | Total R$ {total_amount:.2f}",
             settings,
+            media_id=prerendered.media_id if prerendered else None,
         )
         if ok:
             logger.info("PDF enviado com sucesso")
@@ -86,6 +117,7 @@ def _generate_and_send_pdf(
                     materials=materials,
                     total_amount=total_amount,
                     status="sent",
+                    llm_usage=llm_usage,
                 )
         else:
             send_text(
@@ -134,18 +166,19 @@ def _handle_last_budget(wa_id: str, formatted_number: str, settings: Settings) -
 
 def _handle_lgpd(
     *,
-    body: str,
+    intent: Intent,
     wa_id: str,
     formatted_number: str,
     store: StateStore,
     settings: Settings,
 ) -> bool:
-    if is_privacy_policy_request(body):
+    if intent.kind is IntentKind.PRIVACY_POLICY:
         send_text(formatted_number, build_privacy_policy_message(), settings)
         return True
 
-    if is_delete_data_request(body):
+    if intent.kind is IntentKind.DELETE_DATA:
         store.clear_session(wa_id)
+        discard_speculation(wa_id)
         deleted = delete_budgets_for_wa(wa_id)
         send_text(
             formatted_number,
@@ -159,35 +192,44 @@ def _handle_lgpd(
     return False
 
 
+def ensure_session_prices(session: ConversationSession) -> bool:
+    """
+    Reprecifica a lista inteira só se o catálogo mudou desde a última
+    precificação da sessão. As edições mantêm linhas e subtotal incrementalmente.
+    True se reprecificou.
+    """
+    snapshot = get_catalog_snapshot()
+    if session.catalog_version == snapshot.version:
+        return False
+    session.reprice(enrich_materials_with_prices(session.materials, snapshot), snapshot.version)
+    return True
+
+
 def _save_edited_session(
     *,
     store: StateStore,
     wa_id: str,
-    materials: List[Dict[str, Any]],
-    obra_type: str,
-    texto: str,
+    session: ConversationSession,
     note: str,
     formatted_number: str,
     settings: Settings,
 ) -> None:
-    materials = enrich_materials_with_prices(materials)
-    session = ConversationSession(
-        state=ConversationState.AWAITING_CONFIRMATION,
-        materials=materials,
-        obra_type=obra_type,
-        texto=texto,
-    )
+    ensure_session_prices(session)
+    session.state = ConversationState.AWAITING_CONFIRMATION
+    # "adiciona ..." pode ter chamado o LLM: o custo entra no orçamento do "SIM"
+    session.llm_usage = merge_llm_usage(session.llm_usage, current_collector() or [])
     store.save_session(wa_id, session)
+    speculate_budget_pdf(wa_id, session.materials, session.obra_type, session.catalog_version, settings)
     send_text(
         formatted_number,
-        f"{note}\n\n" + build_confirmation_message(materials, obra_type),
+        f"{note}\n\n" + build_confirmation_message(session.materials, session.obra_type, session.subtotal),
         settings,
     )
 
 
 def _handle_list_edit(
     *,
-    body: str,
+    intent: Intent,
     session: ConversationSession,
     wa_id: str,
     formatted_number: str,
@@ -195,23 +237,23 @@ def _handle_list_edit(
     settings: Settings,
 ) -> bool:
     """Handlers de edição enquanto aguarda confirmação. True se consumiu a mensagem."""
-    if is_show_list_request(body):
+    if intent.kind is IntentKind.SHOW_LIST:
         send_text(
             formatted_number,
-            build_confirmation_message(session.materials, session.obra_type),
+            build_confirmation_message(session.materials, session.obra_type, session.subtotal),
             settings,
         )
         return True
 
-    remove_target = parse_remove_item(body)
-    if remove_target:
-        # Evita conflito com "apagar meus dados" (já tratado antes)
-        updated, note = apply_remove_material(list(session.materials), remove_target)
+    if intent.kind is IntentKind.REMOVE:
+        # "apagar meus dados" já saiu como DELETE_DATA no roteador
+        note = session.remove_material(intent.remove_target)
         if note and "Não encontrei" in note:
             send_text(formatted_number, note, settings)
             return True
-        if not updated:
+        if not session.materials:
             store.clear_session(wa_id)
+            discard_speculation(wa_id)
             send_text(
                 formatted_number,
                 f"{note}\nA lista ficou vazia. Envie um novo áudio com os materiais.",
@@ -221,37 +263,31 @@ def _handle_list_edit(
         _save_edited_session(
             store=store,
             wa_id=wa_id,
-            materials=updated,
-            obra_type=session.obra_type,
-            texto=session.texto,
+            session=session,
             note=note or "Lista atualizada.",
             formatted_number=formatted_number,
             settings=settings,
         )
         return True
 
-    qty_change = parse_quantity_change(body)
-    if qty_change:
-        index, qty = qty_change
-        updated, note = apply_quantity_change(list(session.materials), index, qty)
+    if intent.kind is IntentKind.QUANTITY:
+        index, qty = intent.quantity_change
+        note = session.change_quantity(index, qty)
         if note and "Não encontrei" in note:
             send_text(formatted_number, note, settings)
             return True
         _save_edited_session(
             store=store,
             wa_id=wa_id,
-            materials=updated,
-            obra_type=session.obra_type,
-            texto=session.texto,
+            session=session,
             note=note or "Quantidade atualizada.",
             formatted_number=formatted_number,
             settings=settings,
         )
         return True
 
-    add_text = parse_add_material(body)
-    if add_text:
-        ctx = extract_construction_context(add_text)
+    if intent.kind is IntentKind.ADD:
+        ctx = extract_construction_context(intent.add_text)
         new_items = enrich_materials_with_prices(ctx.get("materiais") or [])
         if not new_items:
             send_text(
@@ -261,14 +297,12 @@ def _handle_list_edit(
                 settings,
             )
             return True
-        merged = list(session.materials) + new_items
-        names = ", ".join(i["material"] for i in new_items)
+        session.add_materials(new_items)
+        names = ", ".join(i.material for i in new_items)
         _save_edited_session(
             store=store,
             wa_id=wa_id,
-            materials=merged,
-            obra_type=session.obra_type,
-            texto=session.texto,
+            session=session,
             note=f"Adicionei: {names}.",
             formatted_number=formatted_number,
             settings=settings,
@@ -278,6 +312,150 @@ def _handle_list_edit(
     return False
 
 
+def _apply_edit_batch(
+    draft: ConversationSession,
+    intents: List[Intent],
+    additions: Dict[int, List[MaterialLine]],
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Aplica os comandos em ordem sobre `draft`. Números de item se referem à
+    lista que o usuário viu ("remove 2, 5" remove o 2º e o 5º originais).
+    Retorna (notas, erro); com erro o chamador descarta o rascunho.
+    """
+    slots: List[Optional[MaterialLine]] = list(draft.materials)
+    notes: List[str] = []
+    for pos, intent in enumerate(intents):
+        if intent.kind is IntentKind.ADD:
+            draft.add_materials(additions[pos])
+            notes.append("Adicionei: " + ", ".join(i.material for i in additions[pos]) + ".")
+            continue
+
+        if intent.kind is IntentKind.REMOVE and intent.remove_target[0] == "name":
+            note = draft.remove_material(intent.remove_target)
+        else:
+            number = intent.remove_target[1] if intent.kind is IntentKind.REMOVE else intent.quantity_change[0]
+            line = slots[number - 1] if 0 < number <= len(slots) else None
+            if line is None:
+                return notes, f"Não encontrei o item {number}."
+            current = next(i for i, item in enumerate(draft.materials) if item is line) + 1
+            if intent.kind is IntentKind.REMOVE:
+                note = draft.remove_material(("index", current))
+            else:
+                draft.change_quantity(current, intent.quantity_change[1])
+                slots[number - 1] = draft.materials[current - 1]
+                note = f"Atualizei a quantidade do item {number}."
+        if note and "Não encontrei" in note:
+            return notes, note
+        notes.append(note or "Lista atualizada.")
+        present = {id(item) for item in draft.materials}
+        slots = [item if item is not None and id(item) in present else None for item in slots]
+    return notes, None
+
+
+def _handle_edit_batch(
+    *,
+    intents: List[Intent],
+    session: ConversationSession,
+    wa_id: str,
+    formatted_number: str,
+    store: StateStore,
+    settings: Settings,
+) -> None:
+    """Vários comandos numa mensagem: tudo ou nada, uma escrita de sessão e uma resposta."""
+    # Extrai os itens novos antes de mexer na lista: falha aqui não deixa edição pela metade
+    additions: Dict[int, List[MaterialLine]] = {}
+    for pos, intent in enumerate(intents):
+        if intent.kind is IntentKind.ADD:
+            ctx = extract_construction_context(intent.add_text)
+            new_items = enrich_materials_with_prices(ctx.get("materiais") or [])
+            if not new_items:
+                send_text(
+                    formatted_number,
+                    f"Não consegui identificar o material em '{intent.add_text}'. Nada foi alterado.",
+                    settings,
+                )
+                return
+            additions[pos] = new_items
+
+    draft = replace(session)
+    notes, error = _apply_edit_batch(draft, intents, additions)
+    if error:
+        send_text(formatted_number, f"{error} Nada foi alterado.", settings)
+        return
+    if not draft.materials:
+        store.clear_session(wa_id)
+        discard_speculation(wa_id)
+        send_text(
+            formatted_number,
+            "\n".join(notes) + "\nA lista ficou vazia. Envie um novo áudio com os materiais.",
+            settings,
+        )
+        return
+    _save_edited_session(
+        store=store,
+        wa_id=wa_id,
+        session=draft,
+        note="\n".join(notes),
+        formatted_number=formatted_number,
+        settings=settings,
+    )
+
+
+def _start_confirmation(
+    *,
+    store: StateStore,
+    wa_id: str,
+    formatted_number: str,
+    settings: Settings,
+    final_text: str,
+    materials: List[MaterialLike],
+    obra_type: str,
+) -> None:
+    session = ConversationSession(
+        state=ConversationState.AWAITING_CONFIRMATION,
+        materials=materials,
+        obra_type=obra_type,
+        texto=final_text,
+        llm_usage=summarize_llm_calls(current_collector() or []),
+        catalog_version=get_catalog_snapshot().version,
+    )
+    store.save_session(wa_id, session)
+    speculate_budget_pdf(wa_id, session.materials, obra_type, session.catalog_version, settings)
+    send_text(
+        formatted_number,
+        build_confirmation_message(session.materials, obra_type, session.subtotal),
+        settings,
+    )
+
+
+def _handle_typed_list(
+    *,
+    text: str,
+    wa_id: str,
+    formatted_number: str,
+    store: StateStore,
+    settings: Settings,
+) -> bool:
+    """Lista de materiais digitada vira orçamento direto (mesma confirmação do áudio)."""
+    resolved = resolve_materials_from_typed_text(text, settings)
+    if resolved is None:
+        return False
+    final_text, materials, obra_type, total = resolved
+    logger.info("Lista digitada: %s itens | obra=%s | total=%.2f", len(materials), obra_type, total)
+    # Pedido digitado é o mais novo: áudios ainda em andamento não sobrescrevem esta lista
+    store.start_audio_job(wa_id)
+    _start_confirmation(
+        store=store,
+        wa_id=wa_id,
+        formatted_number=formatted_number,
+        settings=settings,
+        final_text=final_text,
+        materials=materials,
+        obra_type=obra_type,
+    )
+    return True
+
+
 def _handle_text(
     *,
     body: str,
@@ -286,8 +464,9 @@ def _handle_text(
     store: StateStore,
     settings: Settings,
 ) -> None:
+    intent = route_text(body)
     if _handle_lgpd(
-        body=body,
+        intent=intent,
         wa_id=wa_id,
         formatted_number=formatted_number,
         store=store,
@@ -295,7 +474,7 @@ def _handle_text(
     ):
         return
 
-    if is_last_budget_request(body):
+    if intent.kind is IntentKind.LAST_BUDGET:
         _handle_last_budget(wa_id, formatted_number, settings)
         return
 
@@ -305,7 +484,7 @@ def _handle_text(
         ConversationState.EDITING,
     }
 
-    if in_confirm and is_confirmation_message(body):
+    if in_confirm and intent.kind is IntentKind.CONFIRM:
         materials = session.materials
         obra_type = session.obra_type
         store.clear_session(wa_id)
@@ -316,6 +495,8 @@ def _handle_text(
             materials=materials,
             obra_type=obra_type,
             settings=settings,
+            llm_usage=session.llm_usage,
+            catalog_version=session.catalog_version,
         )
         store.save_session(
             wa_id,
@@ -323,8 +504,9 @@ def _handle_text(
         )
         return
 
-    if in_confirm and is_cancel_message(body):
+    if in_confirm and intent.kind is IntentKind.CANCEL:
         store.clear_session(wa_id)
+        discard_speculation(wa_id)
         send_text(
             formatted_number,
             "Orçamento cancelado. Envie um novo áudio com os materiais.",
@@ -332,8 +514,20 @@ def _handle_text(
         )
         return
 
+    edit_batch = route_edit_commands(body) if in_confirm else None
+    if edit_batch:
+        _handle_edit_batch(
+            intents=edit_batch,
+            session=session,
+            wa_id=wa_id,
+            formatted_number=formatted_number,
+            store=store,
+            settings=settings,
+        )
+        return
+
     if in_confirm and _handle_list_edit(
-        body=body,
+        intent=intent,
         session=session,
         wa_id=wa_id,
         formatted_number=formatted_number,
@@ -347,14 +541,24 @@ def _handle_text(
             formatted_number,
             "Há uma lista aguardando confirmação.\n"
             "Responda *SIM*, *NÃO*, ou edite com `remove N` / `qtd N=X` / `adiciona ...`.\n\n"
-            + build_confirmation_message(session.materials, session.obra_type),
+            + build_confirmation_message(session.materials, session.obra_type, session.subtotal),
             settings,
         )
         return
 
+    if intent.kind in {IntentKind.UNKNOWN, IntentKind.ADD} and _handle_typed_list(
+        text=intent.add_text or body,
+        wa_id=wa_id,
+        formatted_number=formatted_number,
+        store=store,
+        settings=settings,
+    ):
+        return
+
     ok = send_text(
         formatted_number,
-        "Envie um áudio descrevendo os materiais da obra para eu montar o orçamento.\n"
+        "Envie um áudio ou digite a lista de materiais da obra (ex.: *10 sacos cimento, 3 m areia*) "
+        "para eu montar o orçamento.\n"
         "Se quiser, peça também: *último orçamento* ou *privacidade*.",
         settings,
     )
@@ -362,6 +566,81 @@ def _handle_text(
         logger.error("Falha ao enviar resposta de orientação para %s", formatted_number)
 
 
+def _audio_job_superseded(
+    store: StateStore,
+    wa_id: str,
+    job: AudioJob,
+    stage: str,
+    *,
+    same_burst_ok: bool = False,
+) -> bool:
+    """
+    True se chegou um áudio mais novo do mesmo chat; o job atual para na
+    fronteira `stage`. Com `same_burst_ok`, áudio novo do mesmo lote não conta
+    (a transcrição deste ainda vai ser usada por quem fechar o lote).
+    """
+    current = store.current_audio_job(wa_id)
+    if current.generation == job.generation:
+        return False
+    if same_burst_ok and current.burst_start == job.burst_start:
+        return False
+    logger.info(
+        "Job de áudio %s de %s substituído pelo %s; descartado antes de %s",
+        job.generation,
+        wa_id,
+        current.generation,
+        stage,
+    )
+    metrics.increment("audio_jobs_superseded_total", stage=stage)
+    return True
+
+
+def _collect_audio_burst(
+    store: StateStore,
+    wa_id: str,
+    job: AudioJob,
+    arrived_at: float,
+    settings: Settings,
+) -> Tuple[str, AudioJob] | None:
+    """
+    Fecha o lote de áudios, sem ficar esperando os outros jobs.
+
+    O último áudio do lote espera a janela de debounce e marca o lote como
+    pronto. Depois disso, quem encontra todas as transcrições gravadas (ele ou
+    um job mais antigo que terminou de transcrever depois) junta os textos na
+    ordem de chegada, uma vez só (`claim_audio_burst`). Retorna (texto, job
+    que fecha o lote) ou None se outro job responde pelo lote.
+    """
+    current = store.current_audio_job(wa_id)
+    if current.generation == job.generation:
+        remaining = settings.audio_debounce_seconds - (time.monotonic() - arrived_at)
+        if remaining > 0:
+            time.sleep(remaining)
+            current = store.current_audio_job(wa_id)
+        if current.generation == job.generation:
+            store.mark_audio_burst_ready(wa_id, job.generation)
+
+    if current.burst_start != job.burst_start:
+        _audio_job_superseded(store, wa_id, job, "extraction")
+        return None
+
+    generations = range(current.burst_start, current.generation + 1)
+    if (
+        store.audio_burst_ready(wa_id) != current.generation
+        or len(store.get_audio_transcripts(wa_id, generations)) < len(generations)
+        or not store.claim_audio_burst(wa_id, current.generation)
+    ):
+        # Outro job do mesmo lote fecha o pedido (com esta transcrição)
+        metrics.increment("audio_notes_coalesced_total")
+        return None
+
+    texts = store.get_audio_transcripts(wa_id, generations)
+    if len(generations) > 1:
+        logger.info("Lote de %s áudios de %s numa lista só", len(generations), wa_id)
+    text = " ".join(texts[g].strip() for g in generations if texts.get(g, "").strip())
+    return text, current
+
+
 def _handle_audio(
     *,
     audio_id: str,
@@ -378,6 +657,10 @@ def _handle_audio(
         )
         return
 
+    # Áudios seguidos do mesmo chat formam um lote (debounce); áudio fora da
+    # janela abre lote novo e torna obsoletos os jobs do lote anterior
+    job = store.start_audio_job(wa_id, settings.audio_debounce_seconds)
+    arrived_at = time.monotonic()
     _ensure_temp_dir()
     audio_path = f"app/temp/{audio_id}.ogg"
 
@@ -388,15 +671,16 @@ def _handle_audio(
                 raise RuntimeError("download_media retornou False")
             return ok
 
+        downloaded = True
         try:
             with_retries("download_media", _download, settings)
         except Exception:
+            downloaded = False
             send_text(
                 formatted_number,
                 "Não consegui baixar o áudio. Pode enviar novamente?",
                 settings,
             )
-            return
 
         def _transcribe() -> str:
             if settings.transcription_service_normalized == "gladia":
@@ -407,9 +691,22 @@ def _handle_audio(
                 raise RuntimeError("transcrição vazia")
             return text
 
-        try:
-            transcribed = with_retries("transcription", _transcribe, settings)
-        except Exception:
+        own_text = ""
+        if downloaded and not _audio_job_superseded(store, wa_id, job, "transcription", same_burst_ok=True):
+            try:
+                own_text = with_retries("transcription", _transcribe, settings)
+            except Exception:
+                own_text = ""
+        # Sempre grava (vazia se falhou): o lote só fecha com todas as transcrições
+        store.save_audio_transcript(wa_id, job.generation, own_text)
+
+        burst = _collect_audio_burst(store, wa_id, job, arrived_at, settings)
+        if burst is None:
+            return
+        transcribed, job = burst
+        if not transcribed:
+            if not downloaded and job.generation == job.burst_start:
+                return  # áudio único que nem baixou: o aviso já foi enviado
             send_text(
                 formatted_number,
                 "Não consegui entender o áudio. Pode repetir falando os materiais com clareza?",
@@ -418,9 +715,13 @@ def _handle_audio(
             return
 
         logger.info("Texto transcrito: %s", transcribed)
+        if _audio_job_superseded(store, wa_id, job, "extraction"):
+            return
 
         final_text, materials, obra_type, total = resolve_materials_from_text(transcribed, settings)
         logger.info("Materiais: %s | obra=%s | total=%.2f", materials, obra_type, total)
+        if _audio_job_superseded(store, wa_id, job, "session_save"):
+            return
 
         if not materials:
             send_text(
@@ -431,17 +732,14 @@ def _handle_audio(
             )
             return
 
-        session = ConversationSession(
-            state=ConversationState.AWAITING_CONFIRMATION,
+        _start_confirmation(
+            store=store,
+            wa_id=wa_id,
+            formatted_number=formatted_number,
+            settings=settings,
+            final_text=final_text,
             materials=materials,
             obra_type=obra_type,
-            texto=final_text,
-        )
-        store.save_session(wa_id, session)
-        send_text(
-            formatted_number,
-            build_confirmation_message(materials, obra_type),
-            settings,
         )
     except Exception as exc:
         logger.exception("Falha no processamento de áudio: %s", exc)
@@ -458,7 +756,11 @@ def _handle_audio(
                 pass
 
 
-def process_incoming_message(message_data: Dict[str, Any], settings: Settings | None = None) -> None:
+def process_incoming_message(
+    message_data: Dict[str, Any],
+    settings: Settings | None = None,
+    phone_number_id: str | None = None,
+) -> None:
     settings = settings or get_settings()
     store = get_state_store(settings)
 
@@ -486,6 +788,36 @@ def process_incoming_message(message_data: Dict[str, Any], settings: Settings |
     except Exception:
         logger.exception("Falha ao enviar ACK de processamento para %s", formatted_number)
 
+    try:
+        # Catálogo da loja que recebeu a mensagem (multi-loja) ou o padrão
+        snapshot = get_catalog_snapshot(tenant_id=phone_number_id)
+    except Exception:
+        logger.exception("Falha ao carregar catálogo da loja %s", phone_number_id)
+        send_text(formatted_number, "Ocorreu um erro interno. Tente novamente em alguns minutos.", settings)
+        return
+
+    # Coleta as chamadas LLM do job (tokens/latência/custo vão para a sessão e o orçamento)
+    # e fixa uma versão do catálogo: um reload no meio do job não mistura preços/índices
+    with collect_llm_calls(), pin_catalog_snapshot(snapshot):
+        _dispatch_message(
+            message_data=message_data,
+            msg_type=msg_type,
+            wa_id=wa_id,
+            formatted_number=formatted_number,
+            store=store,
+            settings=settings,
+        )
+
+
+def _dispatch_message(
+    *,
+    message_data: Dict[str, Any],
+    msg_type: Any,
+    wa_id: str,
+    formatted_number: str,
+    store: StateStore,
+    settings: Settings,
+) -> None:
     try:
         if msg_type == "text":
             body = (message_data.get("text") or {}).get("body", "")
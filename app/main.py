@@ -27,12 +27,19 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     def _warmup_catalog():
         try:
-            from app.domain.catalog_service import get_catalog_bundle
+            from app.domain.catalog_service import warm_catalog
 
-            get_catalog_bundle(force_refresh=True)
+            warm_catalog()
         except Exception as exc:
             logging.getLogger(__name__).warning("Warmup do catálogo falhou: %s", exc)
 
+    @app.on_event("startup")
+    def _listen_catalog_invalidation():
+        from app.domain.catalog_service import start_catalog_invalidation_listener
+
+        if not start_catalog_invalidation_listener():
+            logging.getLogger(__name__).info("Sem Redis: catálogo recarrega só pelo TTL")
+
     return app
 
 
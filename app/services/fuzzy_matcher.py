@@ -0,0 +1,193 @@
+"""
+Índice fuzzy/fonético do vocabulário do catálogo.
+
+Corrige palavras mal transcritas ("cimentu", "tijollo", "simento") para
+palavras que aparecem em algum sinônimo do catálogo, usando symmetric-delete
+(distância de edição limitada) e uma chave fonética simples do português.
+O índice só propõe correções: quem resolve o nome canônico continua sendo o
+índice exato, então um índice fuzzy ainda de uma versão anterior do catálogo
+nunca devolve material que não existe mais.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+MIN_WORD_LEN = 5
+MAX_DISTANCE = 2
+
+# Regras aplicadas em ordem sobre texto minúsculo e sem acentos
+_PHONETIC_RULES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"[cs]h"), "x"),
+    (re.compile(r"lh"), "li"),
+    (re.compile(r"nh"), "ni"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"qu(?=[ei])"), "k"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"q"), "k"),
+    (re.compile(r"[sx]c(?=[ei])"), "s"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"ss"), "S"),
+    (re.compile(r"(.)\1+"), r"\1"),
+    (re.compile(r"(?<=[aeiou])s(?=[aeiou])"), "z"),
+    (re.compile(r"S"), "s"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"z$"), "s"),
+    (re.compile(r"o(?=s?$)"), "u"),
+    (re.compile(r"e(?=s?$)"), "i"),
+    (re.compile(r"l(?=[^aeiou]|$)"), "u"),
+    (re.compile(r"m$"), "n"),
+]
+
+
+def phonetic_key(word: str) -> str:
+    """Chave fonética do português ("simento" e "cimento" -> "simentu")."""
+    key = word
+    for pattern, repl in _PHONETIC_RULES:
+        key = pattern.sub(repl, key)
+    return key
+
+
+def max_distance_for(length: int) -> int:
+    """Distância de edição tolerada para uma palavra desse tamanho."""
+    if length < MIN_WORD_LEN:
+        return 0
+    return 1 if length < 8 else MAX_DISTANCE
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (transposição adjacente), cortando em `limit + 1`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    variants = {word}
+    for removed in range(1, distance + 1):
+        for positions in combinations(range(len(word)), removed):
+            variants.add("".join(ch for i, ch in enumerate(word) if i not in positions))
+    return variants
+
+
+class FuzzyVocabularyIndex:
+    """
+    Vocabulário do catálogo (palavras dos sinônimos) indexado por deleções e
+    por chave fonética. `correct_word` tem LRU na frente.
+    """
+
+    def __init__(
+        self,
+        synonym_index: Sequence[Tuple[str, str]],
+        stopwords: Iterable[str] = (),
+        cache_size: int = 4096,
+    ):
+        self._cache_size = cache_size
+        self.stopwords = frozenset(stopwords)
+        self.vocabulary: Set[str] = set()
+        for synonym, _ in synonym_index:
+            self.vocabulary.update(_WORD_RE.findall(synonym))
+
+        self._deletes: Dict[str, List[str]] = {}
+        self._phonetic: Dict[str, List[str]] = {}
+        for word in self.vocabulary:
+            if len(word) < MIN_WORD_LEN - 1:
+                continue
+            self._phonetic.setdefault(phonetic_key(word), []).append(word)
+            for variant in _deletes(word, max_distance_for(len(word))):
+                self._deletes.setdefault(variant, []).append(word)
+        self.correct_word = lru_cache(maxsize=cache_size)(self._correct_word)
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def approx_bytes(self) -> int:
+        entries = len(self._deletes) + sum(len(words) for words in self._deletes.values())
+        return 100 * (entries + len(self._phonetic) + len(self.vocabulary))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("correct_word", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.correct_word = lru_cache(maxsize=self._cache_size)(self._correct_word)
+
+    def _correct_word(self, word: str) -> Optional[str]:
+        """Palavra do vocabulário mais próxima de `word`, ou None."""
+        if word in self.vocabulary:
+            return word
+        if len(word) < MIN_WORD_LEN or word in self.stopwords or not word.isalpha():
+            return None
+
+        key = phonetic_key(word)
+        candidates: Set[str] = set(self._phonetic.get(key, ()))
+        for variant in _deletes(word, max_distance_for(len(word))):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best: Optional[Tuple[int, int, str]] = None
+        for candidate in candidates:
+            same_sound = phonetic_key(candidate) == key
+            # Fora da chave fonética, erro de transcrição raramente troca a primeira letra
+            if not same_sound and candidate[0] != word[0]:
+                continue
+            limit = max_distance_for(max(len(candidate), len(word)))
+            distance = edit_distance(word, candidate, limit)
+            if distance > limit and not same_sound:
+                continue
+            # Palavra curta com uma letra trocada ("porta"/"porca") só vale se soar igual
+            if (
+                not same_sound
+                and limit == 1
+                and len(candidate) == len(word)
+                and sorted(candidate) != sorted(word)
+            ):
+                continue
+            rank = (distance, 0 if same_sound else 1, candidate)
+            if best is None or rank < best:
+                best = rank
+        if best is not None:
+            return best[2]
+        if word.endswith("s"):
+            singular = self.correct_word(word[:-1])
+            return singular + "s" if singular else None
+        return None
+
+    def correct_phrase(self, norm: str) -> Optional[str]:
+        """Texto normalizado com as palavras corrigidas; None se nada mudou."""
+        changed = False
+
+        def _replace(match: re.Match) -> str:
+            nonlocal changed
+            word = match.group()
+            corrected = self.correct_word(word)
+            if corrected and corrected != word:
+                changed = True
+                return corrected
+            return word
+
+        corrected_text = _WORD_RE.sub(_replace, norm)
+        return corrected_text if changed else None
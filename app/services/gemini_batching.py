@@ -0,0 +1,184 @@
+"""
+Micro-batching da extração Gemini.
+
+Em horário de pico várias transcrições chegam quase juntas; em vez de uma
+chamada por job, um worker junta os textos por até `window_ms` (ou
+`max_items`) e faz uma única chamada multi-documento. Cada job continua
+bloqueado só no seu próprio `Future`, então a latência extra é limitada à
+janela de batching. O flush roda com o snapshot de catálogo fixado pelo job
+(um lote nunca mistura catálogos de lojas ou versões diferentes).
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import Settings
+from app.domain.catalog_service import CatalogSnapshot, get_catalog_snapshot, pin_catalog_snapshot
+from app.services.gemini_correction import (
+    extract_materials_batch_with_gemini,
+    extract_materials_json_with_gemini,
+)
+from app.services.llm_telemetry import (
+    LLMCall,
+    attach_llm_calls,
+    collect_llm_calls,
+    current_collector,
+)
+
+logger = logging.getLogger(__name__)
+
+BatchExtractFn = Callable[[List[str], Optional[str]], Optional[List[Optional[Dict]]]]
+SingleExtractFn = Callable[[str, Optional[str]], Optional[Dict]]
+
+
+@dataclass
+class _PendingExtraction:
+    text: str
+    model_name: Optional[str] = None
+    collector: Optional[List[LLMCall]] = None
+    snapshot: Optional[CatalogSnapshot] = None  # catálogo do job (prompt e validação)
+    future: Future = field(default_factory=Future)
+
+    @property
+    def batch_key(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        if self.snapshot is None:
+            return self.model_name, None, None
+        return self.model_name, self.snapshot.version, self.snapshot.tenant_id
+
+
+class GeminiExtractionBatcher:
+    """Agrupa pedidos de extração concorrentes e devolve o resultado de cada um."""
+
+    def __init__(
+        self,
+        *,
+        window_ms: int,
+        max_items: int,
+        max_concurrency: int = 4,
+        result_timeout: float = 60.0,
+        extract_batch: BatchExtractFn = extract_materials_batch_with_gemini,
+        extract_single: SingleExtractFn = extract_materials_json_with_gemini,
+    ):
+        self.window_seconds = max(0, window_ms) / 1000.0
+        self.max_items = max(1, max_items)
+        self.result_timeout = result_timeout
+        self._extract_batch = extract_batch
+        self._extract_single = extract_single
+        self._queue: "queue.Queue[_PendingExtraction]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrency),
+            thread_name_prefix="gemini-batch",
+        )
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, transcribed_text: str, model_name: Optional[str] = None) -> Optional[Dict]:
+        """Enfileira a transcrição e bloqueia até o resultado do lote (None em falha)."""
+        self._ensure_worker()
+        pending = _PendingExtraction(
+            transcribed_text,
+            model_name,
+            current_collector(),
+            get_catalog_snapshot(),
+        )
+        self._queue.put(pending)
+        try:
+            return pending.future.result(timeout=self.result_timeout)
+        except Exception as exc:
+            logger.warning("Extração em lote sem resultado: %s", exc)
+            return None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run,
+                name="gemini-batch-collector",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _collect(self) -> List[_PendingExtraction]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # Um prompt por modelo e catálogo: o roteador pode mandar itens do mesmo lote para
+            # modelos diferentes, e cada loja/versão valida contra o próprio catálogo
+            groups: Dict[Tuple[Optional[str], Optional[str], Optional[str]], List[_PendingExtraction]] = {}
+            for pending in batch:
+                groups.setdefault(pending.batch_key, []).append(pending)
+            for group in groups.values():
+                self._executor.submit(self._flush, group)
+
+    def _flush(self, batch: List[_PendingExtraction]) -> None:
+        model_name = batch[0].model_name
+        snapshot = batch[0].snapshot
+        # A thread do executor não herda o contextvar do job: fixa o catálogo dele de novo
+        pinned = pin_catalog_snapshot(snapshot) if snapshot is not None else nullcontext()
+        with pinned, collect_llm_calls() as calls:
+            try:
+                if len(batch) == 1:
+                    results: Optional[List[Optional[Dict]]] = [
+                        self._extract_single(batch[0].text, model_name)
+                    ]
+                else:
+                    logger.info("Gemini: enviando lote com %s transcrições (%s)", len(batch), model_name)
+                    results = self._extract_batch([p.text for p in batch], model_name)
+            except Exception as exc:
+                logger.exception("Falha na extração em lote: %s", exc)
+                results = None
+
+        # Cada job fica com sua fração do custo/tokens do lote
+        for pending in batch:
+            if pending.collector is not None:
+                attach_llm_calls([c.share(1 / len(batch)) for c in calls], pending.collector)
+
+        for index, pending in enumerate(batch):
+            result = results[index] if results and index < len(results) else None
+            pending.future.set_result(result)
+
+
+_batcher: Optional[GeminiExtractionBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_extraction_batcher(settings: Settings) -> GeminiExtractionBatcher:
+    global _batcher
+    if _batcher is not None:
+        return _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = GeminiExtractionBatcher(
+                window_ms=settings.gemini_batch_window_ms,
+                max_items=settings.gemini_batch_max_items,
+                max_concurrency=settings.gemini_batch_max_concurrency,
+                result_timeout=settings.http_timeout_seconds * 2 + settings.gemini_batch_window_ms / 1000.0,
+            )
+        return _batcher
+
+
+def reset_extraction_batcher() -> None:
+    global _batcher
+    _batcher = None
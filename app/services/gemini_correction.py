@@ -1,11 +1,14 @@
 import json
 import os
 import re
+import time
 from typing import Dict, List, Optional
 
 import google.generativeai as genai
 
 from app.domain.catalog_service import get_canonical_names
+from app.services.gemini_router import record_model_outcome
+from app.services.llm_telemetry import record_llm_call
 from app.services.nlp_obras import validate_materials_against_catalog
 
 # Modelo padrão atual (gemini-2.5-flash não está disponível para novas contas)
@@ -29,13 +32,35 @@ def get_gemini_model_name() -> str:
     return os.getenv("GEMINI_MODEL", DEFAULT_GEMINI_MODEL).strip() or DEFAULT_GEMINI_MODEL
 
 
-def get_gemini_model():
-    """Instancia o modelo GenerativeModel configurado."""
-    model_name = get_gemini_model_name()
+def get_gemini_model(model_name: Optional[str] = None):
+    """Instancia o modelo GenerativeModel configurado (ou o escolhido pelo roteador)."""
+    model_name = (model_name or "").strip() or get_gemini_model_name()
     print(f"Usando modelo Gemini: {model_name}")
     return genai.GenerativeModel(model_name)
 
 
+def _generate_content(model, model_name: str, prompt: str, operation: str):
+    """`generate_content` com telemetria (tokens, latência, cache) por chamada."""
+    started = time.perf_counter()
+    try:
+        response = model.generate_content(prompt)
+    except Exception:
+        record_llm_call(
+            model=model_name,
+            operation=operation,
+            latency_seconds=time.perf_counter() - started,
+            ok=False,
+        )
+        raise
+    record_llm_call(
+        model=model_name,
+        operation=operation,
+        latency_seconds=time.perf_counter() - started,
+        response=response,
+    )
+    return response
+
+
 def _extract_json_object(text: str) -> Optional[dict]:
     """Extrai o primeiro objeto JSON da resposta do modelo."""
     cleaned = text.strip()
@@ -70,7 +95,8 @@ def correct_transcription_with_gemini(transcribed_text: str, context: str = "obr
 
     try:
         genai.configure(api_key=api_key)
-        model = get_gemini_model()
+        model_name = get_gemini_model_name()
+        model = get_gemini_model(model_name)
 
         prompt = f"""
 Você é um especialista em construção civil e análise de transcrições de áudio.
@@ -87,7 +113,7 @@ INSTRUÇÕES:
 
         print("Enviando texto para correção com Gemini...")
         print(f"Texto original: {transcribed_text}")
-        response = model.generate_content(prompt)
+        response = _generate_content(model, model_name, prompt, "correction")
 
         if response and response.text:
             corrected_text = response.text.strip()
@@ -101,7 +127,112 @@ INSTRUÇÕES:
         return None
 
 
-def extract_materials_json_with_gemini(transcribed_text: str) -> Optional[Dict]:
+EXTRACTION_RULES = """Regras:
+1. Retorne APENAS JSON válido, sem markdown e sem comentários
+2. quantidade deve ser número (ex.: 3, não "três")
+3. unidade em minúsculas (saco, sacos, m, m2, unidade, etc.)
+4. Se o material não estiver no catálogo, omita-o
+5. Não invente materiais que não estejam no texto"""
+
+EXTRACTION_ITEM_FORMAT = """{
+  "tipo_obra": "obra|casa|reforma|apartamento|comercial|construção",
+  "texto_corrigido": "versão limpa do texto",
+  "materiais": [
+    {"material": "cimento", "quantidade": 3, "unidade": "sacos"}
+  ]
+}"""
+
+EXTRACTION_BATCH_ITEM_FORMAT = """{
+  "indice": 0,
+  "tipo_obra": "obra|casa|reforma|apartamento|comercial|construção",
+  "texto_corrigido": "versão limpa do texto",
+  "materiais": [
+    {"material": "cimento", "quantidade": 3, "unidade": "sacos"}
+  ]
+}"""
+
+
+def build_extraction_prompt(transcribed_text: str, catalog_str: str) -> str:
+    """Prompt de extração para uma única transcrição."""
+    return f"""
+Você extrai materiais de construção de transcrições de áudio de pedreiros.
+
+TEXTO: "{transcribed_text}"
+
+CATÁLOGO OFICIAL (use estes nomes canônicos sempre que possível):
+{catalog_str}
+
+{EXTRACTION_RULES}
+
+Formato:
+{EXTRACTION_ITEM_FORMAT}
+"""
+
+
+def build_batch_extraction_prompt(transcribed_texts: List[str], catalog_str: str) -> str:
+    """Prompt multi-documento: um objeto por texto, na mesma ordem, dentro de um array JSON."""
+    documents = "\n".join(
+        f'[{i}] "{text}"' for i, text in enumerate(transcribed_texts)
+    )
+    return f"""
+Você extrai materiais de construção de transcrições de áudio de pedreiros.
+Cada texto abaixo é um pedido independente de um cliente diferente.
+
+TEXTOS:
+{documents}
+
+CATÁLOGO OFICIAL (use estes nomes canônicos sempre que possível):
+{catalog_str}
+
+{EXTRACTION_RULES}
+6. Retorne um ARRAY JSON com exatamente {len(transcribed_texts)} objetos, na mesma ordem dos textos
+7. Cada objeto deve ter o campo "indice" com o número do texto correspondente
+
+Formato de cada objeto:
+{EXTRACTION_BATCH_ITEM_FORMAT}
+"""
+
+
+def _extract_json_array(text: str) -> Optional[list]:
+    """Extrai o primeiro array JSON da resposta do modelo."""
+    cleaned = text.strip()
+    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"\s*```$", "", cleaned)
+
+    try:
+        data = json.loads(cleaned)
+        if isinstance(data, list):
+            return data
+    except json.JSONDecodeError:
+        pass
+
+    match = re.search(r"\[.*\]", cleaned, flags=re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+        return data if isinstance(data, list) else None
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_extraction_payload(data: dict) -> Dict:
+    """Valida o objeto JSON de extração contra o catálogo e monta o resultado padrão."""
+    validated = validate_materials_against_catalog(data.get("materiais") or [])
+    tipo_obra = str(data.get("tipo_obra") or "obra").strip().lower() or "obra"
+
+    return {
+        "tipo_obra": tipo_obra,
+        "materiais": validated,
+        "texto_corrigido": data.get("texto_corrigido"),
+        "raw": data,
+    }
+
+
+def extract_materials_json_with_gemini(
+    transcribed_text: str,
+    model_name: Optional[str] = None,
+) -> Optional[Dict]:
     """
     Extrai materiais em JSON estruturado e valida contra o catálogo oficial.
 
@@ -119,40 +250,21 @@ def extract_materials_json_with_gemini(transcribed_text: str) -> Optional[Dict]:
 
     catalog = get_canonical_names()
     catalog_str = ", ".join(catalog)
+    model_name = (model_name or "").strip() or get_gemini_model_name()
+    started = time.perf_counter()
 
     try:
         genai.configure(api_key=api_key)
-        model = get_gemini_model()
-
-        prompt = f"""
-Você extrai materiais de construção de transcrições de áudio de pedreiros.
-
-TEXTO: "{transcribed_text}"
+        model = get_gemini_model(model_name)
 
-CATÁLOGO OFICIAL (use estes nomes canônicos sempre que possível):
-{catalog_str}
-
-Regras:
-1. Retorne APENAS JSON válido, sem markdown e sem comentários
-2. quantidade deve ser número (ex.: 3, não "três")
-3. unidade em minúsculas (saco, sacos, m, m2, unidade, etc.)
-4. Se o material não estiver no catálogo, omita-o
-5. Não invente materiais que não estejam no texto
-
-Formato:
-{{
-  "tipo_obra": "obra|casa|reforma|apartamento|comercial|construção",
-  "texto_corrigido": "versão limpa do texto",
-  "materiais": [
-    {{"material": "cimento", "quantidade": 3, "unidade": "sacos"}}
-  ]
-}}
-"""
+        prompt = build_extraction_prompt(transcribed_text, catalog_str)
 
         print("Extraindo materiais em JSON com Gemini...")
-        response = model.generate_content(prompt)
+        response = _generate_content(model, model_name, prompt, "extraction")
+        latency = time.perf_counter() - started
         if not response or not response.text:
             print("Erro: Gemini não retornou JSON de materiais")
+            record_model_outcome(model_name, latency, failed=True)
             return None
 
         raw_text = response.text.strip()
@@ -160,19 +272,90 @@ Formato:
         data = _extract_json_object(raw_text)
         if not data:
             print("Erro: não foi possível parsear JSON do Gemini")
+            record_model_outcome(model_name, latency, failed=True)
             return None
 
-        validated = validate_materials_against_catalog(data.get("materiais") or [])
-        tipo_obra = str(data.get("tipo_obra") or "obra").strip().lower() or "obra"
-
-        return {
-            "tipo_obra": tipo_obra,
-            "materiais": validated,
-            "texto_corrigido": data.get("texto_corrigido"),
-            "raw": data,
-        }
+        result = parse_extraction_payload(data)
+        record_model_outcome(
+            model_name,
+            latency,
+            returned_items=len(data.get("materiais") or []),
+            valid_items=len(result["materiais"]),
+        )
+        return result
     except Exception as e:
         print(f"Erro durante extração JSON com Gemini: {e}")
+        record_model_outcome(model_name, time.perf_counter() - started, failed=True)
+        return None
+
+
+def extract_materials_batch_with_gemini(
+    transcribed_texts: List[str],
+    model_name: Optional[str] = None,
+) -> Optional[List[Optional[Dict]]]:
+    """
+    Extrai materiais de várias transcrições numa única chamada ao Gemini.
+
+    Retorna uma lista alinhada com `transcribed_texts` (None nas posições que o
+    modelo não devolveu ou que vieram inválidas), ou None se a chamada falhar.
+    """
+    if not transcribed_texts:
+        return []
+
+    api_key = get_gemini_credentials()
+    if not api_key:
+        return None
+
+    catalog = get_canonical_names()
+    catalog_str = ", ".join(catalog)
+    model_name = (model_name or "").strip() or get_gemini_model_name()
+    started = time.perf_counter()
+
+    try:
+        genai.configure(api_key=api_key)
+        model = get_gemini_model(model_name)
+
+        prompt = build_batch_extraction_prompt(transcribed_texts, catalog_str)
+
+        print(f"Extraindo materiais em lote com Gemini ({len(transcribed_texts)} textos)...")
+        response = _generate_content(model, model_name, prompt, "extraction_batch")
+        latency = time.perf_counter() - started
+        if not response or not response.text:
+            print("Erro: Gemini não retornou JSON do lote")
+            record_model_outcome(model_name, latency, failed=True)
+            return None
+
+        raw_text = response.text.strip()
+        print(f"Resposta JSON Gemini (lote): {raw_text}")
+        items = _extract_json_array(raw_text)
+        if items is None:
+            print("Erro: não foi possível parsear array JSON do Gemini")
+            record_model_outcome(model_name, latency, failed=True)
+            return None
+
+        results: List[Optional[Dict]] = [None] * len(transcribed_texts)
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.get("indice", position))
+            except (TypeError, ValueError):
+                index = position
+            if 0 <= index < len(results) and results[index] is None:
+                results[index] = parse_extraction_payload(item)
+
+        record_model_outcome(
+            model_name,
+            latency,
+            returned_items=sum(
+                len(item.get("materiais") or []) for item in items if isinstance(item, dict)
+            ),
+            valid_items=sum(len(r["materiais"]) for r in results if r),
+        )
+        return results
+    except Exception as e:
+        print(f"Erro durante extração em lote com Gemini: {e}")
+        record_model_outcome(model_name, time.perf_counter() - started, failed=True)
         return None
 
 
@@ -191,8 +374,9 @@ def get_gemini_status():
 
     try:
         genai.configure(api_key=api_key)
-        model = get_gemini_model()
-        response = model.generate_content("Teste de conectividade")
+        model_name = get_gemini_model_name()
+        model = get_gemini_model(model_name)
+        response = _generate_content(model, model_name, "Teste de conectividade", "status")
         return response is not None and response.text is not None
     except Exception as e:
         print(f"Erro ao verificar status do Gemini: {e}")
@@ -0,0 +1,146 @@
+"""
+Roteamento do modelo Gemini pela complexidade da transcrição.
+
+Transcrições curtas e limpas (poucos materiais, quantidades explícitas) vão
+para o modelo leve (`GEMINI_LIGHT_MODEL`); longas ou ambíguas ficam com o
+modelo completo (`GEMINI_MODEL`). Latência e taxa de acerto por modelo ficam
+em memória para calibrar os limiares.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from app.core.config import Settings
+from app.services.nlp_obras import (
+    extract_materials_and_quantities,
+    normalize_numbers_in_text,
+    normalize_text,
+)
+
+# Marcadores de dúvida/indecisão típicos de áudio ("acho que", "uns", "ou")
+_HEDGE_PATTERN = re.compile(
+    r"\b(?:acho|talvez|sei la|nao sei|mais ou menos|tipo|uns|umas|ou|sera|depende)\b"
+)
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+@dataclass
+class TranscriptComplexity:
+    chars: int
+    candidate_materials: int
+    local_confidence: float
+
+
+@dataclass
+class RoutingDecision:
+    model: str
+    tier: str  # "light" | "full"
+    complexity: TranscriptComplexity
+    reasons: List[str] = field(default_factory=list)
+
+
+def assess_transcript(text: str) -> TranscriptComplexity:
+    """Mede tamanho, materiais candidatos e confiança do NLP local (0..1)."""
+    materials = extract_materials_and_quantities(text)
+    text_norm = normalize_text(normalize_numbers_in_text(text))
+
+    if not materials:
+        confidence = 0.0
+    else:
+        numbers = len(_NUMBER_PATTERN.findall(text_norm))
+        quantified = min(numbers, len(materials)) / len(materials)
+        hedges = len(_HEDGE_PATTERN.findall(text_norm))
+        confidence = max(0.0, quantified - 0.15 * hedges)
+
+    return TranscriptComplexity(
+        chars=len(text.strip()),
+        candidate_materials=len(materials),
+        local_confidence=round(confidence, 3),
+    )
+
+
+def choose_gemini_model(text: str, settings: Settings) -> RoutingDecision:
+    full_model = settings.gemini_model
+    light_model = settings.gemini_light_model.strip()
+    complexity = assess_transcript(text)
+
+    if not light_model:
+        return RoutingDecision(full_model, "full", complexity, ["roteamento desativado"])
+
+    reasons: List[str] = []
+    if complexity.chars > settings.gemini_router_max_chars:
+        reasons.append(f"texto longo ({complexity.chars} caracteres)")
+    if complexity.candidate_materials > settings.gemini_router_max_materials:
+        reasons.append(f"muitos materiais ({complexity.candidate_materials})")
+    if complexity.local_confidence < settings.gemini_router_min_confidence:
+        reasons.append(f"baixa confiança local ({complexity.local_confidence:.2f})")
+
+    if reasons:
+        return RoutingDecision(full_model, "full", complexity, reasons)
+    return RoutingDecision(light_model, "light", complexity, ["transcrição simples"])
+
+
+@dataclass
+class _ModelStats:
+    calls: int = 0
+    failures: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    returned_items: int = 0
+    valid_items: int = 0
+    empty_results: int = 0
+
+
+_STATS: Dict[str, _ModelStats] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def record_model_outcome(
+    model: str,
+    latency_seconds: float,
+    *,
+    returned_items: int = 0,
+    valid_items: int = 0,
+    failed: bool = False,
+) -> None:
+    """
+    Registra uma chamada de extração. A "acurácia" é a fração de itens do modelo
+    que sobreviveu à validação contra o catálogo.
+    """
+    with _STATS_LOCK:
+        stats = _STATS.setdefault(model, _ModelStats())
+        stats.calls += 1
+        stats.total_latency += latency_seconds
+        stats.max_latency = max(stats.max_latency, latency_seconds)
+        if failed:
+            stats.failures += 1
+            return
+        stats.returned_items += returned_items
+        stats.valid_items += valid_items
+        if valid_items == 0:
+            stats.empty_results += 1
+
+
+def get_model_stats() -> Dict[str, Dict[str, Any]]:
+    with _STATS_LOCK:
+        snapshot = {name: _ModelStats(**vars(s)) for name, s in _STATS.items()}
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for name, s in snapshot.items():
+        report[name] = {
+            "calls": s.calls,
+            "failures": s.failures,
+            "avg_latency_ms": round(1000 * s.total_latency / s.calls, 1) if s.calls else None,
+            "max_latency_ms": round(1000 * s.max_latency, 1),
+            "catalog_accuracy": round(s.valid_items / s.returned_items, 3) if s.returned_items else None,
+            "empty_rate": round(s.empty_results / (s.calls - s.failures), 3) if s.calls > s.failures else None,
+        }
+    return report
+
+
+def reset_model_stats() -> None:
+    with _STATS_LOCK:
+        _STATS.clear()
@@ -0,0 +1,172 @@
+"""
+Telemetria por chamada de LLM (tokens, latência, modelo, cache, custo).
+
+Cada chamada vira um `LLMCall`, alimenta as métricas do processo e é anexada
+ao coletor do job corrente (contextvar), para que o uso total do job possa ir
+junto com a sessão e com o orçamento salvo em `budgets.llm_usage`.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.infrastructure import metrics
+
+logger = logging.getLogger(__name__)
+
+_JOB_CALLS: contextvars.ContextVar[Optional[List["LLMCall"]]] = contextvars.ContextVar(
+    "llm_job_calls",
+    default=None,
+)
+
+
+@dataclass(frozen=True)
+class LLMCall:
+    model: str
+    operation: str
+    prompt_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    latency_ms: float
+    cost_usd: float
+    cache_hit: bool
+    ok: bool = True
+
+    def share(self, fraction: float) -> "LLMCall":
+        """Fatia da chamada (ex.: 1/N de um lote multi-documento)."""
+        return replace(
+            self,
+            prompt_tokens=round(self.prompt_tokens * fraction),
+            output_tokens=round(self.output_tokens * fraction),
+            cached_tokens=round(self.cached_tokens * fraction),
+            cost_usd=self.cost_usd * fraction,
+        )
+
+
+def parse_prices(raw: str) -> Dict[str, Tuple[float, float]]:
+    """'modelo=entrada/saida,...' (USD por milhão de tokens) -> {modelo: (entrada, saida)}."""
+    prices: Dict[str, Tuple[float, float]] = {}
+    for chunk in (raw or "").split(","):
+        if "=" not in chunk:
+            continue
+        model, values = chunk.split("=", 1)
+        parts = values.split("/")
+        try:
+            prices[model.strip()] = (float(parts[0]), float(parts[1]) if len(parts) > 1 else 0.0)
+        except ValueError:
+            logger.warning("Preço de modelo inválido em GEMINI_PRICES_PER_MTOK: %s", chunk)
+    return prices
+
+
+def _model_prices(model: str) -> Tuple[float, float]:
+    try:
+        from app.core.config import get_settings
+
+        prices = parse_prices(get_settings().gemini_prices_per_mtok)
+    except Exception:
+        return 0.0, 0.0
+    return prices.get(model, (0.0, 0.0))
+
+
+def usage_from_response(response: Any) -> Tuple[int, int, int]:
+    """(prompt_tokens, output_tokens, cached_tokens) de `response.usage_metadata`."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0, 0
+    return (
+        int(getattr(usage, "prompt_token_count", 0) or 0),
+        int(getattr(usage, "candidates_token_count", 0) or 0),
+        int(getattr(usage, "cached_content_token_count", 0) or 0),
+    )
+
+
+def record_llm_call(
+    *,
+    model: str,
+    operation: str,
+    latency_seconds: float,
+    response: Any = None,
+    ok: bool = True,
+) -> LLMCall:
+    prompt_tokens, output_tokens, cached_tokens = usage_from_response(response)
+    input_price, output_price = _model_prices(model)
+    call = LLMCall(
+        model=model,
+        operation=operation,
+        prompt_tokens=prompt_tokens,
+        output_tokens=output_tokens,
+        cached_tokens=cached_tokens,
+        latency_ms=round(latency_seconds * 1000, 1),
+        cost_usd=(prompt_tokens * input_price + output_tokens * output_price) / 1_000_000,
+        cache_hit=cached_tokens > 0,
+        ok=ok,
+    )
+
+    labels = {"model": model, "operation": operation}
+    metrics.increment("llm_calls_total", cache="hit" if call.cache_hit else "miss", ok=ok, **labels)
+    metrics.increment("llm_prompt_tokens_total", prompt_tokens, **labels)
+    metrics.increment("llm_output_tokens_total", output_tokens, **labels)
+    metrics.increment("llm_cached_tokens_total", cached_tokens, **labels)
+    metrics.increment("llm_cost_usd_total", call.cost_usd, **labels)
+    metrics.observe("llm_latency_ms", call.latency_ms, **labels)
+    logger.info(
+        "LLM %s/%s: %s+%s tokens (cache %s) em %.0f ms",
+        model,
+        operation,
+        prompt_tokens,
+        output_tokens,
+        "hit" if call.cache_hit else "miss",
+        call.latency_ms,
+    )
+
+    attach_llm_calls([call])
+    return call
+
+
+def attach_llm_calls(calls: List[LLMCall], collector: Optional[List[LLMCall]] = None) -> None:
+    """Anexa chamadas ao coletor informado ou ao do job corrente (no-op fora de job)."""
+    target = collector if collector is not None else _JOB_CALLS.get()
+    if target is not None:
+        target.extend(calls)
+
+
+def current_collector() -> Optional[List[LLMCall]]:
+    return _JOB_CALLS.get()
+
+
+@contextmanager
+def collect_llm_calls() -> Iterator[List[LLMCall]]:
+    """Coleta as chamadas feitas dentro do bloco (um job ou um lote)."""
+    calls: List[LLMCall] = []
+    token = _JOB_CALLS.set(calls)
+    try:
+        yield calls
+    finally:
+        _JOB_CALLS.reset(token)
+
+
+def summarize_llm_calls(calls: List[LLMCall]) -> Dict[str, Any]:
+    """Resumo serializável (sessão Redis / coluna jsonb)."""
+    if not calls:
+        return {}
+    return {
+        "calls": len(calls),
+        "prompt_tokens": sum(c.prompt_tokens for c in calls),
+        "output_tokens": sum(c.output_tokens for c in calls),
+        "cached_tokens": sum(c.cached_tokens for c in calls),
+        "latency_ms": round(sum(c.latency_ms for c in calls), 1),
+        "cost_usd": round(sum(c.cost_usd for c in calls), 6),
+        "models": sorted({c.model for c in calls}),
+        "detail": [asdict(c) for c in calls],
+    }
+
+
+def merge_llm_usage(usage: Optional[Dict[str, Any]], calls: List[LLMCall]) -> Dict[str, Any]:
+    """Soma chamadas novas (ex.: edição da lista antes do "SIM") ao resumo já salvo na sessão."""
+    if not calls:
+        return dict(usage or {})
+    previous = [LLMCall(**detail) for detail in (usage or {}).get("detail", [])]
+    return summarize_llm_calls(previous + list(calls))
@@ -1,6 +1,19 @@
+import contextvars
+import hashlib
+import json
 import re
+import threading
 import unicodedata
-from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from app.domain.material_line import MaterialLike, as_material_lines, format_brl, format_decimal
+from app.services.fuzzy_matcher import FuzzyVocabularyIndex
+from app.services.synonym_matcher import CatalogNameIndex, SynonymMatcher
+from app.services.vector_index import VectorIndex
 
 # Catálogo canônico: nome oficial -> sinônimos/variantes
 CATALOGO_MATERIAIS: Dict[str, List[str]] = {
@@ -159,6 +172,8 @@ UNIDADES_MEDIDA = [
     "galoes",
     "baldes",
     "balde",
+    "latas",
+    "lata",
 ]
 
 NUMERO_POR_EXTENSO = {
@@ -206,9 +221,109 @@ NUMERO_POR_EXTENSO = {
     "setecentos": "700",
     "oitocentos": "800",
     "novecentos": "900",
+    "duzentas": "200",
+    "trezentas": "300",
+    "quatrocentas": "400",
+    "quinhentas": "500",
+    "seiscentas": "600",
+    "setecentas": "700",
+    "oitocentas": "800",
+    "novecentas": "900",
     "mil": "1000",
 }
 
+_DECIMAL_RE = re.compile(r"\d+(?:\.\d+)?")
+_HALF_WORDS = {"meio", "meia"}
+_DOZEN_WORDS = {"duzia", "duzias"}
+_NUMERAL_STARTERS = (set(NUMERO_POR_EXTENSO) - {"três"}) | _DOZEN_WORDS
+
+
+def _place_value(component: float) -> float:
+    """Maior componente que pode vir depois (vinte -> e cinco; cento -> e vinte)."""
+    if component >= 1000:
+        return 1000
+    if component >= 100:
+        return 100
+    if 20 <= component < 100:
+        return 10
+    return 1
+
+
+def parse_numeral_words(words: List[str], start: int = 0) -> Optional[Tuple[float, int]]:
+    """
+    Lê um numeral (normalizado, sem acento) a partir de `words[start]`.
+
+    Cobre dezenas+unidades ("vinte e cinco"), centenas ("duzentos e cinquenta"),
+    "mil" ("dois mil e quinhentos"), meios ("dois e meio", "meia") e dúzias
+    ("meia dúzia", "duas dúzias"). O primeiro item pode ser um número em dígitos
+    ("2 mil", "3 e meio"). Retorna (valor, palavras consumidas) ou None.
+    """
+    n = len(words)
+    j = start
+    if j >= n:
+        return None
+
+    first = words[j]
+    if first in _DOZEN_WORDS:
+        value, j = 12.0, j + 1
+        if j + 1 < n and words[j] == "e" and words[j + 1] in _HALF_WORDS:
+            value, j = value + 6, j + 2
+        return value, j - start
+
+    total = 0.0  # milhares já fechados
+    current = 0.0  # parte abaixo de mil
+    last: Optional[float] = None
+    if _DECIMAL_RE.fullmatch(first.replace(",", ".")):
+        current, last, j = float(first.replace(",", ".")), 1.0, j + 1
+    elif first in _HALF_WORDS:
+        current, last, j = 0.5, 1.0, j + 1
+    elif first in NUMERO_POR_EXTENSO:
+        value = float(NUMERO_POR_EXTENSO[first])
+        if value >= 1000:
+            total, last = value, value
+        else:
+            current, last = value, value
+        j += 1
+    else:
+        return None
+
+    half = False
+    while j < n:
+        word = words[j]
+        if word == "mil" and last is not None and last < 1000:
+            total += (current or 1) * 1000
+            current, last, j = 0.0, 1000.0, j + 1
+            continue
+        connector = word == "e"
+        k = j + 1 if connector else j
+        if k >= n:
+            break
+        nxt = words[k]
+        if connector and nxt in _HALF_WORDS:
+            half, j = True, k + 1
+            break
+        if nxt not in NUMERO_POR_EXTENSO or nxt in _HALF_WORDS or nxt == "mil":
+            break
+        value = float(NUMERO_POR_EXTENSO[nxt])
+        # sem "e" só depois de "mil" ("dois mil quinhentos"); o componente deve caber na casa anterior
+        if (not connector and last != 1000) or value >= _place_value(last or 1):
+            break
+        current += value
+        last, j = value, k + 1
+
+    value = total + current + (0.5 if half else 0.0)
+    if j < n and words[j] in _DOZEN_WORDS:
+        value, j = value * 12, j + 1
+        if j + 1 < n and words[j] == "e" and words[j + 1] in _HALF_WORDS:
+            value, j = value + 6, j + 2
+    return value, j - start
+
+
+def format_quantity(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
 
 def strip_accents(text: str) -> str:
     normalized = unicodedata.normalize("NFD", text)
@@ -222,38 +337,263 @@ def normalize_text(text: str) -> str:
     return text
 
 
+_WORD_RE = re.compile(r"\d+(?:[.,]\d+)?|\w+")
+
+
 def normalize_quantity_token(token: str) -> str:
     token = token.strip().lower().replace(",", ".")
     token_norm = strip_accents(token)
     if token_norm in NUMERO_POR_EXTENSO:
         return NUMERO_POR_EXTENSO[token_norm]
-    if re.fullmatch(r"\d+(?:\.\d+)?", token_norm):
+    if _DECIMAL_RE.fullmatch(token_norm):
         if "." in token_norm:
             return token_norm.rstrip("0").rstrip(".") if token_norm.endswith("0") else token_norm
         return str(int(token_norm)) if token_norm.isdigit() else token_norm
+    words = token_norm.split()
+    parsed = parse_numeral_words(words)
+    if parsed and parsed[1] == len(words):
+        return format_quantity(parsed[0])
     return token
 
 
 def normalize_numbers_in_text(text: str) -> str:
-    """Substitui números por extenso por dígitos no texto."""
-    words = sorted(NUMERO_POR_EXTENSO.keys(), key=len, reverse=True)
-    pattern = r"\b(" + "|".join(re.escape(w) for w in words) + r")\b"
+    """Substitui números por extenso (inclusive compostos: "vinte e cinco") por dígitos no texto."""
+    matches = list(_WORD_RE.finditer(text))
+    words = [strip_accents(m.group().lower()) for m in matches]
+    parts: List[str] = []
+    cursor = 0
+    i = 0
+    while i < len(words):
+        parsed = None
+        if words[i] in _NUMERAL_STARTERS or words[i][0].isdigit():
+            parsed = parse_numeral_words(words, i)
+        if not parsed or (parsed[1] == 1 and words[i][0].isdigit()):
+            i += 1
+            continue
+        value, consumed = parsed
+        parts.append(text[cursor:matches[i].start()])
+        parts.append(format_quantity(value))
+        cursor = matches[i + consumed - 1].end()
+        i += consumed
+    parts.append(text[cursor:])
+    return "".join(parts)
+
+
+class TokenKind(str, Enum):
+    NUMBER = "number"
+    UNIT = "unit"
+    MATERIAL = "material"
+    CONNECTOR = "connector"
+    SEPARATOR = "separator"
+    WORD = "word"
+
+
+class Token(NamedTuple):
+    kind: TokenKind
+    start: int
+    end: int
+    value: str  # número normalizado, unidade, nome canônico ou o próprio texto
+
+
+_UNIT_NAMES = sorted({normalize_text(u) for u in UNIDADES_MEDIDA}, key=len, reverse=True)
+_UNIT_NAMES_SET = set(_UNIT_NAMES)
+_CONNECTORS = {"de"}
+# Compilado uma vez: número | unidade (pode colar no número: "10m") | palavra | pontuação
+_LEXER_RE = re.compile(
+    r"(?P<number>\d+(?:[.,]\d+)?)"
+    r"|(?P<unit>(?<![^\W\d_])(?:" + "|".join(re.escape(u) for u in _UNIT_NAMES) + r")(?!\w))"
+    r"|(?P<word>\w+)"
+    r"|(?P<separator>[^\w\s])"
+)
+
+
+def tokenize_quantities(text_norm: str, matchers: Optional["CatalogMatchers"] = None) -> List[Token]:
+    """
+    Tokeniza o texto normalizado numa única passada: números, unidades,
+    materiais (autômato do catálogo), conectores e separadores, em ordem.
+    """
+    matchers = matchers or current_matchers()
+    material_spans = matchers.matcher.find_longest(text_norm)
+    material_spans.sort(key=lambda m: m.start)
+
+    tokens: List[Token] = []
+    span_idx = 0
+    for match in _LEXER_RE.finditer(text_norm):
+        start, end = match.span()
+        while span_idx < len(material_spans) and material_spans[span_idx].end <= start:
+            span = material_spans[span_idx]
+            tokens.append(Token(TokenKind.MATERIAL, span.start, span.end, span.canonical))
+            span_idx += 1
+        if span_idx < len(material_spans) and material_spans[span_idx].start < end:
+            continue  # dentro do nome de um material
+
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "number":
+            tokens.append(Token(TokenKind.NUMBER, start, end, normalize_quantity_token(text)))
+        elif kind == "unit":
+            tokens.append(Token(TokenKind.UNIT, start, end, text))
+        elif kind == "separator":
+            tokens.append(Token(TokenKind.SEPARATOR, start, end, text))
+        elif text in NUMERO_POR_EXTENSO:
+            tokens.append(Token(TokenKind.NUMBER, start, end, NUMERO_POR_EXTENSO[text]))
+        elif text in _CONNECTORS:
+            tokens.append(Token(TokenKind.CONNECTOR, start, end, text))
+        else:
+            tokens.append(Token(TokenKind.WORD, start, end, text))
+    for span in material_spans[span_idx:]:
+        tokens.append(Token(TokenKind.MATERIAL, span.start, span.end, span.canonical))
+
+    tokens = _fuzzy_materials(_collapse_numerals(tokens, text_norm), matchers)
+    return _reclassify_unit_materials(tokens, text_norm)
+
+
+def _half_ends_quantity(tokens: List[Token], k: int, text_norm: str) -> bool:
+    """
+    "UNIDADE e meio" só completa a quantidade anterior se o meio fecha o
+    trecho (fim, pontuação, "e" de outro item ou "de <material>"). "5 sacos e
+    meio metro de areia", "e meia lata", "e meia dúzia" começam outro item.
+    """
+    if k >= len(tokens):
+        return True
+    token = tokens[k]
+    return token.kind in (TokenKind.SEPARATOR, TokenKind.CONNECTOR) or (
+        token.kind == TokenKind.WORD and text_norm[token.start:token.end] == "e"
+    )
+
+
+def _collapse_numerals(tokens: List[Token], text_norm: str) -> List[Token]:
+    """Junta numerais compostos ("vinte e cinco", "meia dúzia", "um metro e meio") num NUMBER."""
+    collapsed: List[Token] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        raw = text_norm[token.start:token.end]
+        if token.kind != TokenKind.NUMBER and raw not in _DOZEN_WORDS:
+            collapsed.append(token)
+            i += 1
+            continue
+
+        j = i
+        while j < len(tokens) and tokens[j].kind in (TokenKind.NUMBER, TokenKind.WORD):
+            j += 1
+        parsed = parse_numeral_words([text_norm[t.start:t.end] for t in tokens[i:j]])
+        if not parsed:
+            collapsed.append(token)
+            i += 1
+            continue
+
+        value, consumed = parsed
+        end = tokens[i + consumed - 1].end
+        i += consumed
+        # número UNIDADE e meio ("um metro e meio", "dois sacos e meio")
+        if (
+            i + 2 < len(tokens)
+            and tokens[i].kind == TokenKind.UNIT
+            and text_norm[tokens[i + 1].start:tokens[i + 1].end] == "e"
+            and text_norm[tokens[i + 2].start:tokens[i + 2].end] in _HALF_WORDS
+            and _half_ends_quantity(tokens, i + 3, text_norm)
+        ):
+            collapsed.append(Token(TokenKind.NUMBER, token.start, end, format_quantity(value + 0.5)))
+            collapsed.append(tokens[i])
+            i += 3
+            continue
+        collapsed.append(Token(TokenKind.NUMBER, token.start, end, format_quantity(value)))
+    return collapsed
+
+
+def _fuzzy_materials(tokens: List[Token], matchers: "CatalogMatchers") -> List[Token]:
+    """Palavras que não casaram com o catálogo: tenta a correção fuzzy/fonética ("simento")."""
+    fuzzy, names = matchers.fuzzy, matchers.name_index
+    result: List[Token] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        corrected = fuzzy.correct_word(token.value) if token.kind == TokenKind.WORD else None
+        if corrected:
+            # nome de duas palavras ("madera tratada")
+            if i + 1 < len(tokens) and tokens[i + 1].kind == TokenKind.WORD:
+                following = tokens[i + 1]
+                pair = f"{corrected} {fuzzy.correct_word(following.value) or following.value}"
+                canonical = names.exact(pair)
+                if canonical:
+                    result.append(Token(TokenKind.MATERIAL, token.start, following.end, canonical))
+                    i += 2
+                    continue
+            canonical = names.exact(corrected)
+            if canonical is None and corrected.endswith("s"):
+                canonical = names.exact(corrected[:-1])
+            if canonical:
+                result.append(Token(TokenKind.MATERIAL, token.start, token.end, canonical))
+                i += 1
+                continue
+        result.append(token)
+        i += 1
+    return result
 
-    def repl(match: re.Match) -> str:
-        return NUMERO_POR_EXTENSO[strip_accents(match.group(1).lower())]
 
-    return re.sub(pattern, repl, text, flags=re.IGNORECASE)
+def _is_unit_text(text: str) -> bool:
+    return text in _UNIT_NAMES_SET or (text.endswith("s") and text[:-1] in _UNIT_NAMES_SET)
 
 
-def get_active_catalog() -> Dict[str, List[str]]:
-    return _RUNTIME_CATALOG or CATALOGO_MATERIAIS
+def _reclassify_unit_materials(tokens: List[Token], text_norm: str) -> List[Token]:
+    """'5 rolos de fio': 'rolos' é unidade (não o material rolo) quando fica entre número e material."""
+    for i, token in enumerate(tokens):
+        if token.kind != TokenKind.MATERIAL or not _is_unit_text(text_norm[token.start:token.end]):
+            continue
+        if i == 0 or tokens[i - 1].kind != TokenKind.NUMBER:
+            continue
+        j = i + 1
+        if j < len(tokens) and tokens[j].kind == TokenKind.CONNECTOR:
+            j += 1
+        if j < len(tokens) and tokens[j].kind == TokenKind.MATERIAL:
+            tokens[i] = Token(TokenKind.UNIT, token.start, token.end, text_norm[token.start:token.end])
+    return tokens
+
+
+def _quantity_for(tokens: List[Token], i: int) -> Tuple[str, str]:
+    """Quantidade/unidade do material na posição i: antes, depois ou número próximo."""
+    # número [unidade] [de] MATERIAL
+    j = i - 1
+    if j >= 0 and tokens[j].kind == TokenKind.CONNECTOR:
+        j -= 1
+    unit = None
+    if j >= 0 and tokens[j].kind == TokenKind.UNIT:
+        unit = tokens[j].value
+        j -= 1
+    if j >= 0 and tokens[j].kind == TokenKind.NUMBER:
+        return tokens[j].value, unit or "unidade"
+
+    # MATERIAL [de] número [unidade]
+    j = i + 1
+    if j < len(tokens) and tokens[j].kind == TokenKind.CONNECTOR:
+        j += 1
+    if j < len(tokens) and tokens[j].kind == TokenKind.NUMBER:
+        unit = None
+        if j + 1 < len(tokens) and tokens[j + 1].kind == TokenKind.UNIT:
+            unit = tokens[j + 1].value
+        return tokens[j].value, unit or "unidade"
+
+    # primeiro número a até 40 caracteres do material
+    material = tokens[i]
+    for token in tokens:
+        if token.kind != TokenKind.NUMBER or token.end <= material.start - 40:
+            continue
+        if token.start >= material.end + 40:
+            break
+        return token.value, "unidade"
+    return "1", "unidade"
+
+
+def get_active_catalog() -> Mapping[str, Sequence[str]]:
+    return current_matchers().catalog
 
 
 def get_catalog_canonical_names() -> List[str]:
     return sorted(get_active_catalog().keys(), key=len, reverse=True)
 
 
-def build_synonym_index(catalog: Optional[Dict[str, List[str]]] = None) -> List[Tuple[str, str]]:
+def build_synonym_index(catalog: Optional[Mapping[str, Sequence[str]]] = None) -> List[Tuple[str, str]]:
     """Lista (sinonimo_normalizado, nome_canonico) ordenada do mais longo para o mais curto."""
     source = catalog or get_active_catalog()
     pairs: List[Tuple[str, str]] = []
@@ -265,34 +605,229 @@ def build_synonym_index(catalog: Optional[Dict[str, List[str]]] = None) -> List[
     return pairs
 
 
-_RUNTIME_CATALOG: Optional[Dict[str, List[str]]] = None
-_SYNONYM_INDEX = build_synonym_index(CATALOGO_MATERIAIS)
+# Palavras comuns na fala que nunca devem virar material por aproximação
+_FUZZY_STOPWORDS = {
+    "preciso", "precisa", "precisamos", "queria", "quero", "tambem", "porque", "obrigado",
+    "obrigada", "orcamento", "material", "materiais", "reforma", "construcao", "quantidade",
+    "favor", "depois", "agora", "entao", "banheiro", "cozinha", "quarto", "parede", "telhado",
+    "bairro", "quadrado", "quadrados",
+}
 
 
-def set_runtime_catalog(catalog: Dict[str, List[str]]) -> None:
-    """Atualiza o catálogo em runtime (ex.: carregado do Supabase)."""
-    global _RUNTIME_CATALOG, _SYNONYM_INDEX
-    _RUNTIME_CATALOG = {k: list(v) for k, v in catalog.items()}
-    _SYNONYM_INDEX = build_synonym_index(_RUNTIME_CATALOG)
+@dataclass(frozen=True)
+class CatalogMatchers:
+    """
+    Índices compilados de uma versão do catálogo. Imutável: um reload monta
+    outro objeto e troca a referência de uma vez, então quem já pegou o
+    anterior (job fixado) segue consistente até o fim, sem lock na leitura.
+    """
 
+    catalog: Mapping[str, Tuple[str, ...]]
+    synonym_index: Tuple[Tuple[str, str], ...]
+    matcher: SynonymMatcher
+    name_index: CatalogNameIndex
+    fuzzy: FuzzyVocabularyIndex
+    vector: Optional[VectorIndex] = None
+    vector_min_score: float = 0.35
+    vector_margin: float = 0.1
+    version: str = "seed"
 
-def match_catalog_name(raw_name: str) -> Optional[str]:
-    """Mapeia um nome livre para o canônico do catálogo, se possível."""
-    norm = normalize_text(raw_name)
-    if not norm:
-        return None
 
-    # 1) Match exato
-    for synonym, canonical in _SYNONYM_INDEX:
-        if norm == synonym:
-            return canonical
+def catalog_fingerprint(catalog: Mapping[str, Sequence[str]]) -> str:
+    payload = json.dumps(sorted((k, sorted(v)) for k, v in catalog.items()), ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
 
-    # 2) Sinônimo aparece como termo completo dentro do nome informado
-    for synonym, canonical in _SYNONYM_INDEX:
-        if re.search(r"(?<!\w)" + re.escape(synonym) + r"(?:s)?(?!\w)", norm):
-            return canonical
 
-    return None
+def build_catalog_matchers(
+    catalog: Mapping[str, Sequence[str]],
+    version: str = "",
+    previous: Optional[CatalogMatchers] = None,
+) -> CatalogMatchers:
+    """
+    Compila autômato e índice de nomes da versão. Os índices derivados (fuzzy,
+    vetorial) vêm do `previous` até serem remontados em background; sem
+    anterior, o fuzzy é montado aqui mesmo.
+    """
+    frozen = MappingProxyType({k: tuple(v) for k, v in catalog.items()})
+    synonym_index = tuple(build_synonym_index(frozen))
+    if previous is not None:
+        fuzzy = previous.fuzzy
+        vector_fields = {
+            "vector": previous.vector,
+            "vector_min_score": previous.vector_min_score,
+            "vector_margin": previous.vector_margin,
+        }
+    else:
+        fuzzy = FuzzyVocabularyIndex(synonym_index, stopwords=_FUZZY_STOPWORDS)
+        vector_fields = {}
+    return CatalogMatchers(
+        catalog=frozen,
+        synonym_index=synonym_index,
+        matcher=SynonymMatcher(synonym_index),
+        name_index=CatalogNameIndex(synonym_index),
+        fuzzy=fuzzy,
+        version=version or catalog_fingerprint(frozen),
+        **vector_fields,
+    )
+
+
+_MATCHERS = build_catalog_matchers(CATALOGO_MATERIAIS, version="seed")
+_PINNED_MATCHERS: contextvars.ContextVar[Optional[CatalogMatchers]] = contextvars.ContextVar(
+    "catalog_matchers",
+    default=None,
+)
+_PUBLISH_LOCK = threading.Lock()
+
+
+def current_matchers() -> CatalogMatchers:
+    """Índices fixados no job corrente ou, fora de job, os últimos publicados."""
+    return _PINNED_MATCHERS.get() or _MATCHERS
+
+
+def published_matchers() -> CatalogMatchers:
+    """Últimos índices publicados (ignora o que o job corrente fixou)."""
+    return _MATCHERS
+
+
+@contextmanager
+def pin_catalog_matchers(matchers: Optional[CatalogMatchers] = None) -> Iterator[CatalogMatchers]:
+    """Fixa uma versão dos índices para o bloco (um job inteiro)."""
+    pinned = matchers or current_matchers()
+    token = _PINNED_MATCHERS.set(pinned)
+    try:
+        yield pinned
+    finally:
+        _PINNED_MATCHERS.reset(token)
+
+
+def publish_catalog_matchers(matchers: CatalogMatchers) -> None:
+    global _MATCHERS
+    with _PUBLISH_LOCK:
+        _MATCHERS = matchers
+
+
+def update_catalog_matchers(version: str, **changes: Any) -> Optional[CatalogMatchers]:
+    """Troca índices derivados (fuzzy, vetorial) se `version` ainda é a publicada."""
+    global _MATCHERS
+    with _PUBLISH_LOCK:
+        if _MATCHERS.version != version:
+            return None
+        _MATCHERS = replace(_MATCHERS, **changes)
+        return _MATCHERS
+
+
+def rebuild_fuzzy_index(
+    matchers: CatalogMatchers,
+    background: bool = True,
+    on_ready: Optional[Callable[[CatalogMatchers], None]] = None,
+) -> Optional[threading.Thread]:
+    """
+    Remonta o índice fuzzy/fonético da versão. Em background, o índice anterior
+    segue atendendo até o novo ficar pronto (as correções são sempre
+    confirmadas no índice exato da mesma versão).
+    """
+
+    def _build() -> None:
+        try:
+            fuzzy = FuzzyVocabularyIndex(matchers.synonym_index, stopwords=_FUZZY_STOPWORDS)
+        except Exception as exc:
+            print(f"[NLP] Falha ao montar índice fuzzy: {exc}")
+            return
+        # Só publica se nenhum catálogo mais novo foi publicado nesse meio tempo
+        updated = update_catalog_matchers(matchers.version, fuzzy=fuzzy)
+        if updated is not None and on_ready is not None:
+            on_ready(updated)
+
+    if not background:
+        _build()
+        return None
+    thread = threading.Thread(target=_build, name="fuzzy-index-rebuild", daemon=True)
+    thread.start()
+    return thread
+
+
+def set_runtime_catalog(
+    catalog: Mapping[str, Sequence[str]],
+    version: str = "",
+    on_ready: Optional[Callable[[CatalogMatchers], None]] = None,
+) -> CatalogMatchers:
+    """Atualiza o catálogo em runtime (ex.: carregado do Supabase) e publica os índices."""
+    previous = _MATCHERS
+    if catalog_fingerprint(catalog) == catalog_fingerprint(previous.catalog):
+        # Nomes e sinônimos iguais (só preço/unidade mudou): nada a recompilar
+        matchers = replace(previous, version=version or previous.version)
+        publish_catalog_matchers(matchers)
+        return matchers
+    matchers = build_catalog_matchers(catalog, version, previous=previous)
+    publish_catalog_matchers(matchers)
+    rebuild_fuzzy_index(matchers, on_ready=on_ready)
+    return matchers
+
+
+# Palavras que não descrevem material (não contam como descrição da frase)
+_VECTOR_STOPWORDS = {
+    "de", "da", "do", "das", "dos", "para", "pra", "pro", "com", "sem", "que", "uns", "umas",
+    "aquele", "aquela", "aqueles", "aquelas", "daquele", "daquela", "daqueles", "daquelas",
+    "esse", "essa", "desse", "dessa", "este", "esta", "deste", "desta", "tipo", "mais",
+    "manda", "mande", "traz", "traga", "coloca", "bota",
+} | _FUZZY_STOPWORDS
+
+
+def set_vector_index(
+    index: Optional[VectorIndex],
+    min_score: float = 0.35,
+    margin: float = 0.1,
+) -> CatalogMatchers:
+    """Publica o índice vetorial junto dos índices atuais (None desliga)."""
+    matchers = replace(_MATCHERS, vector=index, vector_min_score=min_score, vector_margin=margin)
+    publish_catalog_matchers(matchers)
+    return matchers
+
+
+def _descriptive_words(words: List[str]) -> List[str]:
+    return [w for w in words if len(w) >= 3 and w not in _VECTOR_STOPWORDS and not w.isdigit()]
+
+
+def _vector_choice(
+    matchers: CatalogMatchers,
+    hits: List[Tuple[str, float]],
+    current: Optional[str],
+) -> Optional[str]:
+    """
+    Sem material atual, aceita o melhor acima do score mínimo; com material
+    atual (match por termo contido), só troca se o vetor ganhar com folga.
+    """
+    if not hits:
+        return current
+    best, best_score = hits[0]
+    if current is None:
+        return best if best_score >= matchers.vector_min_score else None
+    if best == current or best_score < matchers.vector_min_score:
+        return current
+    # fora do top-K, o score do atual é no máximo o do último hit
+    current_score = dict(hits).get(current, hits[-1][1])
+    return best if best_score - current_score >= matchers.vector_margin else current
+
+
+def match_catalog_name(raw_name: str) -> Optional[str]:
+    """Mapeia um nome livre para o canônico do catálogo, se possível."""
+    # 1) Match exato (dict); 2) sinônimo mais longo contido como termo completo (índice por token)
+    matchers = current_matchers()
+    norm = normalize_text(raw_name)
+    canonical = matchers.name_index.lookup(norm)
+    if canonical is None:
+        # 3) Palavras mal transcritas: correção fuzzy/fonética e nova busca
+        corrected = matchers.fuzzy.correct_phrase(norm)
+        if corrected:
+            canonical = matchers.name_index.lookup(corrected)
+
+    # 4) Descrição livre ("ferro fino de amarrar"): índice vetorial, sem LLM
+    index = matchers.vector
+    if index is not None and matchers.name_index.exact(norm) is None:
+        described = _descriptive_words(_WORD_RE.findall(norm))
+        if canonical is None or len(described) >= 2:
+            canonical = _vector_choice(matchers, index.query(" ".join(described) or norm), canonical)
+    return canonical
 
 
 def dedupe_materials(materials: List[Dict[str, str]]) -> List[Dict[str, str]]:
@@ -318,71 +853,103 @@ def dedupe_materials(materials: List[Dict[str, str]]) -> List[Dict[str, str]]:
 def extract_materials_and_quantities(text: str) -> List[Dict[str, str]]:
     """
     Extrai materiais de construção e quantidades do texto.
-    Normaliza números por extenso e deduplica por nome canônico.
+    Uma passada de tokenização; quantidade/unidade são ligadas ao material por
+    posição. Deduplica por nome canônico, na ordem em que aparecem no texto.
     """
-    normalized_source = normalize_numbers_in_text(text)
-    text_norm = normalize_text(normalized_source)
+    matchers = current_matchers()
+    text_norm = normalize_text(text)
+    tokens = _vector_materials(tokenize_quantities(text_norm, matchers), text_norm, matchers)
     found_materials: List[Dict[str, str]] = []
+    for i, token in enumerate(tokens):
+        if token.kind != TokenKind.MATERIAL:
+            continue
+        quantity, unit = _quantity_for(tokens, i)
+        found_materials.append(
+            {
+                "material": token.value.title(),
+                "quantidade": quantity,
+                "unidade": unit,
+            }
+        )
+    return dedupe_materials(found_materials)
 
-    units_pattern = "|".join(re.escape(normalize_text(u)) for u in sorted(UNIDADES_MEDIDA, key=len, reverse=True))
-    quantity_token = r"(\d+(?:[.,]\d+)?)"
 
-    seen_spans = []
+def _split_clauses(tokens: List[Token]) -> List[Tuple[int, int]]:
+    """Intervalos [início, fim) de tokens separados por pontuação ou "e"."""
+    clauses: List[Tuple[int, int]] = []
+    start = 0
+    for i, token in enumerate(tokens):
+        if token.kind == TokenKind.SEPARATOR or (token.kind == TokenKind.WORD and token.value == "e"):
+            if i > start:
+                clauses.append((start, i))
+            start = i + 1
+    if start < len(tokens):
+        clauses.append((start, len(tokens)))
+    return clauses
 
-    for synonym, canonical in _SYNONYM_INDEX:
-        material_pattern = r"(?<!\w)" + re.escape(synonym) + r"(?:s)?(?!\w)"
-        for match in re.finditer(material_pattern, text_norm):
-            start, end = match.span()
-            # Evita overlaps (ex.: pegar "massa" dentro de "massa corrida")
-            if any(not (end <= s or start >= e) for s, e in seen_spans):
-                continue
 
-            window_start = max(0, start - 40)
-            window = text_norm[window_start:end + 40]
-
-            quantity_found = None
-            unit_found = None
-
-            before = re.search(
-                quantity_token + r"\s*(" + units_pattern + r")?\s*(?:de\s+)?" + re.escape(synonym) + r"(?:s)?(?:\b|$)",
-                window,
-            )
-            if before:
-                quantity_found = before.group(1)
-                unit_found = before.group(2) or "unidade"
-            else:
-                after = re.search(
-                    re.escape(synonym) + r"(?:s)?\s*(?:de\s+)?" + quantity_token + r"\s*(" + units_pattern + r")?",
-                    window,
-                )
-                if after:
-                    quantity_found = after.group(1)
-                    unit_found = after.group(2) or "unidade"
-                else:
-                    nearby = re.search(quantity_token, window)
-                    if nearby:
-                        quantity_found = nearby.group(1)
-                        unit_found = "unidade"
-
-            if not quantity_found:
-                quantity_found = "1"
-                unit_found = "unidade"
-
-            found_materials.append(
-                {
-                    "material": canonical.capitalize() if canonical.islower() else canonical.title(),
-                    "quantidade": normalize_quantity_token(quantity_found),
-                    "unidade": unit_found or "unidade",
-                }
-            )
-            seen_spans.append((start, end))
-
-    # Ajuste de capitalização canônica
-    for item in found_materials:
-        canon = match_catalog_name(item["material"]) or item["material"]
-        item["material"] = canon.title()
+def _vector_materials(tokens: List[Token], text_norm: str, matchers: CatalogMatchers) -> List[Token]:
+    """
+    Trechos que o catálogo não cobre: uma quantidade sem material ("3 daquele
+    ferro fino de amarrar") vira o material mais parecido no índice vetorial;
+    um material com descrição que aponta para outro item, com folga, é trocado.
+    Todas as consultas do texto vão numa única multiplicação de matrizes.
+    """
+    index = matchers.vector
+    if index is None:
+        return tokens
+
+    pending: List[Tuple[int, int, Optional[int], str]] = []  # (início, fim, idx do material, frase)
+    for start, end in _split_clauses(tokens):
+        clause = tokens[start:end]
+        material_positions = [start + k for k, t in enumerate(clause) if t.kind == TokenKind.MATERIAL]
+        words = [t.value for t in clause if t.kind == TokenKind.WORD]
+        described = _descriptive_words(words)
+        if not material_positions:
+            has_number = any(t.kind == TokenKind.NUMBER for t in clause)
+            if has_number and described:
+                pending.append((start, end, None, " ".join(described)))
+        elif len(material_positions) == 1 and len(described) >= 2:
+            material = tokens[material_positions[0]]
+            phrase = " ".join([text_norm[material.start:material.end], *described])
+            pending.append((start, end, material_positions[0], phrase))
+    if not pending:
+        return tokens
+
+    hits_per_clause = index.query_many([phrase for *_, phrase in pending])
+    result = list(tokens)
+    replacements: Dict[int, Tuple[int, Token]] = {}  # início -> (fim, token)
+    for (start, end, position, _), hits in zip(pending, hits_per_clause):
+        if position is not None:
+            current = tokens[position]
+            choice = _vector_choice(matchers, hits, current.value)
+            if choice != current.value:
+                result[position] = Token(TokenKind.MATERIAL, current.start, current.end, choice)
+            continue
 
-    return dedupe_materials(found_materials)
+        choice = _vector_choice(matchers, hits, None)
+        word_positions = [
+            k
+            for k in range(start, end)
+            if tokens[k].kind == TokenKind.WORD and _descriptive_words([tokens[k].value])
+        ]
+        first, last = word_positions[0], word_positions[-1]
+        if choice is None or any(tokens[k].kind == TokenKind.NUMBER for k in range(first, last + 1)):
+            continue
+        replacements[first] = (last + 1, Token(TokenKind.MATERIAL, tokens[first].start, tokens[last].end, choice))
+
+    if not replacements:
+        return result
+    merged: List[Token] = []
+    i = 0
+    while i < len(result):
+        if i in replacements:
+            i, token = replacements[i]
+            merged.append(token)
+            continue
+        merged.append(result[i])
+        i += 1
+    return merged
 
 
 def validate_materials_against_catalog(materials: List[Dict]) -> List[Dict[str, str]]:
@@ -434,17 +1001,12 @@ def extract_construction_context(text: str) -> Dict:
     }
 
 
-def format_materials_for_message(materials: List[Dict[str, str]]) -> str:
+def format_materials_for_message(materials: Sequence[MaterialLike]) -> str:
     lines = []
-    for i, material in enumerate(materials, 1):
-        line = f"{i}. {material['quantidade']} {material['unidade']} de {material['material']}"
-        if material.get("preco_total"):
-            try:
-                total = float(str(material["preco_total"]).replace(",", "."))
-                money = f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                line += f" ({money})"
-            except ValueError:
-                pass
+    for i, material in enumerate(as_material_lines(materials), 1):
+        line = f"{i}. {format_decimal(material.quantity)} {material.unit} de {material.material}"
+        if material.priced:
+            line += f" ({format_brl(material.total)})"
         lines.append(line)
     return "\n".join(lines)
 
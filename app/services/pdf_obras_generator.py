@@ -11,10 +11,20 @@ import logging
 import os
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
 from fpdf import FPDF
 
+from app.domain.material_line import (
+    MaterialLike,
+    as_material_lines,
+    format_brl,
+    format_decimal,
+    lines_total,
+    parse_decimal,
+)
+
 logger = logging.getLogger(__name__)
 
 FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
@@ -87,11 +97,9 @@ def branding_from_settings(settings: Any = None) -> Branding:
 
 
 def _money(value: Any) -> str:
-    try:
-        number = float(str(value).replace(",", "."))
-    except (ValueError, TypeError):
-        number = 0.0
-    return f"R$ {number:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    if isinstance(value, (int, float, Decimal)):
+        return format_brl(value)
+    return format_brl(parse_decimal(value, Decimal(0)))
 
 
 class OrcamentoObrasPDF(FPDF):
@@ -193,7 +201,7 @@ class OrcamentoObrasPDF(FPDF):
         self.set_font("DejaVu", "", 8)
         self.cell(0, 6, f"Página {self.page_no()}", 0, 0, "R")
 
-    def add_materials_table(self, materials: List[Dict[str, Any]], obra_type: str = "obra"):
+    def add_materials_table(self, materials: List[MaterialLike], obra_type: str = "obra"):
         b = self.branding
         self.set_font("DejaVu", "B", 13)
         self._text(b.text_color)
@@ -213,8 +221,8 @@ class OrcamentoObrasPDF(FPDF):
         self.cell(col_widths["total"], row_h, "TOTAL", 0, 1, "R", True)
 
         self.set_font("DejaVu", "", 9)
-        for i, material in enumerate(materials):
-            name = str(material.get("material", ""))
+        for i, material in enumerate(as_material_lines(materials)):
+            name = material.material
             fill = i % 2 == 1
             if fill:
                 self._fill(b.row_alt_color)
@@ -248,7 +256,7 @@ class OrcamentoObrasPDF(FPDF):
             self.cell(
                 col_widths["qtd"],
                 line_height,
-                str(material.get("quantidade", "")),
+                format_decimal(material.quantity),
                 0,
                 0,
                 "C",
@@ -257,7 +265,7 @@ class OrcamentoObrasPDF(FPDF):
             self.cell(
                 col_widths["unidade"],
                 line_height,
-                str(material.get("unidade", "")),
+                material.unit,
                 0,
                 0,
                 "C",
@@ -275,7 +283,7 @@ class OrcamentoObrasPDF(FPDF):
             self.cell(
                 col_widths["unitario"],
                 line_height,
-                _money(material.get("preco_unitario", 0)),
+                _money(material.unit_price or 0),
                 0,
                 0,
                 "R",
@@ -284,7 +292,7 @@ class OrcamentoObrasPDF(FPDF):
             self.cell(
                 col_widths["total"],
                 line_height,
-                _money(material.get("preco_total", 0)),
+                _money(material.total),
                 0,
                 1,
                 "R",
@@ -429,7 +437,7 @@ class OrcamentoObrasPDF(FPDF):
 
 
 def create_construction_budget_pdf(
-    materials: List[Dict[str, Any]],
+    materials: List[MaterialLike],
     obra_type: str = "obra",
     output_path: str = None,
     total_amount: float = None,
@@ -441,13 +449,9 @@ def create_construction_budget_pdf(
 
     os.makedirs(os.path.dirname(output_path) or "app/temp", exist_ok=True)
 
+    materials = as_material_lines(materials)
     if total_amount is None:
-        total_amount = 0.0
-        for item in materials:
-            try:
-                total_amount += float(str(item.get("preco_total", "0")).replace(",", "."))
-            except (ValueError, TypeError):
-                pass
+        total_amount = lines_total(materials)
 
     resolved = branding or branding_from_settings()
     pdf = OrcamentoObrasPDF(branding=resolved)
@@ -0,0 +1,161 @@
+"""
+Pré-renderização especulativa do PDF do orçamento.
+
+Quando a lista entra (ou é editada) em AWAITING_CONFIRMATION, o PDF é
+renderizado em background e, opcionalmente, já vai para a mídia da Meta. Se o
+"SIM" chega com a mesma lista na mesma versão do catálogo (mesma chave), o
+envio vira só a mensagem com o `media_id`. Cache por processo, um PDF por
+chat; render descartado (lista editada, cancelada, expirada) conta como
+desperdício em `pdf_speculation_wasted_total`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.core.config import Settings, get_settings
+from app.domain.material_line import MaterialLike, as_material_lines, lines_total, material_lines_to_dicts
+from app.infrastructure import metrics
+from app.services.pdf_obras_generator import create_construction_budget_pdf
+
+logger = logging.getLogger(__name__)
+
+_TEMP_DIR = "app/temp"
+_RENDER_WAIT_SECONDS = 15.0  # "SIM" antes do render terminar: esperar ainda sai mais barato que refazer
+
+
+@dataclass
+class PrerenderedPdf:
+    pdf_path: str
+    total_amount: float
+    media_id: Optional[str] = None  # já enviado para a mídia da Meta
+
+
+@dataclass
+class _Speculation:
+    key: str
+    future: "Future[PrerenderedPdf]"
+    created_at: float
+
+
+_SPECULATIONS: Dict[str, _Speculation] = {}
+_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def budget_pdf_key(materials: List[MaterialLike], obra_type: str, catalog_version: str) -> str:
+    """Hash da lista (quantidades e preços), do tipo de obra e da versão do catálogo."""
+    payload = json.dumps(
+        [material_lines_to_dicts(materials), obra_type, catalog_version],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-speculation")
+    return _EXECUTOR
+
+
+def _render(materials: List[MaterialLike], obra_type: str, upload: bool) -> PrerenderedPdf:
+    os.makedirs(_TEMP_DIR, exist_ok=True)
+    lines = as_material_lines(materials)
+    total_amount = float(lines_total(lines))
+    pdf_path = f"{_TEMP_DIR}/orcamento_obra_{uuid.uuid4()}.pdf"
+    create_construction_budget_pdf(lines, obra_type, pdf_path, total_amount=total_amount)
+    media_id = None
+    if upload:
+        from app.services.whatsapp_api_client import should_use_local_wrapper, upload_pdf_to_whatsapp_media
+
+        if not should_use_local_wrapper():
+            media_id = upload_pdf_to_whatsapp_media(pdf_path)
+    return PrerenderedPdf(pdf_path, total_amount, media_id)
+
+
+def _remove_rendered_file(future: "Future[PrerenderedPdf]") -> None:
+    try:
+        path = future.result().pdf_path
+    except Exception:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _discard(speculation: _Speculation, reason: str) -> None:
+    metrics.increment("pdf_speculation_wasted_total", reason=reason)
+    speculation.future.add_done_callback(_remove_rendered_file)
+
+
+def _purge_expired(max_age_seconds: float) -> None:
+    now = time.monotonic()
+    for wa_id, speculation in list(_SPECULATIONS.items()):
+        if now - speculation.created_at >= max_age_seconds:
+            del _SPECULATIONS[wa_id]
+            _discard(speculation, "expired")
+
+
+def speculate_budget_pdf(
+    wa_id: str,
+    materials: List[MaterialLike],
+    obra_type: str,
+    catalog_version: str,
+    settings: Optional[Settings] = None,
+) -> Optional[str]:
+    """Agenda o render do PDF desta lista (substitui o do chat, se a lista mudou). Retorna a chave."""
+    settings = settings or get_settings()
+    if not settings.pdf_prerender_enabled:
+        return None
+    key = budget_pdf_key(materials, obra_type, catalog_version)
+    upload = settings.pdf_prerender_upload and settings.message_service_normalized == "whatsapp"
+    with _LOCK:
+        _purge_expired(settings.session_ttl_seconds)
+        current = _SPECULATIONS.get(wa_id)
+        if current is not None and current.key == key:
+            return key
+        if current is not None:
+            _discard(current, "replaced")
+        future = _executor().submit(_render, list(materials), obra_type, upload)
+        _SPECULATIONS[wa_id] = _Speculation(key, future, time.monotonic())
+    metrics.increment("pdf_speculation_started_total")
+    return key
+
+
+def take_prerendered_pdf(wa_id: str, key: str) -> Optional[PrerenderedPdf]:
+    """PDF já renderizado para esta chave (hit) ou None (miss); o chamador apaga o arquivo."""
+    with _LOCK:
+        speculation = _SPECULATIONS.pop(wa_id, None)
+    if speculation is None or speculation.key != key:
+        if speculation is not None:
+            _discard(speculation, "stale")
+        metrics.increment("pdf_speculation_total", result="miss")
+        return None
+    try:
+        rendered = speculation.future.result(timeout=_RENDER_WAIT_SECONDS)
+    except Exception as exc:
+        logger.warning("PDF pré-renderizado indisponível para %s: %s", wa_id, exc)
+        _discard(speculation, "failed")
+        metrics.increment("pdf_speculation_total", result="miss")
+        return None
+    metrics.increment("pdf_speculation_total", result="hit")
+    return rendered
+
+
+def discard_speculation(wa_id: str, reason: str = "cancelled") -> None:
+    """Lista cancelada/apagada: o render em andamento não vai ser usado."""
+    with _LOCK:
+        speculation = _SPECULATIONS.pop(wa_id, None)
+    if speculation is not None:
+        _discard(speculation, reason)
@@ -0,0 +1,224 @@
+"""
+Casamento de sinônimos do catálogo em uma única passada (Aho-Corasick).
+
+O autômato é compilado uma vez por versão do catálogo e acha, numa varredura
+do texto normalizado, todas as ocorrências de sinônimos (com plural simples
+em "s") delimitadas como termo completo. A seleção final mantém a regra do
+extrator antigo: sinônimos mais longos primeiro, sem sobreposição.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def is_word_char(ch: str) -> bool:
+    """Equivalente a `\\w` do `re` (Unicode)."""
+    return ch.isalnum() or ch == "_"
+
+
+class SynonymMatch(NamedTuple):
+    start: int
+    end: int
+    rank: int  # posição no índice (menor = sinônimo mais longo)
+    synonym: str
+    canonical: str
+
+
+class SynonymMatcher:
+    """Autômato Aho-Corasick sobre os sinônimos normalizados do catálogo."""
+
+    def __init__(self, synonym_index: Sequence[Tuple[str, str]]):
+        # padrão -> (rank, sinônimo, canônico); "tijolo" também gera "tijolos"
+        patterns: Dict[str, Tuple[int, str, str]] = {}
+        for rank, (synonym, canonical) in enumerate(synonym_index):
+            if not synonym:
+                continue
+            for pattern in (synonym, synonym + "s"):
+                current = patterns.get(pattern)
+                if current is None or rank < current[0]:
+                    patterns[pattern] = (rank, synonym, canonical)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[int] = [-1]  # id do padrão que termina no nó
+        self._output_link: List[int] = [0]  # próximo nó (via fail) que é terminal
+        self._patterns: List[Tuple[int, int, str, str]] = []  # (tamanho, rank, sinônimo, canônico)
+
+        for pattern, (rank, synonym, canonical) in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._terminal.append(-1)
+                    self._output_link.append(0)
+                node = nxt
+            self._terminal[node] = len(self._patterns)
+            self._patterns.append((len(pattern), rank, synonym, canonical))
+
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def approx_bytes(self) -> int:
+        """Memória estimada (medida com tracemalloc: ~280 B por nó, ~100 B por padrão)."""
+        return 280 * len(self._goto) + 100 * len(self._patterns)
+
+    def _build_failure_links(self) -> None:
+        queue: List[int] = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._output_link[child] = (
+                    fail_node if self._terminal[fail_node] >= 0 else self._output_link[fail_node]
+                )
+
+    def find_all(self, text: str) -> List[SynonymMatch]:
+        """Todas as ocorrências delimitadas como termo completo (podem se sobrepor)."""
+        goto = self._goto
+        fail = self._fail
+        terminal = self._terminal
+        output_link = self._output_link
+        patterns = self._patterns
+        text_len = len(text)
+
+        matches: List[SynonymMatch] = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            hit = node if terminal[node] >= 0 else output_link[node]
+            if not hit:
+                continue
+            end = i + 1
+            if end < text_len and is_word_char(text[end]):
+                continue
+            while hit:
+                length, rank, synonym, canonical = patterns[terminal[hit]]
+                start = end - length
+                if start == 0 or not is_word_char(text[start - 1]):
+                    matches.append(SynonymMatch(start, end, rank, synonym, canonical))
+                hit = output_link[hit]
+        return matches
+
+    def find_longest(self, text: str) -> List[SynonymMatch]:
+        """
+        Ocorrências sem sobreposição, priorizando sinônimos mais longos
+        (mesma ordem do extrator por regex: rank do sinônimo, depois posição).
+        """
+        candidates = sorted(self.find_all(text), key=lambda m: (m.rank, m.start))
+        accepted: List[SynonymMatch] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        for match in candidates:
+            pos = bisect_left(starts, match.start)
+            if pos > 0 and ends[pos - 1] > match.start:
+                continue
+            if pos < len(starts) and starts[pos] < match.end:
+                continue
+            starts.insert(pos, match.start)
+            ends.insert(pos, match.end)
+            accepted.append(match)
+        return accepted
+
+
+def contains_term(text: str, term: str) -> bool:
+    """`term` aparece em `text` como termo completo, com plural simples opcional."""
+    text_len = len(text)
+    pos = text.find(term)
+    while pos >= 0:
+        end = pos + len(term)
+        if pos == 0 or not is_word_char(text[pos - 1]):
+            if end < text_len and text[end] == "s":
+                end += 1
+                if end >= text_len or not is_word_char(text[end]):
+                    return True
+                end -= 1
+            if end >= text_len or not is_word_char(text[end]):
+                return True
+        pos = text.find(term, pos + 1)
+    return False
+
+
+class CatalogNameIndex:
+    """
+    Resolve nome livre (já normalizado) -> nome canônico.
+
+    1) dict para match exato; 2) índice invertido pelo primeiro token de cada
+    sinônimo para achar, só entre os candidatos, o sinônimo mais longo contido
+    como termo completo. Um LRU sobre a entrada normalizada fica na frente.
+    """
+
+    def __init__(self, synonym_index: Sequence[Tuple[str, str]], cache_size: int = 4096):
+        self._cache_size = cache_size
+        self._exact: Dict[str, str] = {}
+        self._by_first_token: Dict[str, List[Tuple[int, str, str, bool]]] = {}
+        for rank, (synonym, canonical) in enumerate(synonym_index):
+            if not synonym:
+                continue
+            self._exact.setdefault(synonym, canonical)
+            tokens = _TOKEN_RE.findall(synonym)
+            if not tokens:
+                continue
+            single = len(tokens) == 1
+            self._by_first_token.setdefault(tokens[0], []).append((rank, synonym, canonical, single))
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __getstate__(self):
+        # O LRU não é serializável (snapshot em disco); volta vazio no load
+        state = self.__dict__.copy()
+        state.pop("lookup", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lookup = lru_cache(maxsize=self._cache_size)(self._lookup)
+
+    def approx_bytes(self) -> int:
+        return 130 * len(self._exact)
+
+    def exact(self, norm: str) -> Optional[str]:
+        return self._exact.get(norm)
+
+    def _candidates(self, norm: str):
+        for token in set(_TOKEN_RE.findall(norm)):
+            yield from self._by_first_token.get(token, ())
+            if token.endswith("s"):
+                for candidate in self._by_first_token.get(token[:-1], ()):
+                    if candidate[3]:
+                        yield candidate
+
+    def _lookup(self, norm: str) -> Optional[str]:
+        if not norm:
+            return None
+        exact = self._exact.get(norm)
+        if exact is not None:
+            return exact
+
+        best: Optional[Tuple[int, str]] = None
+        for rank, synonym, canonical, _ in self._candidates(norm):
+            if best is not None and rank >= best[0]:
+                continue
+            if contains_term(norm, synonym):
+                best = (rank, canonical)
+        return best[1] if best else None
@@ -0,0 +1,201 @@
+"""
+Índice vetorial do catálogo (TF-IDF de n-gramas de caracteres e palavras).
+
+Cobre descrições que nenhuma lista de sinônimos prevê ("aquele ferro fino de
+amarrar" -> arame): cada material vira um vetor com nome, sinônimos e
+descrição; a consulta é um produto matriz-vetor (ou matriz-matriz em lote)
+contra a matriz normalizada. Features passam por hashing estável (crc32), então
+a matriz de uma versão do catálogo pode ser gravada em disco e aberta com
+`mmap` por todos os workers. Sem NumPy instalado, o índice fica desligado.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependência opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 4096
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def _hash(feature: str, dim: int) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % dim
+
+
+def text_features(text_norm: str, dim: int) -> Dict[int, int]:
+    """Contagem de features (palavra inteira + trigramas com borda) por bucket."""
+    counts: Dict[int, int] = {}
+    for word in _WORD_RE.findall(text_norm):
+        bucket = _hash("w:" + word, dim)
+        counts[bucket] = counts.get(bucket, 0) + 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            bucket = _hash("c:" + padded[i:i + 3], dim)
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def catalog_version(documents: Mapping[str, str], dim: int) -> str:
+    payload = json.dumps(sorted(documents.items()), ensure_ascii=False) + f"|{dim}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class VectorIndex:
+    """Matriz (materiais x dim) L2-normalizada + idf; nomes na ordem das linhas."""
+
+    def __init__(self, names: Sequence[str], matrix, idf, version: str = ""):
+        self.names = list(names)
+        self.matrix = matrix
+        self.idf = idf
+        self.dim = int(idf.shape[0])
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def approx_bytes(self) -> int:
+        """Memória própria (matriz aberta com mmap fica no page cache, compartilhada)."""
+        own = 0 if isinstance(self.matrix, np.memmap) else self.matrix.nbytes
+        return own + self.idf.nbytes
+
+    @classmethod
+    def build(cls, documents: Mapping[str, str], dim: int = DEFAULT_DIM) -> "VectorIndex":
+        names = list(documents)
+        counts = [text_features(documents[name], dim) for name in names]
+
+        doc_freq = np.zeros(dim, dtype=np.float32)
+        for features in counts:
+            doc_freq[list(features)] += 1
+        idf = np.log((1 + len(names)) / (1 + doc_freq)).astype(np.float32) + 1.0
+
+        matrix = np.zeros((len(names), dim), dtype=np.float32)
+        for row, features in enumerate(counts):
+            for bucket, count in features.items():
+                matrix[row, bucket] = (1 + math.log(count)) * idf[bucket]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        return cls(names, matrix, idf, catalog_version(documents, dim))
+
+    def _vectorize(self, texts: Sequence[str]):
+        queries = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in text_features(text, self.dim).items():
+                queries[row, bucket] = (1 + math.log(count)) * self.idf[bucket]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        return queries / np.where(norms == 0, 1, norms)
+
+    def scores(self, texts: Sequence[str]):
+        """Similaridade de cosseno (consultas x materiais) numa multiplicação só."""
+        return self._vectorize(texts) @ self.matrix.T
+
+    def query_many(self, texts: Sequence[str], top_k: int = 3) -> List[List[Tuple[str, float]]]:
+        if not texts or not self.names:
+            return [[] for _ in texts]
+        all_scores = self.scores(texts)
+        k = min(top_k, len(self.names))
+        results: List[List[Tuple[str, float]]] = []
+        for row in all_scores:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([(self.names[i], float(row[i])) for i in top if row[i] > 0])
+        return results
+
+    def query(self, text: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """Top-K (nome canônico, score) para um texto normalizado."""
+        return self.query_many([text], top_k)[0]
+
+    def save(self, directory: Path) -> None:
+        """Grava a versão em disco (arquivos temporários + rename atômico)."""
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / f"catalog-{self.version}"
+        for suffix, array in (("matrix", self.matrix), ("idf", self.idf)):
+            tmp = base.with_name(f"{base.name}.{suffix}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, base.with_name(f"{base.name}.{suffix}.npy"))
+        tmp = base.with_name(f"{base.name}.names.tmp.json")
+        tmp.write_text(json.dumps(self.names, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, base.with_name(f"{base.name}.names.json"))
+
+    @classmethod
+    def load(cls, directory: Path, version: str) -> Optional["VectorIndex"]:
+        """Abre uma versão gravada com mmap (None se não existir)."""
+        base = directory / f"catalog-{version}"
+        names_path = base.with_name(f"{base.name}.names.json")
+        if not names_path.exists():
+            return None
+        try:
+            names = json.loads(names_path.read_text(encoding="utf-8"))
+            matrix = np.load(base.with_name(f"{base.name}.matrix.npy"), mmap_mode="r")
+            idf = np.load(base.with_name(f"{base.name}.idf.npy"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Índice vetorial em disco ilegível (%s): %s", version, exc)
+            return None
+        return cls(names, matrix, idf, version)
+
+
+def build_documents(
+    catalog: Mapping[str, Sequence[str]],
+    descriptions: Optional[Mapping[str, str]] = None,
+    normalize=lambda text: text,
+) -> Dict[str, str]:
+    """Texto de cada material: nome canônico + sinônimos + descrição."""
+    descriptions = descriptions or {}
+    documents: Dict[str, str] = {}
+    for name, synonyms in catalog.items():
+        parts = [name, *synonyms]
+        if descriptions.get(name):
+            parts.append(descriptions[name])
+        documents[name] = normalize(" ".join(parts))
+    return documents
+
+
+def load_or_build(
+    documents: Mapping[str, str],
+    directory: Optional[Path] = None,
+    dim: int = DEFAULT_DIM,
+) -> Optional[VectorIndex]:
+    """Reaproveita a versão já gravada por outro worker ou monta e grava uma nova."""
+    if np is None:
+        return None
+    version = catalog_version(documents, dim)
+    if directory is not None:
+        cached = VectorIndex.load(directory, version)
+        if cached is not None:
+            return cached
+
+    index = VectorIndex.build(documents, dim)
+    if directory is not None:
+        try:
+            index.save(directory)
+            _remove_stale_versions(directory, version)
+            # Reabre com mmap para compartilhar as páginas com os outros workers
+            return VectorIndex.load(directory, version) or index
+        except OSError as exc:
+            logger.warning("Não foi possível gravar o índice vetorial em %s: %s", directory, exc)
+    return index
+
+
+def _remove_stale_versions(directory: Path, version: str) -> None:
+    for path in directory.glob("catalog-*"):
+        if not path.name.startswith(f"catalog-{version}."):
+            try:
+                path.unlink()
+            except OSError:
+                pass
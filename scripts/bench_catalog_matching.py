@@ -0,0 +1,162 @@
+"""Benchmark do casamento de sinônimos do catálogo (regex por sinônimo vs índices compilados)."""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.services.nlp_obras import build_synonym_index, normalize_text
+from app.services.fuzzy_matcher import FuzzyVocabularyIndex
+from app.services.synonym_matcher import CatalogNameIndex, SynonymMatcher
+
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ra", "se", "ti", "vo", "xa", "ze", "cal", "ter", "mor"]
+BASE_TEXT = (
+    "preciso de 10 sacos de cimento 500 tijolos 20 metros de madeira 5 rolos de fio eletrico "
+    "2 torneiras e uma caixa d agua para a reforma da casa, tambem 3 m de areia media "
+)
+
+
+def synthetic_catalog(size: int, seed: int = 42) -> Dict[str, List[str]]:
+    """Catálogo com ~`size` sinônimos (3 por item)."""
+    rng = random.Random(seed)
+    catalog: Dict[str, List[str]] = {}
+    while sum(len(v) for v in catalog.values()) < size:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if name in catalog:
+            continue
+        catalog[name] = [name, name + " " + rng.choice(SYLLABLES) * 2, name + "s"]
+    return catalog
+
+
+def legacy_find_spans(text_norm: str, index: List[Tuple[str, str]]) -> List[Tuple[int, int, str]]:
+    """Implementação anterior: um regex por sinônimo + checagem O(n²) de sobreposição."""
+    seen_spans: List[Tuple[int, int]] = []
+    found: List[Tuple[int, int, str]] = []
+    for synonym, canonical in index:
+        pattern = r"(?<!\w)" + re.escape(synonym) + r"(?:s)?(?!\w)"
+        for match in re.finditer(pattern, text_norm):
+            start, end = match.span()
+            if any(not (end <= s or start >= e) for s, e in seen_spans):
+                continue
+            found.append((start, end, canonical))
+            seen_spans.append((start, end))
+    return found
+
+
+def legacy_match_name(norm: str, index: List[Tuple[str, str]]):
+    """`match_catalog_name` anterior: varredura exata + um `re.search` por sinônimo."""
+    for synonym, canonical in index:
+        if norm == synonym:
+            return canonical
+    for synonym, canonical in index:
+        if re.search(r"(?<!\w)" + re.escape(synonym) + r"(?:s)?(?!\w)", norm):
+            return canonical
+    return None
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Erro típico de transcrição: letra apagada, duplicada ou transposta."""
+    pos = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("delete", "double", "swap"))
+    if kind == "delete":
+        return word[:pos] + word[pos + 1:]
+    if kind == "double":
+        return word[:pos] + word[pos] + word[pos:]
+    return word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+
+
+def _timeit(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print("extract_materials_and_quantities — busca de sinônimos no texto")
+    print(f"{'sinônimos':>10} {'regex (ms)':>12} {'autômato (ms)':>14} {'build (ms)':>11} {'speedup':>8}")
+    for size in sizes:
+        catalog = synthetic_catalog(size)
+        index = build_synonym_index(catalog)
+        sample = random.Random(size).sample(list(catalog), k=min(8, len(catalog)))
+        text_norm = normalize_text(BASE_TEXT + " ".join(f"{i + 2} {name}" for i, name in enumerate(sample)))
+
+        started = time.perf_counter()
+        matcher = SynonymMatcher(index)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        legacy = sorted(legacy_find_spans(text_norm, index))
+        current = sorted((m.start, m.end, m.canonical) for m in matcher.find_longest(text_norm))
+        assert legacy == current, "autômato divergiu da implementação por regex"
+
+        legacy_ms = _timeit(lambda: legacy_find_spans(text_norm, index), args.repeat)
+        matcher_ms = _timeit(lambda: matcher.find_longest(text_norm), args.repeat)
+        print(
+            f"{len(index):>10} {legacy_ms:>12.2f} {matcher_ms:>14.3f} {build_ms:>11.1f} "
+            f"{legacy_ms / matcher_ms:>7.0f}x"
+        )
+
+    print()
+    print("match_catalog_name — 100 nomes (exatos, contidos e ausentes), sem LRU")
+    print(f"{'sinônimos':>10} {'regex (ms)':>12} {'índice (ms)':>14} {'build (ms)':>11} {'speedup':>8}")
+    for size in sizes:
+        catalog = synthetic_catalog(size)
+        index = build_synonym_index(catalog)
+        rng = random.Random(size)
+        names = list(catalog)
+        queries = (
+            [rng.choice(names) for _ in range(40)]
+            + [f"{rng.randint(1, 50)} sacos de {rng.choice(names)} tipo 2" for _ in range(40)]
+            + [f"material {i} inexistente" for i in range(20)]
+        )
+
+        started = time.perf_counter()
+        name_index = CatalogNameIndex(index)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        expected = [legacy_match_name(q, index) for q in queries]
+        legacy_ms = (time.perf_counter() - started) * 1000
+        assert [name_index.lookup(q) for q in queries] == expected, "índice divergiu do regex"
+
+        index_ms = _timeit(lambda: [name_index._lookup(q) for q in queries], args.repeat)
+        print(
+            f"{len(index):>10} {legacy_ms:>12.2f} {index_ms:>14.3f} {build_ms:>11.1f} "
+            f"{legacy_ms / index_ms:>7.0f}x"
+        )
+
+    print()
+    print("índice fuzzy/fonético — 100 palavras mal transcritas, sem LRU")
+    print(f"{'sinônimos':>10} {'vocabulário':>12} {'build (ms)':>11} {'lookup (µs)':>12} {'acertos':>8}")
+    for size in sizes:
+        catalog = synthetic_catalog(size)
+        index = build_synonym_index(catalog)
+        rng = random.Random(size)
+        targets = [name for name in rng.sample(list(catalog), k=min(100, len(catalog))) if len(name) >= 5]
+        queries = [misspell(name, rng) for name in targets]
+
+        started = time.perf_counter()
+        fuzzy = FuzzyVocabularyIndex(index)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        hits = sum(fuzzy._correct_word(q) == t for q, t in zip(queries, targets))
+        lookup_ms = _timeit(lambda: [fuzzy._correct_word(q) for q in queries], args.repeat)
+        print(
+            f"{len(index):>10} {len(fuzzy):>12} {build_ms:>11.1f} "
+            f"{lookup_ms * 1000 / len(queries):>12.1f} {hits:>4}/{len(queries)}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
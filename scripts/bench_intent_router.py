@@ -0,0 +1,285 @@
+"""Benchmark do roteamento de comandos de texto (cadeia de predicados vs `route_text`)."""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.domain.conversation import Intent, IntentKind, route_text
+
+# Mensagens de texto típicas dos chats (comandos, edições, conversa solta)
+CORPUS: List[str] = [
+    "sim",
+    "Sim!",
+    "SIM.",
+    "ok",
+    "pode gerar",
+    "Gerar PDF",
+    "não",
+    "Não, tá errado",
+    "cancelar",
+    "lista",
+    "ver lista",
+    "remove 2",
+    "remover item 3",
+    "tira cimento",
+    "tirar a areia média",
+    "apaga 5",
+    "excluir item",
+    "qtd 2=10",
+    "quantidade 1 para 5,5",
+    "muda 3 para 2",
+    "item 4 qtd 12",
+    "adiciona 10 saco cimento",
+    "Adicionar 3 m³ de areia média",
+    "inclui 200 tijolos baianos",
+    "último orçamento",
+    "manda de novo o orçamento por favor",
+    "reenviar orçamento",
+    "privacidade",
+    "Política de privacidade?",
+    "lgpd",
+    "apagar meus dados",
+    "quero excluir todos os meus dados",
+    "bom dia",
+    "Boa tarde, tudo bem?",
+    "quanto fica o frete?",
+    "vocês entregam no sábado?",
+    "preciso de 20 sacos de cimento e 3 metros de areia",
+    "obrigado!!",
+    "👍",
+    "",
+]
+
+
+def legacy_normalize_text(text: str) -> str:
+    normalized = re.sub(r"\s+", " ", text.strip().lower())
+    normalized = re.sub(r"[!?.]", "", normalized)
+    return (
+        normalized.replace("á", "a")
+        .replace("ã", "a")
+        .replace("â", "a")
+        .replace("é", "e")
+        .replace("ê", "e")
+        .replace("í", "i")
+        .replace("ó", "o")
+        .replace("ô", "o")
+        .replace("õ", "o")
+        .replace("ú", "u")
+        .replace("ç", "c")
+    )
+
+
+def legacy_is_confirmation_message(text: str) -> bool:
+    normalized = legacy_normalize_text(text)
+    return normalized in {
+        "sim",
+        "s",
+        "ok",
+        "okay",
+        "confirmo",
+        "confirma",
+        "confirmar",
+        "pode",
+        "pode gerar",
+        "gerar",
+        "gerar pdf",
+        "isso",
+        "correto",
+        "certo",
+        "yes",
+        "y",
+    }
+
+
+def legacy_is_cancel_message(text: str) -> bool:
+    normalized = legacy_normalize_text(text)
+    return normalized in {
+        "nao",
+        "não",
+        "n",
+        "cancelar",
+        "cancela",
+        "corrigir",
+        "errado",
+        "refazer",
+    }
+
+
+def legacy_is_last_budget_request(text: str) -> bool:
+    normalized = legacy_normalize_text(text)
+    triggers = {
+        "ultimo orcamento",
+        "manda de novo",
+        "reenviar orcamento",
+        "ultimo pdf",
+        "me manda o ultimo",
+        "enviar ultimo orcamento",
+    }
+    if normalized in triggers:
+        return True
+    return (
+        "ultimo orcamento" in normalized
+        or "reenviar orcamento" in normalized
+        or "manda de novo o orcamento" in normalized
+    )
+
+
+def legacy_is_privacy_policy_request(text: str) -> bool:
+    normalized = legacy_normalize_text(text)
+    return normalized in {
+        "privacidade",
+        "politica de privacidade",
+        "lgpd",
+        "meus dados",
+        "dados pessoais",
+    } or "politica de privacidade" in normalized
+
+
+def legacy_is_delete_data_request(text: str) -> bool:
+    normalized = legacy_normalize_text(text)
+    triggers = {
+        "apagar meus dados",
+        "excluir meus dados",
+        "deletar meus dados",
+        "apagar dados",
+        "excluir dados",
+        "remover meus dados",
+        "quero apagar meus dados",
+    }
+    if normalized in triggers:
+        return True
+    return (
+        ("apagar" in normalized or "excluir" in normalized or "deletar" in normalized)
+        and "dado" in normalized
+    )
+
+
+def legacy_is_show_list_request(text: str) -> bool:
+    normalized = legacy_normalize_text(text)
+    return normalized in {
+        "lista",
+        "mostrar",
+        "mostrar lista",
+        "ver lista",
+        "lista atual",
+        "materiais",
+    }
+
+
+def legacy_parse_remove_item(text: str) -> Optional[Tuple[str, Any]]:
+    """
+    Retorna ('index', int 1-based) ou ('name', str) ou None.
+    Ex.: 'remove 2', 'remover item 3', 'tira cimento'
+    """
+    normalized = legacy_normalize_text(text)
+
+    m = re.match(r"^(?:remover?|tira[r]?|excluir|apaga[r]?)\s+(?:item\s+)?(\d+)$", normalized)
+    if m:
+        return ("index", int(m.group(1)))
+
+    m = re.match(r"^(?:remover?|tira[r]?|excluir|apaga[r]?)\s+(.+)$", normalized)
+    if m:
+        name = m.group(1).strip()
+        if name and name not in {"item", "dado", "dados", "meus dados"}:
+            return ("name", name)
+    return None
+
+
+def legacy_parse_quantity_change(text: str) -> Optional[Tuple[int, str]]:
+    """
+    Retorna (index 1-based, nova_quantidade_str) ou None.
+    Ex.: 'qtd 2=10', 'quantidade 1 para 5', 'muda 3 para 2,5'
+    """
+    normalized = legacy_normalize_text(text)
+    patterns = [
+        r"^(?:qtd|quantidade)\s+(\d+)\s*(?:=|para|:)\s*(\d+(?:[.,]\d+)?)$",
+        r"^(?:muda[r]?)\s+(\d+)\s+para\s+(\d+(?:[.,]\d+)?)$",
+        r"^item\s+(\d+)\s+(?:qtd|quantidade)\s+(\d+(?:[.,]\d+)?)$",
+    ]
+    for pat in patterns:
+        m = re.match(pat, normalized)
+        if m:
+            qty = m.group(2).replace(",", ".")
+            return int(m.group(1)), qty
+    return None
+
+
+def legacy_parse_add_material(text: str) -> Optional[str]:
+    """Retorna o trecho a extrair após 'adiciona ...' ou None."""
+    m = re.match(
+        r"^(?:adiciona[r]?|add|inclui[r]?)\s+(.+)$",
+        text.strip(),
+        flags=re.IGNORECASE,
+    )
+    if m:
+        return m.group(1).strip()
+    return None
+
+
+def legacy_route(text: str) -> Intent:
+    """Cadeia anterior do `_handle_text`: cada predicado normaliza de novo."""
+    if legacy_is_privacy_policy_request(text):
+        return Intent(IntentKind.PRIVACY_POLICY)
+    if legacy_is_delete_data_request(text):
+        return Intent(IntentKind.DELETE_DATA)
+    if legacy_is_last_budget_request(text):
+        return Intent(IntentKind.LAST_BUDGET)
+    if legacy_is_confirmation_message(text):
+        return Intent(IntentKind.CONFIRM)
+    if legacy_is_cancel_message(text):
+        return Intent(IntentKind.CANCEL)
+    if legacy_is_show_list_request(text):
+        return Intent(IntentKind.SHOW_LIST)
+    remove_target = legacy_parse_remove_item(text)
+    if remove_target:
+        return Intent(IntentKind.REMOVE, remove_target=remove_target)
+    quantity_change = legacy_parse_quantity_change(text)
+    if quantity_change:
+        return Intent(IntentKind.QUANTITY, quantity_change=quantity_change)
+    add_text = legacy_parse_add_material(text)
+    if add_text:
+        return Intent(IntentKind.ADD, add_text=add_text)
+    return Intent(IntentKind.UNKNOWN)
+
+
+def _timeit(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200, help="passadas pelo corpus por medição")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for text in CORPUS:
+        assert route_text(text) == legacy_route(text), f"roteador divergiu em {text!r}"
+
+    def _run(route: Callable[[str], Intent]) -> Callable[[], None]:
+        def _loop() -> None:
+            for _ in range(args.rounds):
+                for text in CORPUS:
+                    route(text)
+        return _loop
+
+    messages = args.rounds * len(CORPUS)
+    legacy_s = _timeit(_run(legacy_route), args.repeat)
+    router_s = _timeit(_run(route_text), args.repeat)
+    print(f"{len(CORPUS)} mensagens x {args.rounds} passadas")
+    print(f"{'cadeia (µs/msg)':>16} {'roteador (µs/msg)':>18} {'speedup':>8}")
+    print(
+        f"{legacy_s * 1e6 / messages:>16.2f} {router_s * 1e6 / messages:>18.2f} "
+        f"{legacy_s / router_s:>7.1f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,7 @@
+-- Telemetria de LLM por orçamento (tokens, latência, custo das chamadas Gemini do job)
+-- Execute no SQL Editor do Supabase
+
+alter table public.budgets
+  add column if not exists llm_usage jsonb not null default '{}'::jsonb;
+
+comment on column public.budgets.llm_usage is 'Resumo das chamadas LLM do job: tokens, latência, modelos, custo (USD)';
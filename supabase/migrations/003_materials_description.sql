@@ -0,0 +1,8 @@
+-- Descrição livre do material para o índice vetorial do catálogo (fallback antes do LLM)
+-- Execute no SQL Editor do Supabase
+
+alter table public.materials
+  add column if not exists description text;
+
+comment on column public.materials.description is
+  'Como o cliente descreve o material (ex.: arame -> "ferro fino de amarrar")';
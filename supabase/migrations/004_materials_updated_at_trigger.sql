@@ -0,0 +1,23 @@
+-- Mantém materials.updated_at honesto para o sync incremental do catálogo
+-- (o bot busca só linhas com updated_at novo, inclusive desativadas)
+-- Execute no SQL Editor do Supabase
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at = now();
+  return new;
+end;
+$$;
+
+drop trigger if exists materials_set_updated_at on public.materials;
+
+create trigger materials_set_updated_at
+  before update on public.materials
+  for each row
+  execute function public.set_updated_at();
+
+create index if not exists materials_updated_at_idx
+  on public.materials (updated_at);
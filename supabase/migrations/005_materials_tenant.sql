@@ -0,0 +1,22 @@
+-- Multi-loja: cada loja (phone_number_id do WhatsApp) pode ter catálogo e preços próprios.
+-- tenant_id NULL = catálogo padrão (usado por lojas sem linhas próprias).
+-- Execute no SQL Editor do Supabase e depois ligue CATALOG_TENANTS_ENABLED=true
+
+alter table public.materials
+  add column if not exists tenant_id text;
+
+-- name deixa de ser único sozinho: o mesmo material existe em várias lojas
+alter table public.materials
+  drop constraint if exists materials_name_key;
+
+alter table public.materials
+  drop constraint if exists materials_tenant_name_key;
+
+alter table public.materials
+  add constraint materials_tenant_name_key unique nulls not distinct (tenant_id, name);
+
+create index if not exists materials_tenant_active_idx
+  on public.materials (tenant_id, active);
+
+comment on column public.materials.tenant_id is
+  'phone_number_id da loja no WhatsApp Cloud API; NULL = catálogo padrão';
@@ -0,0 +1,114 @@
+"""Testes dos jobs de áudio: descarte por áudio mais novo e lote (debounce)."""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.infrastructure import metrics
+from app.infrastructure.store import InMemoryStateStore
+from app.jobs import process_message
+
+
+@pytest.fixture
+def audio_env(monkeypatch):
+    metrics.reset_metrics()
+    store = InMemoryStateStore(dedupe_ttl=60, session_ttl=600)
+    sent = []
+    monkeypatch.setattr(process_message, "send_text", lambda number, text, settings: sent.append(text))
+    monkeypatch.setattr(process_message, "download_media", lambda audio_id, path: True)
+    monkeypatch.setattr(process_message, "get_catalog_snapshot", lambda: SimpleNamespace(version="v1"))
+    monkeypatch.setattr(process_message, "speculate_budget_pdf", lambda *args: None)
+    return store, sent
+
+
+def _run_audio(store, settings, audio_id="a1"):
+    process_message._handle_audio(
+        audio_id=audio_id,
+        wa_id="5511",
+        formatted_number="5511",
+        store=store,
+        settings=settings,
+    )
+
+
+def test_newer_audio_discards_in_flight_job(audio_env, monkeypatch):
+    store, sent = audio_env
+
+    def transcribe_while_newer_arrives(path):
+        store.start_audio_job("5511")  # "esquece o anterior, é esse aqui"
+        return "10 sacos de cimento"
+
+    monkeypatch.setattr(process_message, "transcribe_audio", transcribe_while_newer_arrives)
+    monkeypatch.setattr(process_message, "transcribe_audio_gladia", transcribe_while_newer_arrives)
+    monkeypatch.setattr(
+        process_message,
+        "resolve_materials_from_text",
+        lambda text, settings: (_ for _ in ()).throw(AssertionError("extração de job obsoleto")),
+    )
+
+    _run_audio(store, get_settings().model_copy(update={"audio_debounce_seconds": 0}))
+
+    assert sent == []
+    assert store.get_session("5511").materials == []
+    assert metrics.get_counter("audio_jobs_superseded_total", stage="extraction") == 1
+    assert store.current_audio_job("5511").generation == 2
+
+
+def test_burst_of_audios_is_extracted_once(audio_env, monkeypatch):
+    store, sent = audio_env
+    transcripts = {"app/temp/a1.ogg": "10 sacos de cimento", "app/temp/a2.ogg": "e 3 metros de areia"}
+    monkeypatch.setattr(process_message, "transcribe_audio", lambda path: transcripts[path])
+    monkeypatch.setattr(process_message, "transcribe_audio_gladia", lambda path: transcripts[path])
+    extracted = []
+
+    def fake_resolve(text, settings):
+        extracted.append(text)
+        return text, [{"material": "cimento", "quantidade": "10"}], "obra", 0.0
+
+    monkeypatch.setattr(process_message, "resolve_materials_from_text", fake_resolve)
+    settings = get_settings().model_copy(update={"audio_debounce_seconds": 0.3})
+
+    first = threading.Thread(target=_run_audio, args=(store, settings, "a1"))
+    first.start()
+    _run_audio(store, settings, "a2")
+    first.join(timeout=5)
+
+    assert extracted == ["10 sacos de cimento e 3 metros de areia"]
+    assert len(sent) == 1
+    assert metrics.get_counter("audio_notes_coalesced_total") == 1
+
+
+def test_older_audio_finishing_last_closes_the_burst(audio_env, monkeypatch):
+    store, sent = audio_env
+    first_started, release_first = threading.Event(), threading.Event()
+    transcripts = {"app/temp/a1.ogg": "10 sacos de cimento", "app/temp/a2.ogg": "e 3 metros de areia"}
+
+    def slow_first(path):
+        if path == "app/temp/a1.ogg":
+            first_started.set()
+            release_first.wait(timeout=5)
+        return transcripts[path]
+
+    monkeypatch.setattr(process_message, "transcribe_audio", slow_first)
+    monkeypatch.setattr(process_message, "transcribe_audio_gladia", slow_first)
+    extracted = []
+
+    def fake_resolve(text, settings):
+        extracted.append(text)
+        return text, [{"material": "cimento", "quantidade": "10"}], "obra", 0.0
+
+    monkeypatch.setattr(process_message, "resolve_materials_from_text", fake_resolve)
+    settings = get_settings().model_copy(update={"audio_debounce_seconds": 0.3})
+
+    first = threading.Thread(target=_run_audio, args=(store, settings, "a1"))
+    first.start()
+    assert first_started.wait(timeout=5)
+    _run_audio(store, settings, "a2")  # último do lote: não fica esperando a transcrição do a1
+    assert extracted == []
+    release_first.set()
+    first.join(timeout=5)
+
+    assert extracted == ["10 sacos de cimento e 3 metros de areia"]
+    assert len(sent) == 1
+    assert metrics.get_counter("audio_notes_coalesced_total") == 1
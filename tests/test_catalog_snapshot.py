@@ -0,0 +1,684 @@
+"""Testes dos snapshots imutáveis do catálogo."""
+import threading
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.domain import catalog_service
+from app.domain.catalog_service import (
+    enrich_materials_with_prices,
+    get_catalog_snapshot,
+    get_catalog_stats,
+    get_unit_price,
+    pin_catalog_snapshot,
+)
+from app.services import nlp_obras
+from app.services.nlp_obras import extract_materials_and_quantities
+
+
+@pytest.fixture(autouse=True)
+def isolated_snapshot(monkeypatch):
+    previous_snapshot = catalog_service._SNAPSHOT
+    previous_matchers = nlp_obras.published_matchers()
+    monkeypatch.setattr(catalog_service, "_refresh_vector_index", lambda snapshot: None)
+    monkeypatch.setattr(catalog_service, "_REFRESH", catalog_service._RefreshState())
+    monkeypatch.setattr(catalog_service, "get_catalog_stamp", lambda: None)
+    monkeypatch.setattr(catalog_service, "_snapshot_path", lambda: None)
+    monkeypatch.setattr(catalog_service, "_TENANTS", catalog_service._TenantCatalogs())
+    yield
+    catalog_service._SNAPSHOT = previous_snapshot
+    nlp_obras.publish_catalog_matchers(previous_matchers)
+
+
+def _publish(catalog, prices):
+    units = {name: "unidade" for name in catalog}
+    return catalog_service._publish_snapshot(catalog, prices, units, {}, "teste")
+
+
+def test_pinned_job_keeps_its_version_during_reload():
+    old = _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    with pin_catalog_snapshot() as pinned:
+        _publish({"cimento": ["cimento"], "areia": ["areia"]}, {"cimento": 45.0, "areia": 100.0})
+        assert pinned.version == old.version
+        assert get_unit_price("cimento") == 30.0
+        assert [m["material"] for m in extract_materials_and_quantities("2 sacos de cimento e areia")] == [
+            "Cimento"
+        ]
+        assert enrich_materials_with_prices([{"material": "cimento", "quantidade": "2"}])[0][
+            "preco_total"
+        ] == "60.00"
+
+    assert get_unit_price("cimento") == 45.0
+    assert get_catalog_snapshot().matchers.version == get_catalog_snapshot().version
+    assert len(extract_materials_and_quantities("2 sacos de cimento e areia")) == 2
+
+
+def test_readers_never_see_mixed_versions_during_reloads():
+    _publish({"cimento": ["cimento"]}, {"cimento": 1.0})
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            snapshot = get_catalog_snapshot()
+            price = snapshot.prices["cimento"]
+            if snapshot.matchers.version != snapshot.version or len(snapshot.catalog) != int(price):
+                errors.append(snapshot.version)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for size in range(2, 30):
+        catalog = {"cimento": ["cimento"], **{f"item {i}": [f"item {i}"] for i in range(size - 1)}}
+        _publish(catalog, {"cimento": float(size)})
+    stop.set()
+    for t in threads:
+        t.join(timeout=5)
+    assert errors == []
+
+
+def _expire_current():
+    catalog_service._SNAPSHOT = replace(catalog_service._SNAPSHOT, loaded_at=0.0)
+
+
+def _wait_refresh_idle():
+    deadline = time.time() + 5
+    while get_catalog_stats()["refresh_in_flight"] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_expired_snapshot_is_served_while_one_background_refresh_runs(monkeypatch):
+    old = _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    _expire_current()
+    release = threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        release.wait(5)
+        return ({"cimento": ["cimento"]}, {"cimento": 35.0}, {"cimento": "saco"}, {}), None
+
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", slow_load)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(get_catalog_snapshot().version)) for _ in range(8)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert time.perf_counter() - started < 1
+    assert seen == [old.version] * 8
+    assert len(calls) == 1
+
+    release.set()
+    _wait_refresh_idle()
+    assert get_unit_price("cimento") == 35.0
+    assert get_catalog_stats()["source"] == "supabase"
+
+
+def test_failed_refresh_keeps_snapshot_and_backs_off(monkeypatch):
+    old = _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    _expire_current()
+    calls = []
+
+    def failing_load():
+        calls.append(1)
+        raise ConnectionError("supabase fora do ar")
+
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", failing_load)
+    assert get_catalog_snapshot().version == old.version
+    _wait_refresh_idle()
+    assert get_catalog_snapshot().version == old.version
+    _wait_refresh_idle()
+
+    stats = get_catalog_stats()
+    assert len(calls) == 1
+    assert stats["consecutive_failures"] == 1
+    assert "supabase fora do ar" in stats["last_error"]
+    assert stats["retry_in_seconds"] > 0
+
+
+def _stamped(stamp):
+    catalog_service._SNAPSHOT = replace(catalog_service._SNAPSHOT, stamp=stamp, loaded_at=0.0)
+
+
+def test_unchanged_stamp_skips_reload(monkeypatch):
+    old = _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    _stamped("v1")
+    calls = []
+    monkeypatch.setattr(catalog_service, "get_catalog_stamp", lambda: "v1")
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", lambda: calls.append(1))
+
+    get_catalog_snapshot()
+    _wait_refresh_idle()
+
+    assert calls == []
+    assert get_catalog_stats()["stamp_hits"] == 1
+    assert get_catalog_snapshot().version == old.version
+    assert get_catalog_snapshot().loaded_at > 0
+
+
+def test_changed_stamp_reloads(monkeypatch):
+    _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    _stamped("v1")
+    monkeypatch.setattr(catalog_service, "get_catalog_stamp", lambda: "v2")
+    monkeypatch.setattr(
+        catalog_service,
+        "_load_from_supabase",
+        lambda: (({"cimento": ["cimento"]}, {"cimento": 40.0}, {"cimento": "saco"}, {}), None),
+    )
+
+    get_catalog_snapshot()
+    _wait_refresh_idle()
+
+    assert get_unit_price("cimento") == 40.0
+    assert get_catalog_stats()["stamp"] == "v2"
+
+
+def test_invalidation_message_forces_reload_before_ttl(monkeypatch):
+    _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    catalog_service._SNAPSHOT = replace(catalog_service._SNAPSHOT, stamp="v1")
+    monkeypatch.setattr(catalog_service, "get_catalog_stamp", lambda: "v2")
+    monkeypatch.setattr(
+        catalog_service,
+        "_load_from_supabase",
+        lambda: (({"cimento": ["cimento"]}, {"cimento": 50.0}, {"cimento": "saco"}, {}), None),
+    )
+
+    catalog_service._on_catalog_invalidated("v1")  # carimbo já carregado: ignora
+    assert get_catalog_stats()["invalidations"] == 0
+
+    catalog_service._on_catalog_invalidated("v2")
+    _wait_refresh_idle()
+    assert get_unit_price("cimento") == 50.0
+    assert get_catalog_stats()["invalidations"] == 1
+
+
+def _supabase_snapshot(monkeypatch, synced_at="2026-01-01T10:00:00+00:00"):
+    catalog = {"cimento": ["cimento"], "areia": ["areia"]}
+    prices = {"cimento": 30.0, "areia": 100.0}
+    units = {"cimento": "saco", "areia": "m3"}
+    snapshot = catalog_service._publish_snapshot(
+        catalog, prices, units, {}, "supabase", synced_at=synced_at
+    )
+    catalog_service._SNAPSHOT = replace(snapshot, loaded_at=0.0)
+    full_loads = []
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", lambda: full_loads.append(1))
+    return snapshot, full_loads
+
+
+def test_delta_sync_applies_changed_rows_and_deactivations(monkeypatch):
+    old, full_loads = _supabase_snapshot(monkeypatch)
+    queries = []
+
+    def fetch(since=None):
+        queries.append(since)
+        return [
+            {"name": "Cimento", "synonyms": ["cimento"], "unit_price": 32, "default_unit": "saco",
+             "active": True, "updated_at": "2026-01-01T10:05:00+00:00"},
+            {"name": "areia", "synonyms": ["areia"], "unit_price": 100, "default_unit": "m3",
+             "active": False, "updated_at": "2026-01-01T10:06:00.5+00:00"},
+        ]
+
+    monkeypatch.setattr(catalog_service, "_fetch_material_rows", fetch)
+    get_catalog_snapshot()
+    _wait_refresh_idle()
+
+    snapshot = get_catalog_snapshot()
+    assert full_loads == []
+    assert queries == ["2026-01-01T09:59:00+00:00"]  # marca d'água menos a folga
+    assert snapshot.version != old.version
+    assert get_unit_price("cimento") == 32.0
+    assert "areia" not in snapshot.catalog and "areia" not in snapshot.prices
+    assert snapshot.synced_at == "2026-01-01T10:06:00.5+00:00"
+    assert snapshot.full_loaded_at == old.full_loaded_at
+    assert [m["material"] for m in extract_materials_and_quantities("2 sacos de cimento e areia")] == [
+        "Cimento"
+    ]
+    assert get_catalog_stats()["delta_syncs"] == 1
+
+
+def test_price_only_delta_reuses_compiled_matchers(monkeypatch):
+    old, _ = _supabase_snapshot(monkeypatch)
+    rows = [{"name": "cimento", "synonyms": ["cimento"], "unit_price": 31, "default_unit": "saco",
+             "active": True, "updated_at": "2026-01-01T10:05:00+00:00"}]
+    monkeypatch.setattr(catalog_service, "_fetch_material_rows", lambda since=None: rows)
+
+    get_catalog_snapshot()
+    _wait_refresh_idle()
+
+    snapshot = get_catalog_snapshot()
+    assert get_unit_price("cimento") == 31.0
+    assert snapshot.matchers.matcher is old.matchers.matcher
+    assert snapshot.matchers.version == snapshot.version
+
+
+def test_full_reload_after_full_sync_interval(monkeypatch):
+    _supabase_snapshot(monkeypatch)
+    catalog_service._SNAPSHOT = replace(catalog_service._SNAPSHOT, full_loaded_at=0.0)
+    monkeypatch.setattr(
+        catalog_service,
+        "_fetch_material_rows",
+        lambda since=None: pytest.fail("delta não deveria rodar"),
+    )
+    monkeypatch.setattr(
+        catalog_service,
+        "_load_from_supabase",
+        lambda: (
+            ({"cimento": ["cimento"]}, {"cimento": 33.0}, {"cimento": "saco"}, {}),
+            "2026-01-02T00:00:00+00:00",
+        ),
+    )
+
+    get_catalog_snapshot()
+    _wait_refresh_idle()
+
+    snapshot = get_catalog_snapshot()
+    assert get_unit_price("cimento") == 33.0
+    assert snapshot.synced_at == "2026-01-02T00:00:00+00:00"
+    assert snapshot.full_loaded_at > 0
+
+
+class _FakeQuery:
+    def __init__(self, table, count):
+        self.table = table
+        self.count = count
+        self.bounds = (0, 0)
+
+    def eq(self, column, value):
+        return self
+
+    def gte(self, column, value):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        start, end = self.bounds
+        self.table.requests.append(start)
+        data = self.table.rows[start:min(end + 1, start + self.table.caps.get(start, self.table.max_rows))]
+        total = self.table.reported_count or len(self.table.rows)
+        return SimpleNamespace(data=data, count=total if self.count else None)
+
+
+class _FakeTable:
+    def __init__(self, rows, max_rows):
+        self.rows = rows
+        self.max_rows = max_rows  # corte do PostgREST
+        self.reported_count = None
+        self.caps = {}  # offset -> linhas devolvidas (página cortada no meio da carga)
+        self.requests = []
+
+    def select(self, *columns, count=None):
+        return _FakeQuery(self, count)
+
+
+def test_full_load_pages_past_the_postgrest_row_limit(monkeypatch):
+    rows = [
+        {"id": i, "name": f"item {i}", "synonyms": [f"item {i}"], "unit_price": i, "active": True,
+         "updated_at": f"2026-01-01T10:{i % 60:02d}:00+00:00"}
+        for i in range(2500)
+    ]
+    table = _FakeTable(rows, max_rows=1000)
+    client = SimpleNamespace(table=lambda name: table)
+    stream = catalog_service._MaterialRowStream(client, None, page_size=1000, concurrency=3)
+    monkeypatch.setattr(catalog_service, "_fetch_material_rows", lambda since=None: stream)
+
+    (catalog, prices, _, _), synced_at = catalog_service._load_from_supabase()
+
+    assert len(catalog) == 2500
+    assert prices["item 2499"] == 2499.0
+    assert synced_at == "2026-01-01T10:59:00+00:00"
+    assert sorted(table.requests) == [0, 1000, 2000]
+    assert get_catalog_stats()["last_rows"] == 2500
+    assert get_catalog_stats()["last_pages"] == 3
+
+
+def test_page_size_above_server_limit_still_loads_every_row():
+    table = _FakeTable([{"id": i, "name": f"item {i}", "active": True} for i in range(2500)], max_rows=1000)
+    stream = catalog_service._MaterialRowStream(SimpleNamespace(table=lambda name: table), None, 5000, 3)
+
+    assert sorted(row["id"] for row in stream) == list(range(2500))
+    assert stream.rows == 2500
+    assert sorted(table.requests)[:3] == [0, 1000, 2000]
+
+
+def test_page_cut_short_mid_load_is_completed():
+    table = _FakeTable([{"id": i, "name": f"item {i}", "active": True} for i in range(30)], max_rows=1000)
+    table.caps = {10: 4}
+    stream = catalog_service._MaterialRowStream(SimpleNamespace(table=lambda name: table), None, 10, 3)
+
+    assert sorted(row["id"] for row in stream) == list(range(30))
+    assert 14 in table.requests
+
+
+def test_missing_rows_fail_the_load_instead_of_publishing_a_partial_catalog():
+    table = _FakeTable([{"id": i, "name": f"item {i}", "active": True} for i in range(15)], max_rows=1000)
+    table.reported_count = 40
+    stream = catalog_service._MaterialRowStream(SimpleNamespace(table=lambda name: table), None, 10, 3)
+
+    with pytest.raises(RuntimeError, match="15 de 40"):
+        list(stream)
+
+
+def test_tenant_load_does_not_overwrite_default_row_counts(monkeypatch):
+    rows = [{"id": i, "name": f"item {i}", "active": True} for i in range(5)]
+    table = _FakeTable(rows, max_rows=1000)
+    stream = catalog_service._MaterialRowStream(
+        SimpleNamespace(table=lambda name: table), None, 10, 2, tenant_id="loja-1"
+    )
+    monkeypatch.setattr(catalog_service, "_fetch_material_rows", lambda since=None, tenant_id=None: stream)
+
+    (catalog, _, _, _), _ = catalog_service._load_from_supabase("loja-1")
+
+    assert len(catalog) == 5
+    assert (stream.rows, stream.pages) == (5, 1)
+    assert get_catalog_stats()["last_rows"] is None
+    assert get_catalog_stats()["last_pages"] is None
+
+
+def test_stale_count_keeps_paging_until_a_short_page():
+    table = _FakeTable([{"id": i, "name": f"item {i}", "active": True} for i in range(25)], max_rows=1000)
+    table.reported_count = 20  # linhas inseridas depois do count
+    stream = catalog_service._MaterialRowStream(SimpleNamespace(table=lambda name: table), None, 10, 4)
+
+    assert len(list(stream)) == 25
+    assert sorted(table.requests) == [0, 10, 20]
+
+
+def test_disk_snapshot_restores_prices_and_indexes_then_reconciles(monkeypatch, tmp_path):
+    path = tmp_path / "catalog.pickle"
+    monkeypatch.setattr(catalog_service, "_snapshot_path", lambda: path)
+    saved, _ = _supabase_snapshot(monkeypatch)
+    catalog_service._persist_snapshot(saved.version)
+    assert path.exists()
+
+    catalog_service._SNAPSHOT = None
+    nlp_obras.publish_catalog_matchers(nlp_obras.build_catalog_matchers({"prego": ["prego"]}))
+    release = threading.Event()
+
+    def slow_load():
+        release.wait(5)
+        return ({"cimento": ["cimento"]}, {"cimento": 36.0}, {"cimento": "saco"}, {}), None
+
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", slow_load)
+    started = time.perf_counter()
+    restored = catalog_service.warm_catalog()
+
+    assert time.perf_counter() - started < 0.5
+    assert restored.source == "disk"
+    assert restored.version == saved.version
+    assert get_unit_price("areia") == 100.0
+    assert nlp_obras.published_matchers().name_index.lookup("areia") == "areia"
+    assert [m["material"] for m in extract_materials_and_quantities("2 sacos de cimento e areia")] == [
+        "Cimento",
+        "Areia",
+    ]
+
+    release.set()
+    _wait_refresh_idle()
+    assert get_catalog_stats()["source"] == "supabase"
+    assert get_unit_price("cimento") == 36.0
+
+
+def test_corrupt_disk_snapshot_falls_back_to_blocking_load(monkeypatch, tmp_path):
+    path = tmp_path / "catalog.pickle"
+    path.write_bytes(b"nao e pickle")
+    monkeypatch.setattr(catalog_service, "_snapshot_path", lambda: path)
+    monkeypatch.setattr(
+        catalog_service,
+        "_load_from_supabase",
+        lambda: (({"cimento": ["cimento"]}, {"cimento": 37.0}, {"cimento": "saco"}, {}), None),
+    )
+
+    assert catalog_service.warm_catalog().source == "supabase"
+    assert get_unit_price("cimento") == 37.0
+
+
+@pytest.fixture
+def tenants(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "catalog_tenants_enabled", True)
+    monkeypatch.setattr(settings, "vector_index_enabled", False)
+    catalogs = {
+        "loja-a": ({"cimento": ["cimento"]}, {"cimento": 30.0}, {"cimento": "saco"}, {}),
+        "loja-b": ({"cimento": ["cimento"], "areia": ["areia"]}, {"cimento": 50.0, "areia": 90.0},
+                   {"cimento": "saco", "areia": "m3"}, {}),
+    }
+    loads = []
+
+    def load(tenant_id=None):
+        loads.append(tenant_id)
+        if tenant_id is None:
+            return catalogs["loja-a"], None
+        return (catalogs[tenant_id], None) if tenant_id in catalogs else None
+
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", load)
+    _publish({"cimento": ["cimento"], "brita": ["brita"]}, {"cimento": 10.0, "brita": 5.0})
+    return loads
+
+
+def test_each_store_gets_its_own_prices_and_matchers(tenants):
+    with pin_catalog_snapshot(get_catalog_snapshot(tenant_id="loja-b")):
+        assert get_unit_price("cimento") == 50.0
+        materials = extract_materials_and_quantities("2 sacos de cimento e 1 brita e areia")
+        assert [m["material"] for m in materials] == ["Cimento", "Areia"]
+    with pin_catalog_snapshot(get_catalog_snapshot(tenant_id="loja-a")):
+        assert get_unit_price("cimento") == 30.0
+    # Catálogo global intocado
+    assert get_unit_price("cimento") == 10.0
+    assert nlp_obras.published_matchers().name_index.lookup("brita") == "brita"
+
+    get_catalog_snapshot(tenant_id="loja-b")
+    assert tenants == ["loja-b", "loja-a"]  # carregado uma vez por loja
+    assert get_catalog_stats()["tenants"]["hits"] == 1
+
+
+def test_store_without_own_rows_uses_default_catalog(tenants):
+    assert get_catalog_snapshot(tenant_id="loja-nova").prices["cimento"] == 10.0
+    get_catalog_snapshot(tenant_id="loja-nova")
+    assert tenants == ["loja-nova"]
+    assert get_catalog_stats()["tenants"]["own_catalogs"] == 0
+
+
+def test_store_load_failure_falls_back_to_default_and_backs_off(tenants, monkeypatch):
+    attempts = []
+
+    def failing_load(tenant_id=None):
+        attempts.append(tenant_id)
+        raise RuntimeError("supabase fora")
+
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", failing_load)
+
+    assert get_catalog_snapshot(tenant_id="loja-a").prices["cimento"] == 10.0
+    assert get_catalog_snapshot(tenant_id="loja-a").prices["cimento"] == 10.0
+    assert attempts == ["loja-a"]  # a segunda mensagem não espera outra carga que vai falhar
+    assert get_catalog_stats()["tenants"]["load_failures"] == 1
+    assert get_catalog_stats()["tenants"]["backing_off"] == 1
+
+    catalog_service._TENANTS._failures["loja-a"] = (1, 0.0)  # backoff vencido
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", lambda tenant_id=None: (
+        ({"cimento": ["cimento"]}, {"cimento": 30.0}, {"cimento": "saco"}, {}), None
+    ))
+    assert get_catalog_snapshot(tenant_id="loja-a").prices["cimento"] == 30.0
+    assert get_catalog_stats()["tenants"]["backing_off"] == 0
+
+
+def test_tenant_lru_evicts_by_count_and_memory(tenants, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "catalog_tenant_cache_size", 1)
+    get_catalog_snapshot(tenant_id="loja-a")
+    get_catalog_snapshot(tenant_id="loja-b")
+    stats = get_catalog_stats()["tenants"]
+    assert stats["entries"] == 1 and stats["evictions"] == 1
+
+    monkeypatch.setattr(settings, "catalog_tenant_cache_size", 10)
+    monkeypatch.setattr(settings, "catalog_tenant_cache_mb", 0.001)
+    get_catalog_snapshot(tenant_id="loja-a")
+    stats = get_catalog_stats()["tenants"]
+    assert stats["entries"] == 1 and stats["evictions"] == 2
+    assert catalog_service.approx_snapshot_bytes(get_catalog_snapshot(tenant_id="loja-a")) > 1000
+
+
+def test_tenant_ignored_when_multi_store_is_off(tenants, monkeypatch):
+    monkeypatch.setattr(get_settings(), "catalog_tenants_enabled", False)
+    assert get_catalog_snapshot(tenant_id="loja-b").prices["cimento"] == 10.0
+    assert tenants == []
+
+
+def test_price_index_matches_accents_synonyms_and_plural():
+    _publish(
+        {"vergalhão 10mm": ["vergalhao 10mm", "ferro 10"], "cimento": ["cimento", "saco de cimento"]},
+        {"vergalhão 10mm": 42.5, "cimento": 30.0},
+    )
+    assert get_unit_price("Vergalhao 10MM") == 42.5
+    assert get_unit_price("ferro 10") == 42.5
+    assert get_unit_price("Cimentos") == 30.0
+    assert catalog_service.get_unit_prices(["cimento", "saco de cimento", "vergalhão 10mm"]) == [
+        30.0,
+        30.0,
+        42.5,
+    ]
+
+
+def test_unpriced_materials_are_counted(monkeypatch):
+    monkeypatch.setattr(catalog_service, "_PRICE_MISSES", catalog_service.Counter())
+    _publish({"cimento": ["cimento"], "brinde": ["brinde"]}, {"cimento": 30.0, "brinde": 0.0})
+
+    enriched = enrich_materials_with_prices(
+        [{"material": "Cimento", "quantidade": "2"}, {"material": "Caçamba", "quantidade": "1"},
+         {"material": "caçamba", "quantidade": "1"}, {"material": "brinde", "quantidade": "1"}]
+    )
+
+    assert [item["preco_total"] for item in enriched] == ["60.00", "0.00", "0.00", "0.00"]
+    assert get_catalog_stats()["top_unpriced"] == [("cacamba", 2), ("brinde", 1)]
+
+
+def test_session_reprices_only_when_catalog_version_changes(monkeypatch):
+    from app.domain.conversation import ConversationSession
+    from app.jobs import process_message
+
+    first = _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    calls = []
+    real_enrich = process_message.enrich_materials_with_prices
+
+    def counting_enrich(materials, snapshot=None):
+        calls.append(len(materials))
+        return real_enrich(materials, snapshot)
+
+    monkeypatch.setattr(process_message, "enrich_materials_with_prices", counting_enrich)
+    session = ConversationSession(
+        materials=enrich_materials_with_prices([{"material": "cimento", "quantidade": "2"}]),
+        catalog_version=first.version,
+    )
+    session.change_quantity(1, "3")
+    assert process_message.ensure_session_prices(session) is False
+    assert calls == []
+    assert str(session.subtotal) == "90.00"
+
+    second = _publish({"cimento": ["cimento"]}, {"cimento": 40.0})
+    assert process_message.ensure_session_prices(session) is True
+    assert calls == [1]
+    assert session.catalog_version == second.version
+    assert str(session.subtotal) == "120.00"
+
+
+def test_edit_batch_applies_all_or_nothing(monkeypatch):
+    from app.domain.conversation import ConversationSession, ConversationState, route_edit_commands
+    from app.infrastructure.store import InMemoryStateStore
+    from app.jobs import process_message
+
+    snapshot = _publish(
+        {name: [name] for name in ("cimento", "areia", "brita", "cal")},
+        {"cimento": 30.0, "areia": 100.0, "brita": 80.0, "cal": 10.0},
+    )
+    monkeypatch.setattr(process_message, "speculate_budget_pdf", lambda *args: None)
+    sent = []
+    monkeypatch.setattr(process_message, "send_text", lambda number, text, settings: sent.append(text))
+    store = InMemoryStateStore(dedupe_ttl=60, session_ttl=600)
+    store.save_session("5511", ConversationSession(
+        state=ConversationState.AWAITING_CONFIRMATION,
+        materials=enrich_materials_with_prices([
+            {"material": name, "quantidade": "1"} for name in ("cimento", "areia", "brita")
+        ]),
+        catalog_version=snapshot.version,
+    ))
+
+    def run(body):
+        process_message._handle_edit_batch(
+            intents=route_edit_commands(body),
+            session=store.get_session("5511"),
+            wa_id="5511",
+            formatted_number="5511",
+            store=store,
+            settings=None,
+        )
+        return store.get_session("5511")
+
+    untouched = run("remove 1; qtd 9=2")
+    assert [m.material for m in untouched.materials] == ["cimento", "areia", "brita"]
+    assert "Nada foi alterado" in sent[-1]
+
+    session = run("remove 1, 2; qtd 3=4")
+    assert [(m.material, str(m.quantity)) for m in session.materials] == [("brita", "4")]
+    assert str(session.subtotal) == "320.00"
+    assert len(sent) == 2
+
+
+def test_typed_list_becomes_budget_without_llm(monkeypatch):
+    from app.domain import materials as materials_module
+    from app.domain.conversation import ConversationState
+    from app.infrastructure.store import InMemoryStateStore
+    from app.jobs import process_message
+
+    _publish({"cimento": ["cimento"], "areia": ["areia"]}, {"cimento": 30.0, "areia": 100.0})
+    monkeypatch.setattr(
+        materials_module,
+        "resolve_materials_from_text",
+        lambda text, settings: (_ for _ in ()).throw(AssertionError("lista digitada foi para o LLM")),
+    )
+    monkeypatch.setattr(process_message, "speculate_budget_pdf", lambda *args: None)
+    sent = []
+    monkeypatch.setattr(process_message, "send_text", lambda number, text, settings: sent.append(text))
+    store = InMemoryStateStore(dedupe_ttl=60, session_ttl=600)
+
+    def handle(body):
+        process_message._handle_text(
+            body=body, wa_id="5511", formatted_number="5511", store=store, settings=get_settings()
+        )
+
+    handle("tem cimento?")
+    assert store.get_session("5511").state is ConversationState.AWAITING_AUDIO
+    handle("10 sacos cimento, 3 m areia")
+    session = store.get_session("5511")
+    assert session.state is ConversationState.AWAITING_CONFIRMATION
+    assert [(m.material, str(m.quantity)) for m in session.materials] == [("Cimento", "10"), ("Areia", "3")]
+    assert str(session.subtotal) == "600.00"
+    assert "Identifiquei estes materiais" in sent[-1]
+
+
+def test_typed_small_talk_with_numbers_never_reaches_llm(monkeypatch):
+    from app.domain import materials as materials_module
+
+    _publish({"cimento": ["cimento"]}, {"cimento": 30.0})
+    escalated = []
+
+    def fake_resolve(text, settings):
+        escalated.append(text)
+        return text, [], "obra", 0.0
+
+    monkeypatch.setattr(materials_module, "resolve_materials_from_text", fake_resolve)
+
+    assert materials_module.resolve_materials_from_typed_text("tenho 2 filhos", get_settings()) is None
+    assert materials_module.resolve_materials_from_typed_text("te ligo às 3", get_settings()) is None
+    assert escalated == []
+    materials_module.resolve_materials_from_typed_text("10 sacos de porcelanato", get_settings())
+    assert escalated == ["10 sacos de porcelanato"]
@@ -1,5 +1,10 @@
 """Testes unitários dos parsers de edição de lista (Sprint 3)."""
+from decimal import Decimal
+
 from app.domain.conversation import (
+    ConversationSession,
+    Intent,
+    IntentKind,
     apply_quantity_change,
     apply_remove_material,
     is_delete_data_request,
@@ -7,7 +12,10 @@ from app.domain.conversation import (
     parse_add_material,
     parse_quantity_change,
     parse_remove_item,
+    route_edit_commands,
+    route_text,
 )
+from app.domain.material_line import MaterialLine, lines_total
 
 
 def test_parse_remove_by_index():
@@ -46,3 +54,68 @@ def test_lgpd_triggers():
     assert is_privacy_policy_request("privacidade")
     assert is_delete_data_request("apagar meus dados")
     assert is_delete_data_request("excluir dados")
+
+
+def test_session_edits_keep_subtotal_incrementally():
+    session = ConversationSession(
+        materials=[
+            {"material": "cimento", "quantidade": "2", "unidade": "saco", "preco_unitario": "30.00"},
+            {"material": "areia", "quantidade": "1", "unidade": "m3", "preco_unitario": "100.00"},
+        ],
+        catalog_version="v1",
+    )
+    assert session.subtotal == Decimal("160.00")
+
+    session.change_quantity(1, "3")
+    assert session.subtotal == Decimal("190.00")
+    session.add_materials([MaterialLine("brita", Decimal(2), "m3", Decimal("50.00"))])
+    assert session.subtotal == Decimal("290.00")
+    session.remove_material(("name", "areia"))
+    assert session.subtotal == Decimal("190.00")
+    assert session.subtotal == lines_total(session.materials)
+
+    session.remove_material(("index", 9))
+    session.change_quantity(9, "5")
+    assert session.subtotal == Decimal("190.00")
+
+    restored = ConversationSession.from_dict(session.to_dict())
+    assert restored.subtotal == Decimal("190.00")
+    assert restored.catalog_version == "v1"
+
+
+def test_route_text_keeps_predicate_precedence():
+    assert route_text("Sim!").kind is IntentKind.CONFIRM
+    assert route_text("NÃO").kind is IntentKind.CANCEL
+    assert route_text("meus dados").kind is IntentKind.PRIVACY_POLICY
+    # Regra por trecho de "apagar dados" vence o remove por nome
+    assert route_text("apagar o dado").kind is IntentKind.DELETE_DATA
+    assert route_text("manda de novo o orçamento").kind is IntentKind.LAST_BUDGET
+    assert route_text("remove item 3") == Intent(IntentKind.REMOVE, remove_target=("index", 3))
+    assert route_text("tira cimento").remove_target == ("name", "cimento")
+    assert route_text("excluir item").kind is IntentKind.UNKNOWN
+    assert route_text("item 4 qtd 2,5").quantity_change == (4, "2.5")
+    assert route_text("Adiciona 3 m³ de areia.").add_text == "3 m³ de areia."
+    assert route_text("bom dia").kind is IntentKind.UNKNOWN
+
+
+def test_route_edit_commands_splits_and_continues():
+    intents = route_edit_commands("remove 2, 5; qtd 3=10\nadiciona 4 saco de cal, 2 m de areia")
+    assert [i.kind for i in intents] == [
+        IntentKind.REMOVE,
+        IntentKind.REMOVE,
+        IntentKind.QUANTITY,
+        IntentKind.ADD,
+    ]
+    assert intents[1].remove_target == ("index", 5)
+    assert intents[3].add_text == "4 saco de cal, 2 m de areia"
+    assert route_edit_commands("qtd 1=2,5") is None
+    assert route_edit_commands("adiciona cimento, areia") is None
+    assert route_edit_commands("remove 2, sim") is None
+
+
+def test_route_edit_commands_splits_remove_list_without_spaces():
+    intents = route_edit_commands("remove 2,5")
+    assert [i.remove_target for i in intents] == [("index", 2), ("index", 5)]
+    intents = route_edit_commands("tira item 1,3,4; qtd 2=2,5")
+    assert [i.remove_target for i in intents[:3]] == [("index", 1), ("index", 3), ("index", 4)]
+    assert intents[3].quantity_change == (2, "2.5")
@@ -0,0 +1,129 @@
+"""Testes do micro-batching da extração Gemini."""
+import threading
+
+import pytest
+
+from app.domain import catalog_service
+from app.domain.catalog_service import get_canonical_names, pin_catalog_snapshot
+from app.services import gemini_batching
+from app.services.gemini_batching import GeminiExtractionBatcher
+from app.services.nlp_obras import current_matchers
+
+
+@pytest.fixture(autouse=True)
+def no_catalog_load(monkeypatch):
+    # Só o snapshot fixado pelo teste; sem carregar o catálogo de verdade
+    monkeypatch.setattr(gemini_batching, "get_catalog_snapshot", catalog_service._PINNED.get)
+
+
+def _result(text):
+    return {"tipo_obra": "obra", "materiais": [{"material": text}], "texto_corrigido": None, "raw": {}}
+
+
+def test_concurrent_submits_share_one_call():
+    calls = []
+
+    def extract_batch(texts, model_name):
+        calls.append(list(texts))
+        return [_result(t) for t in texts]
+
+    batcher = GeminiExtractionBatcher(
+        window_ms=300,
+        max_items=3,
+        extract_batch=extract_batch,
+        extract_single=lambda text, model_name: _result(text),
+    )
+    results = {}
+
+    def worker(text):
+        results[text] = batcher.submit(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["a", "b", "c"]
+    for text in ("a", "b", "c"):
+        assert results[text]["materiais"][0]["material"] == text
+
+
+def test_single_item_uses_single_prompt_and_failures_return_none():
+    batcher = GeminiExtractionBatcher(
+        window_ms=10,
+        max_items=8,
+        extract_batch=lambda texts, model_name: None,
+        extract_single=lambda text, model_name: None,
+    )
+    assert batcher.submit("cimento") is None
+
+
+def test_items_for_different_models_are_not_mixed():
+    calls = []
+
+    def extract_batch(texts, model_name):
+        calls.append((model_name, sorted(texts)))
+        return [_result(t) for t in texts]
+
+    def extract_single(text, model_name):
+        calls.append((model_name, [text]))
+        return _result(text)
+
+    batcher = GeminiExtractionBatcher(
+        window_ms=300,
+        max_items=3,
+        extract_batch=extract_batch,
+        extract_single=extract_single,
+    )
+    jobs = [("a", "leve"), ("b", "leve"), ("c", "completo")]
+    threads = [threading.Thread(target=batcher.submit, args=job) for job in jobs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert sorted(calls) == [("completo", ["c"]), ("leve", ["a", "b"])]
+
+
+def test_flush_sees_the_catalog_pinned_by_each_job(monkeypatch):
+    def load(tenant_id=None):
+        catalog = {"porcelanato": ["porcelanato"], f"rejunte {tenant_id}": ["rejunte"]}
+        maps = (catalog, {name: 10.0 for name in catalog}, {name: "caixa" for name in catalog}, {})
+        return maps, None
+
+    monkeypatch.setattr(catalog_service, "_load_from_supabase", load)
+    store_a = catalog_service._load_tenant_snapshot("loja-a")
+    store_b = catalog_service._load_tenant_snapshot("loja-b")
+    seen = []
+
+    def extract_single(text, model_name):
+        seen.append((text, sorted(get_canonical_names()), current_matchers().version))
+        return _result(text)
+
+    batcher = GeminiExtractionBatcher(
+        window_ms=300,
+        max_items=4,
+        extract_batch=lambda texts, model_name: None,
+        extract_single=extract_single,
+    )
+
+    def worker(text, snapshot):
+        with pin_catalog_snapshot(snapshot):
+            batcher.submit(text)
+
+    threads = [
+        threading.Thread(target=worker, args=("a", store_a)),
+        threading.Thread(target=worker, args=("b", store_b)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    # Lojas diferentes não dividem o prompt; cada flush usa o catálogo da sua
+    assert sorted(seen) == [
+        ("a", ["porcelanato", "rejunte loja-a"], store_a.version),
+        ("b", ["porcelanato", "rejunte loja-b"], store_b.version),
+    ]
@@ -0,0 +1,50 @@
+"""Testes do roteamento de modelo Gemini por complexidade."""
+from app.core.config import Settings
+from app.services.gemini_router import (
+    assess_transcript,
+    choose_gemini_model,
+    get_model_stats,
+    record_model_outcome,
+    reset_model_stats,
+)
+
+
+def _settings(**overrides):
+    values = {"GEMINI_MODEL": "modelo-completo", "GEMINI_LIGHT_MODEL": "modelo-leve"}
+    values.update(overrides)
+    return Settings(**values)
+
+
+def test_short_clean_transcript_goes_to_light_model():
+    decision = choose_gemini_model("10 sacos de cimento e 5 m de areia", _settings())
+    assert decision.tier == "light"
+    assert decision.model == "modelo-leve"
+
+
+def test_ambiguous_or_long_transcript_goes_to_full_model():
+    hedged = choose_gemini_model("acho que uns sacos de cimento, talvez areia", _settings())
+    assert hedged.tier == "full"
+
+    long_text = "preciso de 10 sacos de cimento " * 20
+    assert choose_gemini_model(long_text, _settings()).model == "modelo-completo"
+
+
+def test_routing_disabled_without_light_model():
+    decision = choose_gemini_model("10 sacos de cimento", _settings(GEMINI_LIGHT_MODEL=""))
+    assert decision.model == "modelo-completo"
+
+
+def test_assess_counts_candidates():
+    complexity = assess_transcript("10 sacos de cimento e 500 tijolos")
+    assert complexity.candidate_materials == 2
+    assert complexity.local_confidence == 1.0
+
+
+def test_model_stats():
+    reset_model_stats()
+    record_model_outcome("modelo-leve", 0.2, returned_items=4, valid_items=3)
+    record_model_outcome("modelo-leve", 0.4, failed=True)
+    stats = get_model_stats()["modelo-leve"]
+    assert stats["calls"] == 2
+    assert stats["failures"] == 1
+    assert stats["catalog_accuracy"] == 0.75
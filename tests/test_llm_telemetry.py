@@ -0,0 +1,64 @@
+"""Testes da telemetria de chamadas LLM."""
+from types import SimpleNamespace
+
+from app.infrastructure import metrics
+from app.services.llm_telemetry import (
+    collect_llm_calls,
+    merge_llm_usage,
+    parse_prices,
+    record_llm_call,
+    summarize_llm_calls,
+)
+
+
+def _response(prompt, output, cached=0):
+    usage = SimpleNamespace(
+        prompt_token_count=prompt,
+        candidates_token_count=output,
+        cached_content_token_count=cached,
+    )
+    return SimpleNamespace(text="{}", usage_metadata=usage)
+
+
+def test_calls_are_collected_per_job_and_counted():
+    metrics.reset_metrics()
+    with collect_llm_calls() as calls:
+        record_llm_call(model="m", operation="extraction", latency_seconds=0.5, response=_response(100, 20))
+        record_llm_call(model="m", operation="correction", latency_seconds=0.25, response=_response(50, 10, 40))
+
+    summary = summarize_llm_calls(calls)
+    assert summary["calls"] == 2
+    assert summary["prompt_tokens"] == 150
+    assert summary["output_tokens"] == 30
+    assert summary["latency_ms"] == 750.0
+    assert calls[1].cache_hit and not calls[0].cache_hit
+    assert metrics.get_counter("llm_prompt_tokens_total", model="m", operation="extraction") == 100
+
+
+def test_calls_outside_job_are_not_collected():
+    with collect_llm_calls() as calls:
+        pass
+    record_llm_call(model="m", operation="status", latency_seconds=0.1)
+    assert calls == []
+
+
+def test_parse_prices_and_share():
+    assert parse_prices("a=0.3/2.5, b=1") == {"a": (0.3, 2.5), "b": (1.0, 0.0)}
+    call = record_llm_call(model="m", operation="x", latency_seconds=0.1, response=_response(90, 30))
+    third = call.share(1 / 3)
+    assert (third.prompt_tokens, third.output_tokens) == (30, 10)
+
+
+def test_merge_llm_usage_adds_edit_calls_to_session_usage():
+    with collect_llm_calls() as first:
+        record_llm_call(model="m", operation="extraction", latency_seconds=0.5, response=_response(100, 20))
+    with collect_llm_calls() as edit:
+        record_llm_call(model="m", operation="extraction", latency_seconds=0.25, response=_response(40, 5))
+
+    merged = merge_llm_usage(summarize_llm_calls(first), edit)
+
+    assert merged["calls"] == 2
+    assert merged["prompt_tokens"] == 140
+    assert merged["latency_ms"] == 750.0
+    assert merge_llm_usage(merged, []) == merged
+    assert merge_llm_usage({}, edit)["calls"] == 1
@@ -0,0 +1,48 @@
+"""Testes da linha de material tipada e das conversões de borda."""
+import json
+from decimal import Decimal
+
+from app.domain.conversation import ConversationSession, ConversationState, build_confirmation_message
+from app.domain.material_line import MaterialLine, as_material_line, lines_total
+
+
+def test_from_dict_parses_once_and_keeps_legacy_access():
+    line = MaterialLine.from_dict(
+        {
+            "material": "Cimento",
+            "quantidade": "2,5",
+            "unidade": "sacos",
+            "preco_unitario": "32.90",
+            "obs": "CP-II",
+        }
+    )
+    assert line.quantity == Decimal("2.5")
+    assert line.total == Decimal("82.25")
+    assert line["quantidade"] == "2.5"
+    assert line["preco_total"] == "82.25"
+    assert line.get("obs") == "CP-II"
+    assert "preco_unitario" in line and "canonical" not in line
+
+
+def test_unpriced_line_behaves_like_dict_without_price():
+    line = as_material_line({"material": "areia", "quantidade": 3, "unidade": "m3"})
+    assert line.get("preco_total") is None
+    assert line.to_dict() == {"material": "areia", "quantidade": "3", "unidade": "m3"}
+
+
+def test_decimal_totals_do_not_drift():
+    lines = [MaterialLine("prego", Decimal("3"), "kg", Decimal("0.10"))] * 10
+    assert lines_total(lines) == Decimal("3.00")
+
+
+def test_session_round_trips_through_json():
+    session = ConversationSession(
+        state=ConversationState.AWAITING_CONFIRMATION,
+        materials=[{"material": "Cimento", "quantidade": "10", "unidade": "sacos", "preco_unitario": "30.00"}],
+    )
+    restored = ConversationSession.from_dict(json.loads(json.dumps(session.to_dict())))
+
+    assert restored.materials == session.materials
+    assert isinstance(restored.materials[0], MaterialLine)
+    assert restored.to_dict()["materials"][0]["preco_total"] == "300.00"
+    assert "R$ 300,00" in build_confirmation_message(restored.materials, "reforma")
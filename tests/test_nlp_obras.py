@@ -0,0 +1,189 @@
+"""Testes do extrator local de materiais (NLP obras)."""
+import re
+
+from app.services.nlp_obras import (
+    CATALOGO_MATERIAIS,
+    TokenKind,
+    build_synonym_index,
+    extract_materials_and_quantities,
+    match_catalog_name,
+    normalize_numbers_in_text,
+    normalize_quantity_token,
+    normalize_text,
+    parse_numeral_words,
+    tokenize_quantities,
+)
+from app.services.fuzzy_matcher import FuzzyVocabularyIndex, phonetic_key
+from app.services.synonym_matcher import CatalogNameIndex, SynonymMatcher
+
+SAMPLES = [
+    "Preciso de 10 sacos de cimento, 500 tijolos e 20 metros de madeira tratada",
+    "massa corrida 3 baldes, tinta 2 galões e um rolo de pintura",
+    "caixa d'água de 500 litros, 3 registros e 10 canos",
+    "telha colonial 200 unidades, ripas e caibros para o telhado",
+]
+
+
+def _regex_spans(text_norm, index):
+    seen, found = [], []
+    for synonym, canonical in index:
+        for m in re.finditer(r"(?<!\w)" + re.escape(synonym) + r"(?:s)?(?!\w)", text_norm):
+            start, end = m.span()
+            if any(not (end <= s or start >= e) for s, e in seen):
+                continue
+            found.append((start, end, canonical))
+            seen.append((start, end))
+    return found
+
+
+def test_matcher_matches_regex_reference():
+    index = build_synonym_index(CATALOGO_MATERIAIS)
+    matcher = SynonymMatcher(index)
+    for sample in SAMPLES:
+        text_norm = normalize_text(sample)
+        expected = _regex_spans(text_norm, index)
+        assert [(m.start, m.end, m.canonical) for m in matcher.find_longest(text_norm)] == expected
+
+
+def test_matcher_prefers_longest_synonym():
+    matcher = SynonymMatcher(build_synonym_index(CATALOGO_MATERIAIS))
+    matches = matcher.find_longest("massa corrida e tijolos")
+    assert [(m.synonym, m.canonical) for m in matches] == [
+        ("massa corrida", "massa corrida"),
+        ("tijolos", "tijolo"),
+    ]
+
+
+def test_extract_materials_and_quantities():
+    materials = extract_materials_and_quantities("Preciso de 10 sacos de cimento e 500 tijolos")
+    by_name = {m["material"]: m for m in materials}
+    assert by_name["Cimento"]["quantidade"] == "10"
+    assert by_name["Cimento"]["unidade"] == "sacos"
+    assert by_name["Tijolo"]["quantidade"] == "500"
+
+
+def _regex_match_name(norm, index):
+    for synonym, canonical in index:
+        if norm == synonym:
+            return canonical
+    for synonym, canonical in index:
+        if re.search(r"(?<!\w)" + re.escape(synonym) + r"(?:s)?(?!\w)", norm):
+            return canonical
+    return None
+
+
+def test_name_index_matches_regex_reference():
+    index = build_synonym_index(CATALOGO_MATERIAIS)
+    name_index = CatalogNameIndex(index)
+    names = [
+        "cimento",
+        "sacos de cimento cp2",
+        "tijolos ceramicos",
+        "Caixa D'Água",
+        "arame recozido 18",
+        "telhas coloniais",
+        "bloco de concreto",
+        "fios",
+        "xyz",
+        "",
+    ]
+    for name in names:
+        norm = normalize_text(name)
+        assert name_index.lookup(norm) == _regex_match_name(norm, index), name
+    assert match_catalog_name("Tijolos de barro") == "tijolo"
+
+
+def test_tokenizer_attaches_quantity_by_position():
+    tokens = tokenize_quantities(normalize_text("10m de fio, cimento 3 sacos"))
+    assert [t.kind for t in tokens] == [
+        TokenKind.NUMBER,
+        TokenKind.UNIT,
+        TokenKind.CONNECTOR,
+        TokenKind.MATERIAL,
+        TokenKind.SEPARATOR,
+        TokenKind.MATERIAL,
+        TokenKind.NUMBER,
+        TokenKind.UNIT,
+    ]
+    materials = extract_materials_and_quantities("10m de fio, cimento 3 sacos")
+    assert materials == [
+        {"material": "Fio", "quantidade": "10", "unidade": "m"},
+        {"material": "Cimento", "quantidade": "3", "unidade": "sacos"},
+    ]
+
+
+def test_unit_word_between_number_and_material_is_not_a_material():
+    materials = extract_materials_and_quantities("5 rolos de fio elétrico e um rolo de pintura")
+    assert materials == [
+        {"material": "Fio", "quantidade": "5", "unidade": "rolos"},
+        {"material": "Rolo", "quantidade": "1", "unidade": "unidade"},
+    ]
+
+
+def test_parse_numeral_words_compounds():
+    assert parse_numeral_words("vinte e cinco sacos".split()) == (25, 3)
+    assert parse_numeral_words("duzentos e cinquenta tijolos".split()) == (250, 3)
+    assert parse_numeral_words("dois mil e quinhentos".split()) == (2500, 4)
+    assert parse_numeral_words("dois e meio metros".split()) == (2.5, 3)
+    assert parse_numeral_words("duas duzias".split()) == (24, 2)
+    assert parse_numeral_words("cimento".split()) is None
+
+
+def test_normalize_numbers_in_text_handles_compounds():
+    assert normalize_numbers_in_text("vinte e cinco sacos e tres metros") == "25 sacos e 3 metros"
+    assert normalize_quantity_token("trezentos e vinte") == "320"
+
+
+def test_extractor_uses_compound_numerals():
+    materials = extract_materials_and_quantities(
+        "vinte e cinco sacos de cimento, um metro e meio de tela e meia dúzia de telhas"
+    )
+    assert materials == [
+        {"material": "Cimento", "quantidade": "25", "unidade": "sacos"},
+        {"material": "Tela", "quantidade": "1.5", "unidade": "metro"},
+        {"material": "Telha", "quantidade": "6", "unidade": "unidade"},
+    ]
+
+
+def test_half_dozen_after_unit_is_a_new_item():
+    assert extract_materials_and_quantities("cimento 5 sacos e meia dúzia de tijolos") == [
+        {"material": "Cimento", "quantidade": "5", "unidade": "sacos"},
+        {"material": "Tijolo", "quantidade": "6", "unidade": "unidade"},
+    ]
+
+
+def test_half_that_starts_the_next_item_is_its_own_quantity():
+    assert extract_materials_and_quantities("cimento 5 sacos e meio metro de areia") == [
+        {"material": "Cimento", "quantidade": "5", "unidade": "sacos"},
+        {"material": "Areia", "quantidade": "0.5", "unidade": "metro"},
+    ]
+    assert extract_materials_and_quantities("cimento 5 sacos e meia lata de tinta") == [
+        {"material": "Cimento", "quantidade": "5", "unidade": "sacos"},
+        {"material": "Tinta", "quantidade": "0.5", "unidade": "lata"},
+    ]
+    assert extract_materials_and_quantities("cimento 2 sacos e meio, 3 metros de areia")[0] == {
+        "material": "Cimento", "quantidade": "2.5", "unidade": "sacos",
+    }
+
+
+def test_fuzzy_index_corrects_misheard_words():
+    index = FuzzyVocabularyIndex(build_synonym_index(), stopwords={"preciso"})
+    assert phonetic_key("simento") == phonetic_key("cimento")
+    assert index.correct_word("simento") == "cimento"
+    assert index.correct_word("tijollo") == "tijolo"
+    assert index.correct_word("madera") == "madeira"
+    assert index.correct_word("simentos") == "cimentos"
+    # troca de letra que muda o som não é corrigida; stopwords e palavras curtas ficam de fora
+    assert index.correct_word("porta") is None
+    assert index.correct_word("preciso") is None
+    assert index.correct_word("cao") is None
+
+
+def test_fuzzy_fallback_in_name_lookup_and_extractor():
+    assert match_catalog_name("Simento CP II") == "cimento"
+    assert match_catalog_name("xapisco") == "chapisco"
+    materials = extract_materials_and_quantities("10 sacos de simento e 5 metros de madera tratada")
+    assert materials == [
+        {"material": "Cimento", "quantidade": "10", "unidade": "sacos"},
+        {"material": "Madeira", "quantidade": "5", "unidade": "metros"},
+    ]
@@ -0,0 +1,43 @@
+"""Testes da pré-renderização especulativa do PDF do orçamento."""
+import os
+
+import pytest
+
+from app.core.config import get_settings
+from app.infrastructure import metrics
+from app.services import pdf_speculation
+from app.services.pdf_speculation import budget_pdf_key, speculate_budget_pdf, take_prerendered_pdf
+
+MATERIALS = [{"material": "cimento", "quantidade": "10", "unidade": "saco", "preco_unitario": "30.00"}]
+
+
+@pytest.fixture(autouse=True)
+def isolated_speculation(monkeypatch, tmp_path):
+    metrics.reset_metrics()
+    monkeypatch.setattr(pdf_speculation, "_SPECULATIONS", {})
+    monkeypatch.setattr(pdf_speculation, "_TEMP_DIR", str(tmp_path))
+    return get_settings().model_copy(update={"pdf_prerender_enabled": True, "pdf_prerender_upload": False})
+
+
+def test_confirmation_reuses_prerendered_pdf(isolated_speculation):
+    key = speculate_budget_pdf("5511", MATERIALS, "reforma", "v1", isolated_speculation)
+    assert speculate_budget_pdf("5511", MATERIALS, "reforma", "v1", isolated_speculation) == key
+    assert key == budget_pdf_key(MATERIALS, "reforma", "v1")
+
+    rendered = take_prerendered_pdf("5511", key)
+    assert rendered is not None and os.path.exists(rendered.pdf_path)
+    assert rendered.total_amount == 300.0
+    assert metrics.get_counter("pdf_speculation_total", result="hit") == 1
+    assert metrics.get_counter("pdf_speculation_started_total") == 1
+    assert take_prerendered_pdf("5511", key) is None
+
+
+def test_edited_list_counts_wasted_render(isolated_speculation, tmp_path):
+    old_key = speculate_budget_pdf("5511", MATERIALS, "reforma", "v1", isolated_speculation)
+    edited = [dict(MATERIALS[0], quantidade="12")]
+    speculate_budget_pdf("5511", edited, "reforma", "v1", isolated_speculation)
+
+    assert take_prerendered_pdf("5511", old_key) is None
+    assert metrics.get_counter("pdf_speculation_wasted_total", reason="replaced") == 1
+    assert metrics.get_counter("pdf_speculation_wasted_total", reason="stale") == 1
+    assert metrics.get_counter("pdf_speculation_total", result="miss") == 1
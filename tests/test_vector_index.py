@@ -0,0 +1,64 @@
+"""Testes do índice vetorial (TF-IDF de n-gramas) do catálogo."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.domain.catalog_seed import DEFAULT_DESCRIPTIONS
+from app.services import nlp_obras
+from app.services.nlp_obras import (
+    CATALOGO_MATERIAIS,
+    extract_materials_and_quantities,
+    match_catalog_name,
+    normalize_text,
+    set_vector_index,
+)
+from app.services.vector_index import VectorIndex, build_documents, load_or_build
+
+
+@pytest.fixture
+def documents():
+    return build_documents(CATALOGO_MATERIAIS, DEFAULT_DESCRIPTIONS, normalize_text)
+
+
+@pytest.fixture
+def vector_index(documents):
+    previous = nlp_obras.current_matchers()
+    index = VectorIndex.build(documents, dim=2048)
+    set_vector_index(index)
+    yield index
+    nlp_obras.publish_catalog_matchers(previous)
+
+
+def test_query_returns_ranked_top_k(vector_index):
+    hits = vector_index.query(normalize_text("peça embaixo da pia"), top_k=3)
+    assert hits[0][0] == "sifão"
+    assert len(hits) == 3
+    assert hits[0][1] >= hits[1][1] >= hits[2][1]
+    batch = vector_index.query_many(["cimento", "fita metrica para medir"], top_k=1)
+    assert [hits[0][0] for hits in batch] == ["cimento", "trena"]
+
+
+def test_descriptions_resolve_names_and_clauses(vector_index):
+    assert match_catalog_name("ferro fino de amarrar") == "arame"
+    assert match_catalog_name("Tijolos de barro") == "tijolo"
+    assert match_catalog_name("janela de alumínio") is None
+    materials = extract_materials_and_quantities(
+        "3 daquele ferro fino de amarrar, 4 daquela peça embaixo da pia e 20 metros de madeira para o telhado"
+    )
+    assert [(m["material"], m["quantidade"]) for m in materials] == [
+        ("Arame", "3"),
+        ("Sifão", "4"),
+        ("Madeira", "20"),
+    ]
+
+
+def test_saved_version_is_memory_mapped(tmp_path, documents):
+    built = load_or_build(documents, tmp_path, dim=1024)
+    assert isinstance(built.matrix, np.memmap)
+    reopened = load_or_build(documents, tmp_path, dim=1024)
+    assert reopened.version == built.version
+    assert reopened.query("arame recozido")[0][0] == "arame"
+
+    changed = dict(documents, arame=documents["arame"] + " fio de amarrar")
+    load_or_build(changed, tmp_path, dim=1024)
+    assert len(list(tmp_path.glob("catalog-*.names.json"))) == 1